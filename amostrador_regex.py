@@ -0,0 +1,139 @@
+# amostrador_regex.py
+# Sorteio de strings que casam com um regex, a partir da árvore de `exrex.parse` compilada em funções.
+
+import functools
+
+try:
+    import exrex
+except ImportError:
+    raise ImportError("A biblioteca 'exrex' é necessária. Instale-a com: pip install exrex")
+
+try:
+    import re._parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# Máximo de repetições sorteadas para `*`, `+` e `{n,}` (o mesmo padrão do exrex)
+LIMITE_REPETICAO_REGEX = 20
+# Padrões distintos mantidos já compilados
+TAMANHO_CACHE_REGEX = 256
+
+
+@functools.lru_cache(maxsize=TAMANHO_CACHE_REGEX)
+def compilar_regex(padrao):
+    """Interpreta `padrao` uma única vez; o amostrador não guarda estado e pode ser compartilhado."""
+    return AmostradorRegex(exrex.parse(padrao))
+
+
+class AmostradorRegex:
+    """Sorteia strings que casam com um regex, como `exrex.getone`, mas com o `rng` informado.
+
+    Padrões de forma fixa (ex.: máscaras de CPF) viram um formato com uma posição `{}` por caractere sorteado."""
+    __slots__ = ('sortear_arvore', 'formato', 'posicoes')
+
+    def __init__(self, arvore):
+        self.sortear_arvore = _compilar_arvore_regex(arvore)
+        self.formato, self.posicoes = _moldar_regex(arvore) or (None, None)
+
+    def sortear(self, rng):
+        if self.formato is None: return self.sortear_arvore(rng, {})
+        return self.formato.format(*[rng.choice(caracteres) for caracteres in self.posicoes])
+
+    def sortear_lote(self, rng, k):
+        """Sorteia k strings."""
+        if self.formato is None: return [self.sortear_arvore(rng, {}) for _ in range(k)]
+        if not self.posicoes: return [self.formato.format()] * k
+        return list(map(self.formato.format, *[rng.choices(caracteres, k=k) for caracteres in self.posicoes]))
+
+
+def _compilar_arvore_regex(itens, limite=LIMITE_REPETICAO_REGEX):
+    """Compila a árvore de `exrex.parse` em uma função (rng, grupos) -> str, seguindo as regras do exrex."""
+    partes = [parte for parte in (_compilar_item_regex(operacao, argumento, limite) for operacao, argumento in itens)
+              if parte is not None]
+    if len(partes) == 1: return partes[0]
+    return lambda rng, grupos: ''.join([parte(rng, grupos) for parte in partes])
+
+
+def _compilar_item_regex(operacao, argumento, limite):
+    caracteres = _caracteres_do_item(operacao, argumento)
+    if caracteres is not None: return lambda rng, grupos: rng.choice(caracteres)
+    if operacao == sre_parse.LITERAL:
+        literal = chr(argumento)
+        return lambda rng, grupos: literal
+    if operacao in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+        minimo, maximo, subitens = argumento
+        maximo = min(maximo, minimo + limite - 1)
+        sortear = _compilar_arvore_regex(subitens, limite)
+        return lambda rng, grupos: ''.join([sortear(rng, grupos) for _ in range(rng.randint(minimo, maximo))])
+    if operacao == sre_parse.BRANCH:
+        ramos = [_compilar_arvore_regex(ramo, limite) for ramo in argumento[1]]
+        return lambda rng, grupos: rng.choice(ramos)(rng, grupos)
+    if operacao == sre_parse.SUBPATTERN:
+        grupo, sortear = argumento[0], _compilar_arvore_regex(argumento[3], limite)
+        if not grupo: return sortear
+
+        def _sortear_grupo(rng, grupos):
+            texto = grupos[grupo] = sortear(rng, grupos)
+            return texto
+        return _sortear_grupo
+    if operacao == sre_parse.ASSERT: return _compilar_arvore_regex(argumento[1], limite)
+    if operacao == sre_parse.GROUPREF: return lambda rng, grupos: grupos[argumento]
+    return None  # AT e ASSERT_NOT não produzem caracteres
+
+
+def _moldar_regex(itens):
+    """Reduz uma árvore de forma fixa a (formato, posições), ou retorna None se a forma variar entre sorteios."""
+    formato, posicoes = [], []
+    for operacao, argumento in itens:
+        caracteres = _caracteres_do_item(operacao, argumento)
+        if caracteres is not None:
+            if not caracteres: return None  # Deixa o erro de classe vazia para o sorteio pela árvore
+            formato.append('{}')
+            posicoes.append(caracteres)
+            continue
+        if operacao == sre_parse.LITERAL:
+            formato.append(chr(argumento).replace('{', '{{').replace('}', '}}'))
+            continue
+        if operacao in (sre_parse.AT, sre_parse.ASSERT_NOT): continue
+        if operacao in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            vezes, maximo, subitens = argumento
+            if vezes != maximo: return None
+        elif operacao in (sre_parse.SUBPATTERN, sre_parse.ASSERT):
+            vezes, subitens = 1, argumento[3] if operacao == sre_parse.SUBPATTERN else argumento[1]
+        else:
+            return None  # Alternativas e referências a grupos
+        molde = _moldar_regex(subitens)
+        if molde is None: return None
+        formato.append(molde[0] * vezes)
+        posicoes.extend(molde[1] * vezes)
+    return ''.join(formato), posicoes
+
+
+def _caracteres_do_item(operacao, argumento):
+    """Tupla de caracteres entre os quais um item de um só caractere é sorteado, ou None para os demais itens."""
+    if operacao == sre_parse.IN: return tuple(_caracteres_do_conjunto(argumento))
+    if operacao == sre_parse.CATEGORY: return tuple(exrex.CATEGORIES.get(argumento, ['']))
+    if operacao == sre_parse.ANY: return tuple(exrex.CATEGORIES['category_any'])
+    if operacao == sre_parse.NOT_LITERAL:
+        return tuple(c for c in exrex.CATEGORIES['category_any'] if c != chr(argumento))
+    return None
+
+
+def _caracteres_do_conjunto(itens):
+    """Lista os caracteres aceitos por uma classe `[...]` da árvore do regex (equivalente a `exrex._in`)."""
+    caracteres, negado = [], False
+    for operacao, argumento in itens:
+        if operacao == sre_parse.NEGATE:
+            caracteres, negado = list(exrex.CATEGORIES['category_any']), True
+            continue
+        if operacao == sre_parse.RANGE: alvo = [chr(c) for c in range(argumento[0], argumento[1] + 1)]
+        elif operacao == sre_parse.LITERAL: alvo = [chr(argumento)]
+        elif operacao == sre_parse.CATEGORY: alvo = exrex.CATEGORIES.get(argumento, [''])
+        else: continue
+        if negado:
+            removidos = set(alvo)
+            caracteres = [c for c in caracteres if c not in removidos]
+        else:
+            caracteres.extend(alvo)
+    return caracteres
+
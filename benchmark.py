@@ -0,0 +1,192 @@
+# benchmark.py
+# Suíte de benchmarks do motor de geração, executada sem interface gráfica.
+#
+# Uso: python -m massbuilder benchmark [--rows 10000 1000000] [--only tipo fk] [--output resultados.json]
+# Cada cenário é uma sessão sintética no formato de `config_to_load.json`, gerada em um processo novo para que o
+# pico de memória (RSS) medido seja apenas o dele.
+
+import concurrent.futures
+import datetime
+import math
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows: o pico de memória não é medido
+
+from data_generator import generate_from_config, compilar_valor_atomico
+
+ESCALAS_PADRAO = [10_000]
+# Parâmetros de cada tipo de campo medido isoladamente
+CAMPOS_POR_TIPO = {
+    'integer': {'tipo': 'integer', 'limite': ['1', '1000000']},
+    'float': {'tipo': 'float', 'limite': ['0', '10000']},
+    'string': {'tipo': 'string', 'limite': ['5', '20']},
+    'boolean': {'tipo': 'boolean'},
+    'datetime': {'tipo': 'datetime', 'limite': ['2000-01-01', '2024-12-31']},
+    'uuid': {'tipo': 'uuid'},
+    'lista_opcoes': {'tipo': 'lista_opcoes', 'opcoes': ['A', 'B', 'C', 'D', 'E']},
+    'regex': {'tipo': 'regex', 'regex_pattern': r'\d{3}\.\d{3}\.\d{3}-\d{2}'},
+    'regex_variavel': {'tipo': 'regex', 'regex_pattern': r'[a-z]{3,12}@(gmail|hotmail|empresa)\.com(\.br)?'},
+    'nome_pessoa': {'tipo': 'nome_pessoa'},
+}
+# Tamanho do domínio da constraint de unicidade em relação ao número de linhas
+DOMINIO_POR_COLISAO = {'baixa': 100, 'media': 2, 'alta': 1.1}
+# Chamadas de `compilar_valor_atomico` medidas por tipo (valores isolados, sem montar linhas nem gravar)
+CHAMADAS_POR_VALOR = 200_000
+
+
+def _campo(nome, **parametros):
+    return {'nome': nome, 'e_pk': False, 'repeticao': 0, **parametros}
+
+
+def _arquivo(nome, num_linhas, campos, regras_sort=(), constraint_unicidade=()):
+    return {'nome_arquivo': nome, 'num_linhas': num_linhas, 'separador': ',', 'codificacao': 'utf-8',
+            'regras_sort': list(regras_sort), 'constraint_unicidade': list(constraint_unicidade), 'campos': campos}
+
+
+def criar_cenarios(num_linhas):
+    """Retorna {nome do cenário: sessão sintética} para a escala `num_linhas`."""
+    cenarios = {f'tipo:{tipo}': {'arquivos': [_arquivo('TIPO', num_linhas, [_campo('VALOR', **parametros)])]}
+                for tipo, parametros in CAMPOS_POR_TIPO.items()}
+
+    cenarios['condicional'] = {'arquivos': [_arquivo('PESSOA', num_linhas, [
+        _campo('TIPO_PESSOA', tipo='lista_opcoes', opcoes=['PF', 'PJ']),
+        _campo('FG_SIMPLES_NACIONAL', tipo='integer', limite=['', ''], condicional={
+            'campo_ref': 'TIPO_PESSOA', 'operador': 'é igual a', 'valor_ref': 'PJ',
+            'acao_verdadeiro': {'tipo': 'lista_opcoes', 'opcoes': ['0', '1']}, 'acao_falso': {'tipo': 'Nulo/Vazio'}}),
+        _campo('RENDA', tipo='float', limite=['0', '50000'], condicional={
+            'campo_ref': 'TIPO_PESSOA', 'operador': 'é igual a', 'valor_ref': 'PF',
+            'acao_verdadeiro': {'tipo': 'Usar Geração Padrão'}, 'acao_falso': {'tipo': 'Valor Fixo', 'valor_fixo': '0'}}),
+    ])]}
+    # CASE sobre uma lista de opções (tabela de despacho) e casos com condições E/OU sobre vários campos
+    regioes = {'SP': 'SE', 'RJ': 'SE', 'MG': 'SE', 'BA': 'NE', 'PE': 'NE', 'RS': 'S', 'PR': 'S', 'AM': 'N'}
+    cenarios['condicional:casos'] = {'arquivos': [_arquivo('CLIENTE', num_linhas, [
+        _campo('UF', tipo='lista_opcoes', opcoes=list(regioes) + ['DF', 'GO']),
+        _campo('IDADE', tipo='integer', limite=['18', '90']),
+        _campo('REGIAO', tipo='string', limite=['2', '2'], condicional={
+            'casos': [{'condicao': {'campo_ref': 'UF', 'operador': 'é igual a', 'valor_ref': uf},
+                       'acao': {'tipo': 'Valor Fixo', 'valor_fixo': regiao}} for uf, regiao in regioes.items()],
+            'senao': {'tipo': 'Valor Fixo', 'valor_fixo': 'CO'}}),
+        _campo('FAIXA', tipo='string', limite=['1', '1'], condicional={
+            'casos': [{'condicao': {'e': [{'campo_ref': 'REGIAO', 'operador': 'é igual a', 'valor_ref': 'SE'},
+                                          {'campo_ref': 'IDADE', 'operador': '>=', 'valor_ref': '60'}]},
+                       'acao': {'tipo': 'Valor Fixo', 'valor_fixo': 'SENIOR_SE'}},
+                      {'condicao': {'ou': [{'campo_ref': 'IDADE', 'operador': '<', 'valor_ref': '25'},
+                                           {'campo_ref': 'UF', 'operador': 'é igual a', 'valor_ref': 'DF'}]},
+                       'acao': {'tipo': 'lista_opcoes', 'opcoes': ['JOVEM', 'ESTUDANTE']}}],
+            'senao': {'tipo': 'Usar Geração Padrão'}}),
+    ])]}
+
+    for colisao, fator in DOMINIO_POR_COLISAO.items():
+        lado = math.ceil(math.sqrt(num_linhas * fator))
+        cenarios[f'unicidade:{colisao}'] = {'arquivos': [_arquivo('COMBINACAO', num_linhas, [
+            _campo('A', tipo='integer', limite=['1', str(lado)]),
+            _campo('B', tipo='integer', limite=['1', str(lado)]),
+            _campo('DESCRICAO', tipo='string', limite=['5', '10']),
+        ], constraint_unicidade=['A', 'B'])]}
+
+    for rotulo, cardinalidade in (('1n', 'Um-para-Muitos (1:N)'), ('11', 'Um-para-Um (1:1)')):
+        cenarios[f'fk:{rotulo}'] = {'arquivos': [
+            _arquivo('PAI', num_linhas, [_campo('ID', tipo='integer', e_pk=True, limite=['1', str(num_linhas * 10)])]),
+            _arquivo('FILHO', num_linhas, [
+                _campo('ID_PAI', tipo='chave_estrangeira', fk_arquivo='PAI', fk_campo='ID', cardinalidade=cardinalidade),
+                _campo('VALOR', tipo='float', limite=['0', '1000'])]),
+        ]}
+
+    cenarios['ordenacao'] = {'arquivos': [_arquivo('ORDENADO', num_linhas, [
+        _campo('GRUPO', tipo='lista_opcoes', opcoes=['A', 'B', 'C', 'D']),
+        _campo('DATA', tipo='datetime', limite=['2020-01-01', '2024-12-31']),
+        _campo('VALOR', tipo='float', limite=['0', '1000']),
+    ], regras_sort=[{'campo': 'GRUPO', 'ordem': 'Ascendente'}, {'campo': 'DATA', 'ordem': 'Descendente'}])]}
+    return cenarios
+
+
+def _pico_rss_mb():
+    """Maior RSS deste processo e de seus filhos já encerrados, em MB (None sem o módulo `resource`)."""
+    if resource is None: return None
+    pico = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024  # bytes no macOS, KB no Linux
+
+
+def _executar_cenario(sessao):
+    """Executado em um processo novo: gera a sessão em uma pasta temporária e mede tempo e memória."""
+    with tempfile.TemporaryDirectory(prefix='massbuilder_benchmark_') as pasta:
+        os.chdir(pasta)
+        inicio = time.perf_counter()
+        relatorio = generate_from_config(sessao)
+        segundos = time.perf_counter() - inicio
+        tamanho = sum(os.path.getsize(nome) for nome in os.listdir(pasta))
+    linhas = sum(estatisticas.get('linhas', 0) for estatisticas in relatorio.values())
+    return {'linhas': linhas, 'segundos': round(segundos, 4), 'linhas_por_segundo': round(linhas / segundos, 1),
+            'mb_gravados': round(tamanho / 1e6, 2), 'pico_rss_mb': _pico_rss_mb(),
+            'colisoes': sum(estatisticas.get('colisoes', 0) for estatisticas in relatorio.values())}
+
+
+def _medir_valores(tipo, parametros, chamadas=CHAMADAS_POR_VALOR):
+    """Chamadas por segundo do gerador compilado de um campo, sem montar linhas nem gravar."""
+    gerar_valor = compilar_valor_atomico(_campo('VALOR', **parametros), rng=random.Random(0))
+    inicio = time.perf_counter()
+    for _ in range(chamadas): gerar_valor()
+    segundos = time.perf_counter() - inicio
+    return {'cenario': f'valor:{tipo}', 'chamadas': chamadas, 'segundos': round(segundos, 4),
+            'chamadas_por_segundo': round(chamadas / segundos, 1)}
+
+
+def executar(escalas=ESCALAS_PADRAO, filtros=None, motor='linha', workers=1, semente=0, ao_concluir=None):
+    """Executa os cenários (os que contêm algum dos `filtros`, se informados) em cada escala.
+
+    Retorna o documento de resultados, pronto para ser salvo em JSON."""
+    contexto = multiprocessing.get_context('spawn')
+    resultados = []
+
+    def _registrar(resultado):
+        resultados.append(resultado)
+        if ao_concluir: ao_concluir(resultado)
+
+    for tipo, parametros in CAMPOS_POR_TIPO.items():
+        if not filtros or any(f in f'valor:{tipo}' for f in filtros): _registrar(_medir_valores(tipo, parametros))
+
+    for num_linhas in escalas:
+        for nome, sessao in criar_cenarios(num_linhas).items():
+            if filtros and not any(f in nome for f in filtros): continue
+            sessao.update(motor=motor, workers=workers, semente=semente)
+            with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+                try:
+                    resultado = executor.submit(_executar_cenario, sessao).result()
+                except Exception as e:
+                    resultado = {'erro': str(e)}
+            _registrar({'cenario': nome, 'escala': num_linhas, **resultado})
+
+    return {'data': datetime.datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+            'plataforma': platform.platform(), 'processador': platform.processor() or platform.machine(),
+            'motor': motor, 'workers': workers, 'semente': semente, 'resultados': resultados}
+
+
+def comparar(atual, anterior):
+    """Lista a variação de vazão de cada cenário em relação a um resultado anterior."""
+    chave = lambda r: (r['cenario'], r.get('escala'))
+    vazao = lambda r: r.get('linhas_por_segundo') or r.get('chamadas_por_segundo')
+    anteriores = {chave(r): vazao(r) for r in anterior.get('resultados', []) if vazao(r)}
+    linhas = []
+    for resultado in atual['resultados']:
+        if vazao(resultado) and anteriores.get(chave(resultado)):
+            variacao = vazao(resultado) / anteriores[chave(resultado)] - 1
+            linhas.append(f"{resultado['cenario']:<24} {resultado.get('escala') or '':>10} {variacao:+.1%}")
+    return linhas
+
+
+def formatar(resultado):
+    if 'erro' in resultado: return f"{resultado['cenario']:<24} {resultado['escala']:>10}  ERRO: {resultado['erro']}"
+    if 'chamadas_por_segundo' in resultado:
+        return f"{resultado['cenario']:<24} {'':>10} {resultado['chamadas_por_segundo']:>14,.0f} valores/s"
+    rss = f"{resultado['pico_rss_mb']:.0f} MB" if resultado['pico_rss_mb'] is not None else "n/d"
+    return (f"{resultado['cenario']:<24} {resultado['escala']:>10} {resultado['linhas_por_segundo']:>14,.0f} linhas/s"
+            f" {resultado['segundos']:>9.2f}s  pico RSS {rss}")
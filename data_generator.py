@@ -1,57 +1,255 @@
 # data_generator.py
 
-import csv
+import array
+import collections.abc
+import concurrent.futures
+import contextlib
+import cProfile
+import hashlib
+import heapq
+import itertools
+import math
+import multiprocessing
+import operator
+import os
+import pickle
+import queue
 import random
+import re
+import signal
 import string
+import sys
+import tempfile
+import time
 import datetime
 import uuid
-from utils import LISTA_NOMES, LISTA_SOBRENOMES
+from amostrador_regex import compilar_regex
+from regras import campos_referenciados, compilar_regra, normalizar_regra
+from saida import DestinoBanco, concatenar_fatias, escrever_fatia, escrever_saida, nome_arquivo_final, validar_formato
+from utils import INT64_MAX, INT64_MIN, LISTA_NOMES, LISTA_SOBRENOMES
 
 try:
-    import exrex
+    import numpy as np
 except ImportError:
-    raise ImportError("A biblioteca 'exrex' é necessária. Instale-a com: pip install exrex")
+    np = None  # Opcional: necessário apenas para o motor colunar
 
+ALFABETO_STRING = string.ascii_letters + string.digits
+# Maior lote de strings sorteado de cada vez por campo regex
+LOTE_MAXIMO_REGEX = 4096
+VALORES_BOOLEANOS = (True, False)
+# Intervalos de datas até este tamanho (em dias) memorizam as datas já formatadas
+LIMITE_CACHE_DATAS = 100_000
 
-def _criar_valor_atomico(campo, chaves_geradas=None, linha_atual=None):
-    """Gera um único valor. Pode receber contexto da linha atual e chaves geradas."""
+# Motor colunar: tipos sorteados em lote (com NumPy, ou com o amostrador de regex) e tamanho máximo de cada lote
+TIPOS_VETORIZAVEIS = {'integer', 'float', 'boolean', 'datetime', 'lista_opcoes', 'uuid', 'regex'}
+TAMANHO_LOTE_COLUNAR = 65_536
+
+# Quantidade de linhas geradas e gravadas de cada vez
+TAMANHO_LOTE_ESCRITA = 10_000
+# Tamanho das fatias em que arquivos grandes sem unicidade são gerados (em série ou em paralelo)
+LINHAS_POR_FATIA = 50_000
+# Intervalo mínimo, em segundos, entre dois eventos de progresso
+INTERVALO_PROGRESSO = 0.25
+# Linhas exibidas na pré-visualização de um arquivo (e chaves amostradas de cada arquivo pai)
+LINHAS_AMOSTRA = 50
+# Sorteios permitidos por linha em arquivos com constraint de unicidade, antes de desistir da geração
+TENTATIVAS_POR_LINHA = 20
+# Teto do domínio calculado de um campo: acima dele o domínio é, na prática, ilimitado e não precisa ser exato
+DOMINIO_SATURADO = 2 ** 128
+# Rótulos das etapas instrumentadas, na ordem em que aparecem no resumo do perfil
+ROTULOS_ETAPAS = {'geracao': 'geração', 'valores': 'valores', 'condicoes': 'condições', 'unicidade': 'unicidade',
+                  'chaves': 'PKs', 'ordenacao': 'ordenação', 'gravacao': 'gravação', 'concatenacao': 'concatenação'}
+# Memória (aproximada) disponível para ordenar um arquivo antes de recorrer à ordenação externa
+MEMORIA_SORT_MB_PADRAO = 512
+
+
+def compilar_valor_atomico(campo, chaves_geradas=None, rng=random):
+    """Compila um campo em uma função sem argumentos que sorteia um valor com `rng`.
+
+    Os parâmetros são interpretados uma única vez; parâmetros inválidos só falham quando a função é chamada."""
     tipo = campo.get('tipo', 'string')
+    nome_campo = campo.get('nome', 'Desconhecido')
 
-    if tipo == 'Nulo/Vazio': return ''
-    if tipo == 'Valor Fixo': return campo.get('valor_fixo', '')
+    if tipo == 'Nulo/Vazio': return lambda: ''
+    if tipo == 'Valor Fixo':
+        valor_fixo = campo.get('valor_fixo', '')
+        return lambda: valor_fixo
     if tipo == 'chave_estrangeira':
         arquivo_origem, campo_origem = campo['fk_arquivo'], campo['fk_campo']
-        pk_disponiveis = chaves_geradas.get(arquivo_origem, {}).get(campo_origem)
-        if not pk_disponiveis: raise ValueError(
-            f"Nenhuma chave primária encontrada para {arquivo_origem}.{campo_origem}.")
-        return random.choice(pk_disponiveis)
+        pk_disponiveis = (chaves_geradas or {}).get(arquivo_origem, {}).get(campo_origem)
+        if not pk_disponiveis: return _compilar_falha(ValueError(
+            f"Nenhuma chave primária encontrada para {arquivo_origem}.{campo_origem}."))
+        return lambda: rng.choice(pk_disponiveis)
     if tipo == 'nome_pessoa':
-        nome, num_sobrenomes = random.choice(LISTA_NOMES), random.randint(1, 2)
-        sobrenomes_escolhidos = random.sample(LISTA_SOBRENOMES, num_sobrenomes)
-        return f"{nome} {' '.join(sobrenomes_escolhidos)}"
+        def _gerar_nome():
+            nome, num_sobrenomes = rng.choice(LISTA_NOMES), rng.randint(1, 2)
+            return f"{nome} {' '.join(rng.sample(LISTA_SOBRENOMES, num_sobrenomes))}"
+        return _gerar_nome
     try:
-        if tipo == 'integer': return random.randint(int(campo['limite'][0]), int(campo['limite'][1]))
-        if tipo == 'float': return round(random.uniform(float(campo['limite'][0]), float(campo['limite'][1])), 2)
-        if tipo == 'string': return ''.join(random.choice(string.ascii_letters + string.digits) for _ in
-                                            range(random.randint(int(campo['limite'][0]), int(campo['limite'][1]))))
-        if tipo == 'boolean': return random.choice([True, False])
+        if tipo == 'integer':
+            minimo, maximo = _ler_limites(campo, int)
+            return lambda: rng.randint(minimo, maximo)
+        if tipo == 'float':
+            minimo, maximo = float(campo['limite'][0]), float(campo['limite'][1])
+            return lambda: round(rng.uniform(minimo, maximo), 2)
+        if tipo == 'string':
+            minimo, maximo = _ler_limites(campo, int)
+            alfabeto = ALFABETO_STRING
+            return lambda: ''.join(rng.choice(alfabeto) for _ in range(rng.randint(minimo, maximo)))
+        if tipo == 'boolean':
+            return lambda: rng.choice(VALORES_BOOLEANOS)
         if tipo == 'datetime':
-            start_date = datetime.datetime.strptime(campo['limite'][0], '%Y-%m-%d')
-            end_date = datetime.datetime.strptime(campo['limite'][1], '%Y-%m-%d')
-            return (start_date + datetime.timedelta(days=random.randint(0, (end_date - start_date).days))).strftime(
-                '%Y-%m-%d %H:%M:%S')
-        if tipo == 'uuid': return str(uuid.uuid4())
-        if tipo == 'lista_opcoes': return random.choice(campo['opcoes']) if campo.get('opcoes') else None
-        if tipo == 'regex': return exrex.getone(campo.get('regex_pattern', '.*'))
+            inicio, fim = _ler_limites(campo, lambda data: datetime.datetime.strptime(data, '%Y-%m-%d'))
+            return _compilar_gerador_data(inicio, (fim - inicio).days, rng)
+        if tipo == 'uuid': return lambda: str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        if tipo == 'lista_opcoes':
+            opcoes = tuple(campo['opcoes']) if campo.get('opcoes') else None
+            if not opcoes: return lambda: None
+            return lambda: rng.choice(opcoes)
+        if tipo == 'regex':
+            amostrador = compilar_regex(campo.get('regex_pattern', '.*'))
+            # Sorteia em lotes crescentes (até LOTE_MAXIMO_REGEX), entregando um valor por chamada
+            pendentes, tamanho_lote = [], [16]
+
+            def _gerar_regex():
+                if not pendentes:
+                    try:
+                        pendentes.extend(reversed(amostrador.sortear_lote(rng, tamanho_lote[0])))
+                    except Exception as e:
+                        raise ValueError(f"Erro ao gerar valor para o campo '{nome_campo}': {e}")
+                    tamanho_lote[0] = min(tamanho_lote[0] * 2, LOTE_MAXIMO_REGEX)
+                return pendentes.pop()
+            return _gerar_regex
     except (ValueError, KeyError) as e:
-        raise ValueError(
-            f"Parâmetro inválido ou ausente para o campo '{campo.get('nome', 'Desconhecido')}' do tipo '{tipo}': {e}")
+        return _compilar_falha(ValueError(
+            f"Parâmetro inválido ou ausente para o campo '{nome_campo}' do tipo '{tipo}': {e}"))
     except Exception as e:
-        raise ValueError(f"Erro ao gerar valor para o campo '{campo.get('nome', 'Desconhecido')}': {e}")
-    return None
+        return _compilar_falha(ValueError(f"Erro ao gerar valor para o campo '{nome_campo}': {e}"))
+    return lambda: None
+
+
+def _ler_limites(campo, conversor):
+    """Converte o par [mínimo, máximo] de um campo, validando que o intervalo não é vazio."""
+    minimo, maximo = conversor(campo['limite'][0]), conversor(campo['limite'][1])
+    if minimo > maximo: raise ValueError(f"intervalo vazio ({campo['limite'][0]} > {campo['limite'][1]})")
+    return minimo, maximo
+
+
+def _compilar_gerador_data(inicio, dias, rng=random):
+    """Sorteia um deslocamento em dias a partir de `inicio`, memorizando a data já formatada de cada deslocamento."""
+    ordinal_inicio = inicio.toordinal()
+    if dias > LIMITE_CACHE_DATAS:
+        return lambda: datetime.datetime.fromordinal(ordinal_inicio + rng.randint(0, dias)).strftime(
+            '%Y-%m-%d %H:%M:%S')
+    datas_formatadas = {}
+
+    def _gerar_data():
+        deslocamento = rng.randint(0, dias)
+        data = datas_formatadas.get(deslocamento)
+        if data is None:
+            data = datas_formatadas[deslocamento] = datetime.datetime.fromordinal(
+                ordinal_inicio + deslocamento).strftime('%Y-%m-%d %H:%M:%S')
+        return data
+    return _gerar_data
 
 
-def _criar_gerador_de_campo(campo_config, total_linhas, chaves_geradas):
+def _compilar_falha(erro):
+    """Retorna um gerador que adia o erro de configuração até o campo ser efetivamente usado."""
+    def _falhar():
+        raise erro
+    return _falhar
+
+
+def _campo_vetorizavel(campo):
+    """Indica se a geração padrão do campo pode ser feita em lote pelo motor colunar."""
+    if campo_unico(campo): return False
+    if campo.get('tipo') == 'chave_estrangeira': return campo.get('cardinalidade') != 'Um-para-Um (1:1)'
+    if campo.get('tipo') not in TIPOS_VETORIZAVEIS: return False
+    if campo['tipo'] == 'integer':
+        try:
+            minimo, maximo = int(campo['limite'][0]), int(campo['limite'][1])
+        except (ValueError, KeyError, IndexError, TypeError):
+            return True  # O erro de parâmetro é reportado pelo próprio motor colunar
+        return INT64_MIN <= minimo and maximo <= INT64_MAX
+    return True
+
+
+def _compilar_lote_vetorizado(campo, gerador_np, chaves_geradas=None):
+    """Compila um campo em uma função que gera `n` valores de uma vez com NumPy, já como objetos Python."""
+    tipo = campo['tipo']
+    if tipo == 'chave_estrangeira':
+        coluna = (chaves_geradas or {}).get(campo['fk_arquivo'], {}).get(campo['fk_campo'])
+        if not coluna: return lambda n: [None] * n
+        return lambda n: coluna.obter_em_lote(gerador_np.integers(0, len(coluna), n))
+    if tipo == 'integer':
+        minimo, maximo = _ler_limites(campo, int)
+        return lambda n: gerador_np.integers(minimo, maximo, size=n, endpoint=True).tolist()
+    if tipo == 'float':
+        minimo, maximo = float(campo['limite'][0]), float(campo['limite'][1])
+        return lambda n: np.round(gerador_np.uniform(minimo, maximo, n), 2).tolist()
+    if tipo == 'boolean':
+        return lambda n: (gerador_np.integers(0, 2, n) == 0).tolist()
+    if tipo == 'datetime':
+        inicio, fim = _ler_limites(campo, lambda data: datetime.datetime.strptime(data, '%Y-%m-%d'))
+        dias = (fim - inicio).days
+        if dias > LIMITE_CACHE_DATAS:
+            base = np.datetime64(inicio.date(), 'D')
+            return lambda n: np.char.add((base + gerador_np.integers(0, dias, n, endpoint=True)).astype(str),
+                                         ' 00:00:00').tolist()
+        datas = np.array([(inicio + datetime.timedelta(days=d)).strftime('%Y-%m-%d %H:%M:%S')
+                          for d in range(dias + 1)], dtype=object)
+        return lambda n: datas[gerador_np.integers(0, dias, n, endpoint=True)].tolist()
+    if tipo == 'lista_opcoes':
+        if not campo.get('opcoes'): return lambda n: [None] * n
+        opcoes = np.array(campo['opcoes'], dtype=object)
+        return lambda n: opcoes[gerador_np.integers(0, len(opcoes), n)].tolist()
+    if tipo == 'uuid':
+        def _gerar_uuids(n):
+            brutos = np.frombuffer(gerador_np.bytes(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+            brutos[:, 6] = (brutos[:, 6] & 0x0F) | 0x40  # versão 4
+            brutos[:, 8] = (brutos[:, 8] & 0x3F) | 0x80  # variante RFC 4122
+            h = brutos.tobytes().hex()
+            return [f"{h[i:i + 8]}-{h[i + 8:i + 12]}-{h[i + 12:i + 16]}-{h[i + 16:i + 20]}-{h[i + 20:i + 32]}"
+                    for i in range(0, 32 * n, 32)]
+        return _gerar_uuids
+    if tipo == 'regex':
+        try:
+            amostrador = compilar_regex(campo.get('regex_pattern', '.*'))
+        except re.error as e:
+            raise ValueError(f"regex inválido: {e}")
+        rng = random.Random(int(gerador_np.integers(INT64_MAX)))
+
+        def _gerar_strings(n):
+            try:
+                return amostrador.sortear_lote(rng, n)
+            except Exception as e:
+                raise ValueError(f"Erro ao gerar valor para o campo '{campo.get('nome', 'Desconhecido')}': {e}")
+        return _gerar_strings
+    raise ValueError(f"tipo '{tipo}' não suportado pelo motor colunar")
+
+
+def _iterar_coluna_vetorizada(campo_config, gerador_np, tamanho_lote, chaves_geradas=None):
+    """Gerador infinito dos valores de uma coluna sorteados em lotes NumPy, respeitando `repeticao`."""
+    try:
+        gerar_lote = _compilar_lote_vetorizado(campo_config, gerador_np, chaves_geradas)
+    except (ValueError, KeyError) as e:
+        raise ValueError(f"Parâmetro inválido ou ausente para o campo '{campo_config.get('nome', 'Desconhecido')}' "
+                         f"do tipo '{campo_config['tipo']}': {e}")
+    repetir_valor = campo_config.get('repeticao', 0)
+    if repetir_valor > 1:
+        sorteios_por_lote = -(-tamanho_lote // repetir_valor)
+        while True:
+            for valor in gerar_lote(sorteios_por_lote): yield from itertools.repeat(valor, repetir_valor)
+    while True:
+        yield from gerar_lote(tamanho_lote)
+
+
+def campo_unico(campo):
+    """Indica se o campo exige valores distintos em todas as linhas (PK ou repetição 1)."""
+    return bool(campo.get('e_pk')) or campo.get('repeticao', 0) == 1
+
+
+def _criar_gerador_de_campo(campo_config, total_linhas, chaves_geradas, gerar_valor=None, rng=random):
     """Cria um gerador (iterator) para um campo, respeitando as regras de repetição e cardinalidade."""
     tipo = campo_config.get('tipo', 'string')
 
@@ -60,157 +258,829 @@ def _criar_gerador_de_campo(campo_config, total_linhas, chaves_geradas):
         pk_disponiveis = chaves_geradas.get(arquivo_origem, {}).get(campo_origem, [])
 
         if campo_config.get('cardinalidade') == 'Um-para-Um (1:1)':
-            chaves_para_usar = list(pk_disponiveis)
-            random.shuffle(chaves_para_usar)
-            for _ in range(total_linhas):
-                if not chaves_para_usar: raise ValueError(
+            # Percorre as chaves numa ordem embaralhada sem copiá-las
+            permutacao = _PermutacaoFeistel(len(pk_disponiveis), rng) if pk_disponiveis else None
+            for i in range(total_linhas):
+                if i >= len(pk_disponiveis): raise ValueError(
                     "Não há chaves primárias únicas suficientes para a relação 1:1.")
-                yield chaves_para_usar.pop()
+                yield pk_disponiveis[permutacao[i]]
             return
         else:  # Padrão é Um-para-Muitos (1:N)
             if not pk_disponiveis:
                 # Retorna um gerador vazio se não houver chaves, evitando erro
                 for _ in range(total_linhas): yield None
                 return
-            for _ in range(total_linhas):
-                yield random.choice(pk_disponiveis)
+            # Sorteia blocos de índices e os resolve de uma vez na coluna de chaves
+            if isinstance(pk_disponiveis, ColunaChaves): obter = pk_disponiveis.obter_em_lote
+            else: obter = lambda indices: [pk_disponiveis[i] for i in indices]
+            posicoes = range(len(pk_disponiveis))
+            for inicio in range(0, total_linhas, TAMANHO_LOTE_ESCRITA):
+                yield from obter(rng.choices(posicoes, k=min(TAMANHO_LOTE_ESCRITA, total_linhas - inicio)))
             return
 
     # Lógica padrão para outros tipos de campo
     repetir_valor = 1 if campo_config.get('e_pk') else campo_config.get('repeticao', 0)
-    valores_usados = set()
+    if gerar_valor is None: gerar_valor = compilar_valor_atomico(campo_config, chaves_geradas, rng)
 
-    def _gerar_novo_valor():
-        for _ in range(total_linhas * 5):
-            valor = _criar_valor_atomico(campo_config, chaves_geradas)
-            if repetir_valor != 1 or valor not in valores_usados:
-                valores_usados.add(valor)
-                return valor
-        raise ValueError(f"Não foi possível gerar valor único para '{campo_config['nome']}'.")
-
-    if repetir_valor == 0:
-        for _ in range(total_linhas): yield _criar_valor_atomico(campo_config, chaves_geradas)
+    if repetir_valor == 1:
+        yield from _criar_gerador_unico(campo_config, total_linhas, gerar_valor, rng)
+    elif repetir_valor == 0:
+        for _ in range(total_linhas): yield gerar_valor()
     else:
         for i in range(total_linhas):
-            if i % repetir_valor == 0: valor_atual = _gerar_novo_valor()
+            if i % repetir_valor == 0: valor_atual = gerar_valor()
             yield valor_atual
 
 
-def _avaliar_condicao(valor_campo_ref, operador, valor_condicao):
-    """Avalia uma condição e retorna True ou False."""
+def _criar_gerador_unico(campo_config, total_linhas, gerar_valor, rng=random):
+    """Gera `total_linhas` valores distintos para um campo único (PK ou repetição 1).
+
+    Intervalos numéricos e de datas percorrem uma permutação do domínio; os demais tipos sorteiam com rejeição."""
+    tipo, nome_campo = campo_config.get('tipo', 'string'), campo_config.get('nome', 'Desconhecido')
+    dominio = tamanho_dominio(campo_config)
+    if dominio is not None and dominio < total_linhas:
+        raise ValueError(f"O campo '{nome_campo}' admite apenas {dominio} valores distintos, "
+                         f"insuficientes para {total_linhas} linhas únicas.")
+
+    if dominio is not None and tipo in ('integer', 'float', 'datetime'):
+        if tipo == 'integer':
+            minimo = int(campo_config['limite'][0])
+            converter = lambda k: minimo + k
+        elif tipo == 'float':
+            minimo_centavos = math.ceil(round(float(campo_config['limite'][0]) * 100, 6))
+            converter = lambda k: (minimo_centavos + k) / 100
+        else:
+            ordinal_inicio = datetime.datetime.strptime(campo_config['limite'][0], '%Y-%m-%d').toordinal()
+            converter = lambda k: datetime.datetime.fromordinal(ordinal_inicio + k).strftime('%Y-%m-%d %H:%M:%S')
+        permutacao = _PermutacaoFeistel(dominio, rng)
+        for i in range(total_linhas): yield converter(permutacao[i])
+        return
+
+    if dominio is not None and tipo in ('boolean', 'lista_opcoes'):
+        valores = list(VALORES_BOOLEANOS) if tipo == 'boolean' else list(
+            dict.fromkeys(campo_config.get('opcoes') or [None]))
+        yield from rng.sample(valores, total_linhas)
+        return
+
+    valores_usados = set()
+    for _ in range(total_linhas):
+        for _ in range(total_linhas * 5):
+            valor = gerar_valor()
+            if valor not in valores_usados:
+                valores_usados.add(valor)
+                break
+        else:
+            raise ValueError(f"Não foi possível gerar valor único para '{campo_config['nome']}'.")
+        yield valor
+
+
+def tamanho_dominio(campo):
+    """Quantidade de valores distintos que o campo pode gerar, ou None se for desconhecida ou inválida."""
+    tipo = campo.get('tipo', 'string')
     try:
-        if operador in ['>', '<', '>=', '<=']:
-            val_ref_num, val_cond_num = float(valor_campo_ref), float(valor_condicao)
-            if operador == '>': return val_ref_num > val_cond_num
-            if operador == '<': return val_ref_num < val_cond_num
-            if operador == '>=': return val_ref_num >= val_cond_num
-            if operador == '<=': return val_ref_num <= val_cond_num
-
-        val_ref_str, val_cond_str = str(valor_campo_ref), str(valor_condicao)
-        if operador == 'é igual a': return val_ref_str == val_cond_str
-        if operador == 'é diferente de': return val_ref_str != val_cond_str
-        if operador == 'contém': return val_cond_str in val_ref_str
-        if operador == 'não contém': return val_cond_str not in val_ref_str
-    except (ValueError, TypeError):
-        return False
-    return False
-
-
-def generate_from_config(configuracoes):
+        if tipo in ('Nulo/Vazio', 'Valor Fixo'): return 1
+        if tipo == 'boolean': return len(VALORES_BOOLEANOS)
+        if tipo == 'lista_opcoes': return len(set(campo.get('opcoes') or [None]))
+        if tipo == 'uuid': return 2 ** 122
+        if tipo == 'nome_pessoa':
+            num_sobrenomes = len(set(LISTA_SOBRENOMES))
+            return len(set(LISTA_NOMES)) * (num_sobrenomes + num_sobrenomes * (num_sobrenomes - 1))
+        if tipo == 'integer':
+            minimo, maximo = _ler_limites(campo, int)
+            return maximo - minimo + 1
+        if tipo == 'float':
+            minimo, maximo = float(campo['limite'][0]), float(campo['limite'][1])
+            return max(0, math.floor(round(maximo * 100, 6)) - math.ceil(round(minimo * 100, 6)) + 1)
+        if tipo == 'string':
+            minimo, maximo = _ler_limites(campo, int)
+            total = 0
+            for tamanho in range(max(0, minimo), maximo + 1):  # Para no teto: limites longos dariam inteiros enormes
+                total += len(ALFABETO_STRING) ** tamanho
+                if total > DOMINIO_SATURADO: return DOMINIO_SATURADO
+            return total
+        if tipo == 'datetime':
+            inicio, fim = _ler_limites(campo, lambda data: datetime.datetime.strptime(data, '%Y-%m-%d'))
+            return (fim - inicio).days + 1
+        if tipo == 'regex':  # Exato só nos padrões de forma fixa (ver `_moldar_regex`)
+            posicoes = compilar_regex(campo['regex_pattern']).posicoes
+            return math.prod(len(set(caracteres)) for caracteres in posicoes) if posicoes is not None else None
+    except (ValueError, KeyError, IndexError, TypeError, re.error):
+        return None
+    return None
+
+
+class ColunaChaves(collections.abc.Sequence):
+    """Coluna de chaves primárias guardada de forma compacta (array('q'), array('d') ou buffer UTF-8)."""
+    __slots__ = ('tipo', 'valores', 'offsets')
+
+    def __init__(self, valores=()):
+        self.tipo, self.valores, self.offsets = None, None, None
+        self.extend(valores)
+
+    def extend(self, valores):
+        valores = list(valores)
+        if not valores: return
+        if self.tipo is None: self._iniciar(type(valores[0]))
+        if not self._aceita(valores): self._converter_em_lista()
+        if self.tipo == 'str':
+            for valor in valores:
+                self.valores += valor.encode('utf-8')
+                self.offsets.append(len(self.valores))
+        else:
+            self.valores.extend(valores)
+
+    def _iniciar(self, classe):
+        if classe is int: self.tipo, self.valores = 'int', array.array('q')
+        elif classe is float: self.tipo, self.valores = 'float', array.array('d')
+        elif classe is str: self.tipo, self.valores, self.offsets = 'str', bytearray(), array.array('q', [0])
+        else: self.tipo, self.valores = 'lista', []
+
+    def _aceita(self, valores):
+        """Indica se todos os valores cabem na representação compacta atual."""
+        if self.tipo == 'lista': return True
+        classe = {'int': int, 'float': float, 'str': str}[self.tipo]
+        if not all(type(v) is classe for v in valores): return False
+        return self.tipo != 'int' or (INT64_MIN <= min(valores) and max(valores) <= INT64_MAX)
+
+    def _converter_em_lista(self):
+        valores = list(self)
+        self.tipo, self.valores, self.offsets = 'lista', valores, None
+
+    def __len__(self):
+        if self.tipo is None: return 0
+        return len(self.offsets) - 1 if self.tipo == 'str' else len(self.valores)
+
+    def __getitem__(self, indice):
+        if self.tipo == 'str':
+            if indice < 0: indice += len(self)
+            if not 0 <= indice < len(self): raise IndexError(indice)
+            return self.valores[self.offsets[indice]:self.offsets[indice + 1]].decode('utf-8')
+        if self.tipo is None: raise IndexError(indice)
+        return self.valores[indice]
+
+    def obter_em_lote(self, indices):
+        """Retorna os valores dos índices (array NumPy ou lista de inteiros) como lista de objetos Python."""
+        if self.tipo in ('int', 'float') and np is not None:
+            valores = np.frombuffer(self.valores, dtype=np.int64 if self.tipo == 'int' else np.float64)
+            return valores[np.asarray(indices, dtype=np.intp)].tolist()
+        if hasattr(indices, 'tolist'): indices = indices.tolist()
+        if self.tipo == 'str': return [self[i] for i in indices]
+        return list(map(self.valores.__getitem__, indices))
+
+
+class _PermutacaoFeistel:
+    """Permutação pseudoaleatória de range(n) por uma rede de Feistel, em O(1) de memória."""
+
+    def __init__(self, n, rng=random, rodadas=4):
+        bits = max(2, (n - 1).bit_length())
+        self.metade = (bits + 1) // 2
+        self.mascara = (1 << self.metade) - 1
+        self.chaves = [rng.getrandbits(32) for _ in range(rodadas)]
+        self.n = n
+
+    def _cifrar(self, x):
+        esquerda, direita = x >> self.metade, x & self.mascara
+        for chave in self.chaves:
+            esquerda, direita = direita, esquerda ^ ((((direita * 0x9E3779B1) ^ chave) * 0x85EBCA6B >> 7) & self.mascara)
+        return (esquerda << self.metade) | direita
+
+    def __getitem__(self, i):
+        x = self._cifrar(i)
+        while x >= self.n: x = self._cifrar(x)
+        return x
+
+
+def _compilar_acoes_condicionais(regra, nome_campo, semente, chaves_geradas=None, motor='linha',
+                                 tamanho_lote=TAMANHO_LOTE_COLUNAR):
+    """Compila as ações de uma regra (uma por caso e a do 'senao') em iteradores infinitos de valores.
+
+    Cada ação sorteia com um fluxo próprio derivado de `semente`; None indica 'Usar Geração Padrão'."""
+    regra = normalizar_regra(regra)
+    acoes = [caso['acao'] for caso in regra['casos']] + [regra['senao']]
+    rotulos = ['verdadeiro'] + [f'caso:{i}' for i in range(1, len(regra['casos']))] + ['falso']
+    fontes = []
+    for rotulo, acao in zip(rotulos, acoes):
+        semente_acao = _derivar_semente(semente, f'{nome_campo}:{rotulo}')
+        if acao.get('tipo') == 'Usar Geração Padrão':
+            fontes.append(None)
+        elif motor == 'colunar' and _campo_vetorizavel(acao):
+            fontes.append(_iterar_coluna_vetorizada(dict(acao, nome=nome_campo), np.random.default_rng(semente_acao),
+                                                    tamanho_lote, chaves_geradas))
+        else:
+            fontes.append(_iterar_chamadas(compilar_valor_atomico(acao, chaves_geradas, random.Random(semente_acao))))
+    return tuple(fontes)
+
+
+def _iterar_chamadas(funcao):
+    """Iterador infinito com os resultados de chamadas sucessivas de `funcao`."""
+    return iter(funcao, object())
+
+
+def generate_from_config(configuracoes, ao_progredir=None, cancelamento=None):
+    """Gera todos os arquivos da sessão e retorna um relatório {arquivo: {'linhas', 'tentativas', 'colisoes'}}.
+
+    A mesma `semente` e o mesmo `motor` reproduzem os mesmos arquivos, com qualquer número de `workers`.
+    `ao_progredir` recebe os eventos de progresso e `cancelamento` (ex.: um `threading.Event`) interrompe a geração
+    com `GeracaoCancelada`. Sessões com erros em `planejar_sessao` levantam ValueError antes de gerar."""
+    caminho_cprofile = configuracoes.get('perfil_cprofile')
+    if caminho_cprofile:
+        perfilador = cProfile.Profile()
+        try:
+            return perfilador.runcall(generate_from_config, dict(configuracoes, perfil_cprofile=None), ao_progredir,
+                                      cancelamento)
+        finally:
+            perfilador.dump_stats(caminho_cprofile)
+
     arquivos_config = configuracoes['arquivos']
-    ordem_arquivos = _resolver_ordem_dependencias(arquivos_config)
+    ordem_arquivos = resolver_ordem_dependencias(arquivos_config)
     mapa_configs = {ac['nome_arquivo']: ac for ac in arquivos_config}
     chaves_primarias_geradas = {}
+    from planejamento import planejar_sessao  # Importado aqui: o planejamento usa este módulo
+    # Sessões impossíveis são rejeitadas antes de gerar qualquer arquivo
+    erros = [erro for arquivo in planejar_sessao(configuracoes).values() for erro in arquivo['erros']]
+    if erros: raise ValueError("A sessão não pode ser gerada:\n" + "\n".join(erros))
+
+    motor = configuracoes.get('motor', 'linha')
+    if motor == 'colunar' and np is None:
+        raise ImportError("O motor colunar requer a biblioteca 'numpy'. Instale-a com: pip install numpy")
+    memoria_sort_mb = configuracoes.get('memoria_sort_mb', MEMORIA_SORT_MB_PADRAO)
+    destino = DestinoBanco(configuracoes['banco']) if configuracoes.get('banco') else None
+    if destino is None:
+        for config_arquivo in arquivos_config: validar_formato(config_arquivo)
+
+    semente_sessao = configuracoes.get('semente')
+    if semente_sessao is None: semente_sessao = random.getrandbits(64)
+    sementes = {nome: _semente_do_arquivo(mapa_configs[nome], semente_sessao) for nome in ordem_arquivos}
+
+    progresso = _Progresso({nome: mapa_configs[nome]['num_linhas'] for nome in ordem_arquivos}, ao_progredir,
+                           cancelamento)
+    instrumentar = bool(configuracoes.get('instrumentar'))
+    workers = configuracoes.get('workers', 1)
+    if workers > 1 and destino is None:
+        return _gerar_arquivos_em_paralelo(mapa_configs, ordem_arquivos,
+                                           _mapear_dependencias_arquivos(arquivos_config), sementes, workers, motor,
+                                           memoria_sort_mb, progresso, instrumentar)
+
+    relatorio = {}
+    with contextlib.closing(destino) if destino is not None else contextlib.nullcontext():
+        if destino is not None: destino.preparar([mapa_configs[nome] for nome in ordem_arquivos])
+        for nome_arquivo in ordem_arquivos:
+            progresso.verificar_cancelamento()
+            relatorio[nome_arquivo] = {}
+            chaves_primarias_geradas[nome_arquivo] = _gerar_arquivo(
+                mapa_configs[nome_arquivo], chaves_primarias_geradas, sementes[nome_arquivo], motor, memoria_sort_mb,
+                relatorio[nome_arquivo], progresso, instrumentar, destino)
+            progresso.emitir(nome_arquivo)
+    return relatorio
+
+
+class GeracaoCancelada(Exception):
+    """Levantada quando o token de cancelamento é marcado durante a geração."""
+
+
+class _Progresso:
+    """Acompanha as linhas e os bytes gravados de cada arquivo e verifica o token de cancelamento."""
+
+    def __init__(self, totais, ao_progredir=None, cancelamento=None):
+        self.totais, self.ao_progredir, self.cancelamento = totais, ao_progredir, cancelamento
+        self.linhas, self.bytes = dict.fromkeys(totais, 0), dict.fromkeys(totais, 0)
+        self.inicio = self.ultimo_evento = time.monotonic()
+
+    @property
+    def ativo(self):
+        return self.ao_progredir is not None or self.cancelamento is not None
+
+    def verificar_cancelamento(self):
+        if self.cancelamento is not None and self.cancelamento.is_set():
+            raise GeracaoCancelada("Geração cancelada pelo usuário.")
+
+    def registrar(self, arquivo, linhas=0, bytes_gravados=0):
+        self.verificar_cancelamento()
+        self.linhas[arquivo] += linhas
+        self.bytes[arquivo] += bytes_gravados
+        if self.ao_progredir is not None and time.monotonic() - self.ultimo_evento >= INTERVALO_PROGRESSO:
+            self.emitir(arquivo)
+
+    def emitir(self, arquivo):
+        """Envia um evento imediatamente, sem respeitar o intervalo mínimo."""
+        if self.ao_progredir is None: return
+        self.ultimo_evento = time.monotonic()
+        decorrido = self.ultimo_evento - self.inicio
+        self.ao_progredir({'arquivo': arquivo, 'linhas': dict(self.linhas), 'total_linhas': dict(self.totais),
+                           'bytes': dict(self.bytes),
+                           'linhas_por_segundo': sum(self.linhas.values()) / decorrido if decorrido > 0 else 0.0})
+
+
+class _ProgressoRemoto:
+    """Substituto de `_Progresso` nos processos de trabalho: envia os incrementos (arquivo, linhas, bytes) pela
+    fila do processo principal e consulta o token de cancelamento compartilhado."""
+
+    def __init__(self, fila, cancelamento):
+        self.fila, self.cancelamento = fila, cancelamento
+        self.pendentes = {}
+        self.ultimo_envio = time.monotonic()
+
+    def registrar(self, arquivo, linhas=0, bytes_gravados=0):
+        if self.cancelamento.is_set(): raise GeracaoCancelada("Geração cancelada pelo usuário.")
+        pendente = self.pendentes.setdefault(arquivo, [0, 0])
+        pendente[0] += linhas
+        pendente[1] += bytes_gravados
+        if time.monotonic() - self.ultimo_envio >= INTERVALO_PROGRESSO: self.descarregar()
+
+    def descarregar(self):
+        for arquivo, (linhas, bytes_gravados) in self.pendentes.items(): self.fila.put((arquivo, linhas, bytes_gravados))
+        self.pendentes = {}
+        self.ultimo_envio = time.monotonic()
+
+
+class _Perfil:
+    """Instrumentação opcional de um arquivo: tempo (em segundos) e chamadas por etapa e por campo."""
+
+    def __init__(self):
+        self.etapas = collections.defaultdict(lambda: [0.0, 0])
+        self.campos = collections.defaultdict(lambda: [0.0, 0])
+
+    def registrar(self, etapa, segundos, chamadas=1):
+        medida = self.etapas[etapa]
+        medida[0] += segundos
+        medida[1] += chamadas
+
+    def cronometrar_lotes(self, etapa, lotes):
+        """Mede o tempo gasto em cada `next` de um estágio do pipeline de lotes (incluindo os estágios anteriores)."""
+        return _iterar_cronometrado(lotes, self.etapas[etapa])
 
-    for nome_arquivo in ordem_arquivos:
-        config = mapa_configs[nome_arquivo]
-        num_linhas, campos_cfg, separador, codificacao, regras_sort, constraint_unicidade = \
-            config['num_linhas'], config['campos'], config['separador'], config['codificacao'], \
-                config['regras_sort'], config.get('constraint_unicidade', [])
+    def descontar_estagios(self, estagios, total):
+        """Converte os tempos inclusivos dos estágios encadeados (do mais interno ao mais externo) em exclusivos;
+        o restante de `total` é atribuído à gravação."""
+        anterior = 0.0
+        for etapa in estagios:
+            if etapa not in self.etapas: continue
+            inclusivo = self.etapas[etapa][0]
+            self.etapas[etapa][0] -= anterior
+            anterior = inclusivo
+        self.registrar('gravacao', total - anterior, 0)
+        self.registrar('total', total)
 
-        ordem_campos = _resolver_ordem_campos(campos_cfg)
-        mapa_campos = {c['nome']: c for c in campos_cfg}
+    def como_dict(self):
+        self.etapas['valores'] = [sum(s for s, _ in self.campos.values()), sum(n for _, n in self.campos.values())]
+        converter = lambda medidas: {nome: {'segundos': s, 'chamadas': n} for nome, (s, n) in medidas.items()}
+        return {'etapas': converter(self.etapas), 'campos': converter(self.campos)}
 
-        # Cria geradores de estado (para repetição, 1:1, etc)
-        geradores_estado = {c['nome']: _criar_gerador_de_campo(c, num_linhas, chaves_primarias_geradas) for c in
-                            campos_cfg}
 
-        dados_em_memoria = []
-        combinacoes_geradas = set()
-        max_tentativas = num_linhas * 20
-        tentativas = 0
+def _iterar_cronometrado(iterador, medida):
+    """Repassa os itens de `iterador`, somando em `medida` ([segundos, chamadas]) o tempo de cada `next`."""
+    relogio = time.perf_counter
+    while True:
+        inicio = relogio()
+        try:
+            item = next(iterador)
+        except StopIteration:
+            return
+        medida[0] += relogio() - inicio
+        medida[1] += 1
+        yield item
+
+
+def _funcao_cronometrada(funcao, medida):
+    """Envolve `funcao`, somando em `medida` ([segundos, chamadas]) o tempo de cada chamada."""
+    relogio = time.perf_counter
+
+    def _cronometrada(*args):
+        inicio = relogio()
+        try:
+            return funcao(*args)
+        finally:
+            medida[0] += relogio() - inicio
+            medida[1] += 1
+    return _cronometrada
+
+
+def _somar_estatisticas(destino, origem):
+    """Soma `origem` em `destino`, entrando nos dicionários aninhados (ex.: o 'perfil' de várias fatias)."""
+    for chave, valor in origem.items():
+        if isinstance(valor, dict): _somar_estatisticas(destino.setdefault(chave, {}), valor)
+        else: destino[chave] = destino.get(chave, 0) + valor
 
-        while len(dados_em_memoria) < num_linhas and tentativas < max_tentativas:
-            linha_atual = {}
-            for nome_campo in ordem_campos:
-                campo_cfg = mapa_campos[nome_campo]
 
-                regra = campo_cfg.get('condicional')
+def _derivar_semente(semente, rotulo):
+    """Deriva uma semente de 64 bits independente para `rotulo` (arquivo, coluna, fatia...) a partir de `semente`."""
+    return int.from_bytes(hashlib.sha256(f'{semente}:{rotulo}'.encode('utf-8')).digest()[:8], 'big')
 
-                if regra and regra.get('campo_ref') in linha_atual:
-                    condicao_ok = _avaliar_condicao(linha_atual[regra['campo_ref']], regra['operador'],
-                                                    regra['valor_ref'])
-                    acao = regra['acao_verdadeiro'] if condicao_ok else regra['acao_falso']
 
-                    if acao.get('tipo') == 'Usar Geração Padrão':
-                        valor_gerado = next(geradores_estado[nome_campo])
-                    else:
-                        valor_gerado = _criar_valor_atomico(acao, chaves_primarias_geradas, linha_atual)
-                else:
-                    valor_gerado = next(geradores_estado[nome_campo])
+def _semente_do_arquivo(config, semente_sessao):
+    """Semente de um arquivo: a da chave `semente` do arquivo, se houver, ou derivada da sessão e do nome."""
+    if config.get('semente') is not None: return config['semente']
+    return _derivar_semente(semente_sessao, config['nome_arquivo'])
+
+
+def _gerar_arquivos_em_paralelo(mapa_configs, ordem_arquivos, dependencias, sementes, workers, motor,
+                                memoria_sort_mb, progresso, instrumentar=False):
+    """Agenda os arquivos como um DAG: cada um vai para o pool assim que os pais de suas FKs terminam.
+
+    Arquivos grandes são gerados em fatias com as mesmas sementes da geração em série, e concatenados em ordem."""
+    chaves_primarias_geradas, relatorio = {}, {nome: {} for nome in ordem_arquivos}
+    pendentes, em_execucao = list(ordem_arquivos), {}
+    fatias_em_andamento = {}  # arquivo -> [pasta temporária, caminhos das fatias, fatias restantes]
+    contexto = multiprocessing.get_context('spawn')  # Evita fork de um processo com a thread do Tk
+    with contextlib.ExitStack() as pilha:
+        fila_progresso = cancelamento_remoto = None
+        if progresso.ativo:
+            gerente = pilha.enter_context(contexto.Manager())
+            fila_progresso, cancelamento_remoto = gerente.Queue(), gerente.Event()
+        executor = pilha.enter_context(concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                                              mp_context=contexto))
+        try:
+            while pendentes or em_execucao:
+                for nome in [n for n in pendentes if dependencias[n].issubset(chaves_primarias_geradas)]:
+                    pendentes.remove(nome)
+                    config = mapa_configs[nome]
+                    chaves_pais = {pai: chaves_primarias_geradas[pai] for pai in dependencias[nome]}
+                    fatias = _planejar_fatias(config)
+                    if len(fatias) == 1:
+                        futuro = executor.submit(_gerar_arquivo_isolado, config, chaves_pais, sementes[nome], motor,
+                                                 memoria_sort_mb, fila_progresso, cancelamento_remoto, instrumentar)
+                        em_execucao[futuro] = nome
+                        continue
+                    pasta = tempfile.TemporaryDirectory(prefix='massbuilder_fatias_', dir=os.path.dirname(
+                        os.path.abspath(nome_arquivo_final(nome))))
+                    caminhos = [os.path.join(pasta.name, f'fatia_{i}.parte') for i in range(len(fatias))]
+                    fatias_em_andamento[nome] = [pasta, caminhos, len(fatias)]
+                    for i, (linhas_fatia, caminho) in enumerate(zip(fatias, caminhos)):
+                        futuro = executor.submit(_gerar_fatia_isolada, config, chaves_pais,
+                                                 _derivar_semente(sementes[nome], f'fatia:{i}'), motor, linhas_fatia,
+                                                 caminho, fila_progresso, cancelamento_remoto, instrumentar)
+                        em_execucao[futuro] = nome
+                concluidos, _ = concurrent.futures.wait(
+                    em_execucao, timeout=INTERVALO_PROGRESSO if progresso.ativo else None,
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+                if fila_progresso is not None: _repassar_progresso(fila_progresso, progresso)
+                progresso.verificar_cancelamento()
+                for futuro in concluidos:
+                    nome, (chaves, estatisticas) = em_execucao.pop(futuro), futuro.result()
+                    _somar_estatisticas(relatorio[nome], estatisticas)
+                    if nome in fatias_em_andamento:
+                        fatias_em_andamento[nome][2] -= 1
+                        if fatias_em_andamento[nome][2]: continue
+                        pasta, caminhos, _ = fatias_em_andamento.pop(nome)
+                        inicio = time.perf_counter()
+                        with pasta: concatenar_fatias(mapa_configs[nome], caminhos)
+                        if instrumentar: _somar_estatisticas(relatorio[nome], {'perfil': {'etapas': {'concatenacao': {
+                            'segundos': time.perf_counter() - inicio, 'chamadas': len(caminhos)}}}})
+                    chaves_primarias_geradas[nome] = chaves
+                    progresso.emitir(nome)
+        except BaseException:
+            if cancelamento_remoto is not None: cancelamento_remoto.set()  # Interrompe os processos em execução
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+        finally:
+            for pasta, _, _ in fatias_em_andamento.values(): pasta.cleanup()
+    return relatorio
+
+
+def _repassar_progresso(fila_progresso, progresso):
+    """Soma ao progresso do processo principal os incrementos enviados pelos processos de trabalho."""
+    while True:
+        try:
+            arquivo, linhas, bytes_gravados = fila_progresso.get_nowait()
+        except queue.Empty:
+            return
+        progresso.registrar(arquivo, linhas, bytes_gravados)
 
-                linha_atual[nome_campo] = valor_gerado
 
-            if constraint_unicidade:
+def _planejar_fatias(config):
+    """Divide `num_linhas` em fatias de até `LINHAS_POR_FATIA` linhas, ou retorna [num_linhas] se não for possível.
+
+    O plano não depende do número de workers; arquivos com ordenação, unicidade, repetição ou FK 1:1 não são
+    fatiados, pois cada fatia precisaria conhecer os valores das outras."""
+    num_linhas = config['num_linhas']
+    num_fatias = -(-num_linhas // LINHAS_POR_FATIA)
+    if num_fatias <= 1 or config.get('regras_sort') or config.get('constraint_unicidade'): return [num_linhas]
+    for campo in config['campos']:
+        if campo_unico(campo) or campo.get('repeticao', 0) > 1: return [num_linhas]
+        if campo['tipo'] == 'chave_estrangeira' and campo.get('cardinalidade') == 'Um-para-Um (1:1)':
+            return [num_linhas]
+    base, resto = divmod(num_linhas, num_fatias)
+    return [base + (1 if i < resto else 0) for i in range(num_fatias)]
+
+
+def _gerar_arquivo_isolado(config, chaves_pais, semente, motor, memoria_sort_mb, fila_progresso=None,
+                           cancelamento=None, instrumentar=False):
+    """Ponto de entrada dos processos de trabalho: gera um arquivo e retorna (chaves primárias, estatísticas)."""
+    estatisticas = {}
+    progresso = _ProgressoRemoto(fila_progresso, cancelamento) if fila_progresso is not None else None
+    chaves = _gerar_arquivo(config, chaves_pais, semente, motor, memoria_sort_mb, estatisticas, progresso,
+                            instrumentar)
+    if progresso is not None: progresso.descarregar()
+    return chaves, estatisticas
+
+
+def _gerar_fatia_isolada(config, chaves_pais, semente, motor, num_linhas, caminho_fatia, fila_progresso=None,
+                         cancelamento=None, instrumentar=False):
+    """Ponto de entrada dos processos de trabalho: grava `num_linhas` linhas (sem cabeçalho) de um arquivo fatiado."""
+    estatisticas = {}
+    progresso = _ProgressoRemoto(fila_progresso, cancelamento) if fila_progresso is not None else None
+    perfil = _Perfil() if instrumentar else None
+    inicio = time.perf_counter()
+    lotes = _gerar_lotes_de_linhas(dict(config, num_linhas=num_linhas), chaves_pais, semente, motor,
+                                   estatisticas=estatisticas, perfil=perfil)
+    if perfil is not None: lotes = perfil.cronometrar_lotes('geracao', lotes)
+    lotes = _acompanhar_linhas(lotes, config['nome_arquivo'], progresso)
+    escrever_fatia(config, caminho_fatia, lotes, chaves_pais, progresso)
+    if progresso is not None: progresso.descarregar()
+    if perfil is not None:
+        perfil.descontar_estagios(['geracao'], time.perf_counter() - inicio)
+        estatisticas['perfil'] = perfil.como_dict()
+    return {}, estatisticas
+
+
+def _gerar_arquivo(config, chaves_primarias_geradas, semente, motor='linha', memoria_sort_mb=MEMORIA_SORT_MB_PADRAO,
+                   estatisticas=None, progresso=None, instrumentar=False, destino=None):
+    """Gera e grava um arquivo (ou o carrega no banco `destino`) e retorna suas PKs como {campo: ColunaChaves}."""
+    campos_cfg, regras_sort = config['campos'], config['regras_sort']
+    cabecalho = [c['nome'] for c in campos_cfg]
+    indices_pk = [(i, c['nome']) for i, c in enumerate(campos_cfg) if c.get('e_pk')]
+    chaves_arquivo = {nome: ColunaChaves() for _, nome in indices_pk}
+
+    def _coletar_chaves(lotes):
+        for lote in lotes:
+            for i, nome in indices_pk: chaves_arquivo[nome].extend(linha[i] for linha in lote)
+            yield lote
+
+    # Com instrumentação, cada estágio do pipeline é cronometrado (tempos inclusivos, descontados ao final)
+    perfil = _Perfil() if instrumentar else None
+    cronometrar = perfil.cronometrar_lotes if perfil is not None else lambda etapa, lotes: lotes
+    inicio = time.perf_counter()
+
+    fatias = _planejar_fatias(config)
+    if len(fatias) == 1:
+        lotes = _gerar_lotes_de_linhas(config, chaves_primarias_geradas, semente, motor, estatisticas=estatisticas,
+                                       perfil=perfil)
+    else:
+        lotes = itertools.chain.from_iterable(
+            _gerar_lotes_de_linhas(dict(config, num_linhas=linhas_fatia), chaves_primarias_geradas,
+                                   _derivar_semente(semente, f'fatia:{i}'), motor, estatisticas=estatisticas,
+                                   perfil=perfil)
+            for i, linhas_fatia in enumerate(fatias))
+    lotes = cronometrar('chaves', _acompanhar_linhas(_coletar_chaves(cronometrar('geracao', lotes)),
+                                                     config['nome_arquivo'], progresso))
+    if regras_sort:
+        lotes = cronometrar('ordenacao', _ordenar_lotes(lotes, cabecalho, regras_sort,
+                                                        config.get('memoria_sort_mb', memoria_sort_mb)))
+
+    if destino is not None: destino.carregar(config, lotes, chaves_primarias_geradas)
+    else: escrever_saida(config, cabecalho, lotes, chaves_primarias_geradas, progresso)
+    if perfil is not None:
+        perfil.descontar_estagios(['geracao', 'chaves', 'ordenacao'], time.perf_counter() - inicio)
+        if estatisticas is not None: estatisticas['perfil'] = perfil.como_dict()
+    return chaves_arquivo
+
+
+class _Decrescente:
+    """Inverte a comparação de um valor, permitindo misturar ordens numa única chave composta."""
+    __slots__ = ('valor',)
+
+    def __init__(self, valor):
+        self.valor = valor
+
+    def __eq__(self, outro):
+        return self.valor == outro.valor
+
+    def __lt__(self, outro):
+        return outro.valor < self.valor
+
+
+def _criar_chave_ordenacao(cabecalho, regras_sort):
+    """Monta uma única chave composta (estável) para todas as regras de ordenação.
+
+    Retorna (chave, reverse), ou (None, False) se nenhuma regra se refere a um campo existente."""
+    indices_sort = {nome: i for i, nome in enumerate(cabecalho)}
+    regras = [(indices_sort[r['campo']], r['ordem'] == 'Descendente') for r in regras_sort
+              if r['campo'] in indices_sort]
+    if not regras: return None, False
+    direcoes = {desc for _, desc in regras}
+    if len(direcoes) == 1:
+        return operator.itemgetter(*(i for i, _ in regras)), direcoes.pop()
+    return (lambda linha: tuple(_Decrescente(linha[i]) if desc else linha[i] for i, desc in regras)), False
+
+
+def _estimar_bytes_por_linha(lote, amostra=100):
+    linhas = lote[:amostra]
+    total = sum(sys.getsizeof(linha) + sum(sys.getsizeof(valor) for valor in linha) for linha in linhas)
+    return max(1, total // max(1, len(linhas)))
+
+
+def _ordenar_lotes(lotes, cabecalho, regras_sort, memoria_sort_mb=MEMORIA_SORT_MB_PADRAO):
+    """Ordena as linhas dos lotes em memória ou, acima de `memoria_sort_mb`, por blocos em disco e k-way merge."""
+    chave, decrescente = _criar_chave_ordenacao(cabecalho, regras_sort)
+    if chave is None:
+        yield from lotes
+        return
+
+    limite_bytes = memoria_sort_mb * 1024 * 1024
+    bytes_por_linha = None
+    linhas = []
+    with tempfile.TemporaryDirectory(prefix='massbuilder_sort_') as pasta:
+        blocos = []
+        for lote in lotes:
+            if bytes_por_linha is None: bytes_por_linha = _estimar_bytes_por_linha(lote)
+            linhas.extend(lote)
+            if len(linhas) * bytes_por_linha >= limite_bytes:
+                linhas.sort(key=chave, reverse=decrescente)
+                blocos.append(_gravar_bloco_ordenado(pasta, len(blocos), linhas))
+                linhas = []
+        linhas.sort(key=chave, reverse=decrescente)
+
+        if not blocos:
+            for inicio in range(0, len(linhas), TAMANHO_LOTE_ESCRITA):
+                yield linhas[inicio:inicio + TAMANHO_LOTE_ESCRITA]
+            return
+
+        if linhas: blocos.append(_gravar_bloco_ordenado(pasta, len(blocos), linhas))
+        del linhas
+        intercaladas = heapq.merge(*(_ler_bloco_ordenado(caminho) for caminho in blocos), key=chave,
+                                   reverse=decrescente)
+        while True:
+            lote = list(itertools.islice(intercaladas, TAMANHO_LOTE_ESCRITA))
+            if not lote: return
+            yield lote
+
+
+def _gravar_bloco_ordenado(pasta, indice, linhas):
+    caminho = os.path.join(pasta, f'bloco_{indice}.pkl')
+    with open(caminho, 'wb') as f:
+        for inicio in range(0, len(linhas), TAMANHO_LOTE_ESCRITA):
+            pickle.dump(linhas[inicio:inicio + TAMANHO_LOTE_ESCRITA], f, protocol=pickle.HIGHEST_PROTOCOL)
+    return caminho
+
+
+def _ler_bloco_ordenado(caminho):
+    with open(caminho, 'rb') as f:
+        while True:
+            try:
+                lote = pickle.load(f)
+            except EOFError:
+                return
+            yield from lote
+
+
+def _gerar_lotes_de_linhas(config, chaves_primarias_geradas, semente, motor='linha', tamanho_lote=TAMANHO_LOTE_ESCRITA,
+                           estatisticas=None, perfil=None):
+    """Gera as linhas de um arquivo em lotes de até `tamanho_lote` linhas, cada linha na ordem do cabeçalho.
+
+    Cada coluna (e cada ação condicional) sorteia com um gerador próprio derivado de `semente`."""
+    nome_arquivo, num_linhas, campos_cfg, constraint_unicidade = \
+        config['nome_arquivo'], config['num_linhas'], config['campos'], config.get('constraint_unicidade', [])
+
+    ordem_campos = resolver_ordem_campos(campos_cfg)
+    mapa_campos = {c['nome']: c for c in campos_cfg}
+    cabecalho = [c['nome'] for c in campos_cfg]
+
+    # Um fluxo aleatório independente por coluna e por ação condicional
+    rngs = {c['nome']: random.Random(_derivar_semente(semente, c['nome'])) for c in campos_cfg}
+
+    # Compila cada campo e cada ação condicional uma única vez por arquivo
+    geradores_valor = {c['nome']: compilar_valor_atomico(c, chaves_primarias_geradas, rngs[c['nome']])
+                       for c in campos_cfg}
+    # Colunas sorteadas em lote pelo motor colunar (iteradores infinitos, nunca recriados)
+    tamanho_lote_np = max(1, min(num_linhas, TAMANHO_LOTE_COLUNAR))
+    acoes_compiladas = {c['nome']: _compilar_acoes_condicionais(c['condicional'], c['nome'], semente,
+                                                                chaves_primarias_geradas, motor, tamanho_lote_np)
+                        for c in campos_cfg if c.get('condicional')}
+    colunas_vetorizadas = {}
+    if motor == 'colunar':
+        colunas_vetorizadas = {
+            c['nome']: _iterar_coluna_vetorizada(c, np.random.default_rng(_derivar_semente(semente, c['nome'])),
+                                                 tamanho_lote_np, chaves_primarias_geradas)
+            for c in campos_cfg if _campo_vetorizavel(c)}
+
+    # Em uma colisão da constraint de unicidade, só os campos da constraint (e os condicionais que dependem
+    # deles) são sorteados de novo; por isso seus geradores precisam de valores para todas as tentativas.
+    max_tentativas = num_linhas * TENTATIVAS_POR_LINHA
+    campos_refazer = _campos_afetados(constraint_unicidade, ordem_campos, mapa_campos)
+
+    # Cria geradores de estado (para repetição, 1:1, etc), uma única vez por arquivo
+    geradores_estado = {
+        c['nome']: _criar_gerador_de_campo(
+            c, max_tentativas if c['nome'] in campos_refazer and not campo_unico(c) else num_linhas,
+            chaves_primarias_geradas, geradores_valor[c['nome']], rngs[c['nome']])
+        for c in campos_cfg if c['nome'] not in colunas_vetorizadas}
+    geradores_estado.update(colunas_vetorizadas)
+
+    # Sem constraint de unicidade, o motor colunar monta cada lote coluna a coluna (ver `_gerar_colunas`)
+    por_colunas = motor == 'colunar' and not constraint_unicidade
+    escolher_ramo = {c['nome']: compilar_regra(c['condicional'], c['nome'], cabecalho, em_lote=por_colunas)
+                     for c in campos_cfg if c.get('condicional')}
+
+    if perfil is not None:
+        geradores_estado = {nome: _iterar_cronometrado(gerador, perfil.campos[nome])
+                            for nome, gerador in geradores_estado.items()}
+        acoes_compiladas = {nome: tuple(acao and _iterar_cronometrado(acao, perfil.campos[nome]) for acao in acoes)
+                            for nome, acoes in acoes_compiladas.items()}
+        escolher_ramo = {nome: _funcao_cronometrada(escolher, perfil.etapas['condicoes'])
+                         for nome, escolher in escolher_ramo.items()}
+
+    def _preencher_campos(nomes_campos, linha_atual):
+        for nome_campo in nomes_campos:
+            campo_cfg = mapa_campos[nome_campo]
+
+            if campo_cfg.get('condicional'):
+                acao = acoes_compiladas[nome_campo][escolher_ramo[nome_campo](linha_atual)]
+                valor_gerado = next(geradores_estado[nome_campo] if acao is None else acao)
+            else:
+                valor_gerado = next(geradores_estado[nome_campo])
+
+            linha_atual[nome_campo] = valor_gerado
+
+    def _gerar_colunas(n):
+        """Gera `n` linhas coluna a coluna, com os mesmos valores da montagem linha a linha."""
+        colunas = {}
+        for nome_campo in ordem_campos:
+            acoes = acoes_compiladas.get(nome_campo)
+            if acoes is None or all(acao is None for acao in acoes):
+                colunas[nome_campo] = list(itertools.islice(geradores_estado[nome_campo], n))
+                continue
+            ramos = escolher_ramo[nome_campo](colunas, n)
+            coluna = np.empty(n, dtype=object)
+            # Os ramos com 'Usar Geração Padrão' compartilham o gerador do campo, consumido na ordem das linhas
+            usa_padrao = np.array([acao is None for acao in acoes])[ramos]
+            for indices, acao in itertools.chain([(np.flatnonzero(usa_padrao), geradores_estado[nome_campo])],
+                                                 ((np.flatnonzero(ramos == i), acao)
+                                                  for i, acao in enumerate(acoes) if acao is not None)):
+                if len(indices): coluna[indices] = list(itertools.islice(acao, len(indices)))
+            colunas[nome_campo] = coluna.tolist()
+        return [list(linha) for linha in zip(*[colunas[nome_campo] for nome_campo in cabecalho])]
+
+    if por_colunas:
+        for inicio in range(0, num_linhas, tamanho_lote): yield _gerar_colunas(min(tamanho_lote, num_linhas - inicio))
+        if estatisticas is not None:
+            _somar_estatisticas(estatisticas, {'linhas': num_linhas, 'tentativas': num_linhas, 'colisoes': 0})
+        return
+
+    lote = []
+    linhas_geradas = 0
+    combinacoes_geradas = set()
+    tentativas = colisoes = 0
+
+    while linhas_geradas < num_linhas and tentativas < max_tentativas:
+        linha_atual = {}
+        _preencher_campos(ordem_campos, linha_atual)
+        tentativas += 1
+
+        if constraint_unicidade:
+            combinacao = tuple(linha_atual[nome] for nome in constraint_unicidade)
+            while combinacao in combinacoes_geradas and tentativas < max_tentativas:
+                colisoes += 1
+                inicio_tentativa = time.perf_counter() if perfil is not None else 0.0
+                try:
+                    _preencher_campos(campos_refazer, linha_atual)
+                except StopIteration:
+                    break  # Um gerador único se esgotou: não há como sortear uma nova combinação
+                tentativas += 1
                 combinacao = tuple(linha_atual[nome] for nome in constraint_unicidade)
-                if combinacao in combinacoes_geradas:
-                    tentativas += 1
-                    # Recria os geradores para a próxima tentativa, para não esgotar geradores 1:1
-                    geradores_estado = {c['nome']: _criar_gerador_de_campo(c, num_linhas - len(dados_em_memoria),
-                                                                           chaves_primarias_geradas) for c in
-                                        campos_cfg}
-                    continue
-                combinacoes_geradas.add(combinacao)
-
-            dados_em_memoria.append(linha_atual)
-            tentativas += 1
-
-        if len(dados_em_memoria) < num_linhas:
-            raise ValueError(
-                f"Arquivo '{nome_arquivo}': Não foi possível gerar {num_linhas} linhas com as constraints de unicidade.")
-
-        cabecalho = [c['nome'] for c in campos_cfg]
-        dados_finais = [[linha[nome_campo] for nome_campo in cabecalho] for linha in dados_em_memoria]
-
-        chaves_primarias_geradas[nome_arquivo] = {}
-        for i, campo in enumerate(campos_cfg):
-            if campo.get('e_pk'):
-                chaves_primarias_geradas[nome_arquivo][campo['nome']] = [row[i] for row in dados_finais]
-
-        if regras_sort:
-            indices_sort = {nome: i for i, nome in enumerate(cabecalho)}
-            for regra in reversed(regras_sort):
-                nome_campo, ordem_desc = regra['campo'], regra['ordem'] == 'Descendente'
-                if nome_campo in indices_sort:
-                    dados_finais.sort(key=lambda row: row[indices_sort[nome_campo]], reverse=ordem_desc)
-
-        arquivo_final = nome_arquivo
-        if not arquivo_final.lower().endswith('.csv'): arquivo_final += '.csv'
-        with open(arquivo_final, 'w', newline='', encoding=codificacao) as file:
-            writer = csv.writer(file, delimiter=separador)
-            writer.writerow(cabecalho)
-            writer.writerows(dados_finais)
-
-
-def _resolver_ordem_campos(campos_cfg):
+                if perfil is not None: perfil.registrar('unicidade', time.perf_counter() - inicio_tentativa)
+            if combinacao in combinacoes_geradas: break
+            combinacoes_geradas.add(combinacao)
+
+        lote.append([linha_atual[nome_campo] for nome_campo in cabecalho])
+        linhas_geradas += 1
+        if len(lote) >= tamanho_lote:
+            yield lote
+            lote = []
+
+    if estatisticas is not None:
+        _somar_estatisticas(estatisticas, {'linhas': linhas_geradas, 'tentativas': tentativas, 'colisoes': colisoes})
+    if linhas_geradas < num_linhas:
+        raise ValueError(
+            f"Arquivo '{nome_arquivo}': Não foi possível gerar {num_linhas} linhas com as constraints de unicidade.")
+    if lote: yield lote
+
+
+def _campos_afetados(nomes_iniciais, ordem_campos, mapa_campos):
+    """Retorna, na ordem de geração, os campos indicados e os condicionais que dependem deles (direta ou
+    indiretamente)."""
+    afetados = set(nomes_iniciais)
+    for nome in ordem_campos:
+        regra = mapa_campos[nome].get('condicional')
+        if regra and not afetados.isdisjoint(campos_referenciados(regra)): afetados.add(nome)
+    return [nome for nome in ordem_campos if nome in afetados]
+
+
+def _acompanhar_linhas(lotes, nome_arquivo, progresso=None):
+    """Informa ao `progresso` (se houver) as linhas de cada lote gerado, repassando os lotes."""
+    for lote in lotes:
+        if progresso is not None: progresso.registrar(nome_arquivo, linhas=len(lote))
+        yield lote
+
+
+def resolver_ordem_campos(campos_cfg):
     nomes_campos = [c['nome'] for c in campos_cfg]
     dependencias = {c['nome']: set() for c in campos_cfg}
     for c in campos_cfg:
         regra = c.get('condicional')
-        if regra and regra.get('campo_ref') in nomes_campos:
-            # Garante que a dependência seja apenas se o campo de referência existir
-            if regra['campo_ref'] != c['nome']:
-                dependencias[c['nome']].add(regra['campo_ref'])
+        if not regra: continue
+        # Depende de todos os campos referenciados pela regra (referências inválidas são rejeitadas ao compilá-la)
+        dependencias[c['nome']].update(ref for ref in campos_referenciados(regra)
+                                       if ref in dependencias and ref != c['nome'])
 
     ordem_geracao = []
     while len(ordem_geracao) < len(nomes_campos):
@@ -223,13 +1093,20 @@ def _resolver_ordem_campos(campos_cfg):
     return ordem_geracao
 
 
-def _resolver_ordem_dependencias(arquivos_config):
+def _mapear_dependencias_arquivos(arquivos_config):
+    """Retorna {arquivo: conjunto de arquivos de que suas chaves estrangeiras dependem}."""
     nomes_arquivos = {ac['nome_arquivo'] for ac in arquivos_config}
     dependencias = {ac['nome_arquivo']: set() for ac in arquivos_config}
     for ac in arquivos_config:
         for campo in ac['campos']:
             if campo['tipo'] == 'chave_estrangeira':
                 if campo['fk_arquivo'] in nomes_arquivos: dependencias[ac['nome_arquivo']].add(campo['fk_arquivo'])
+    return dependencias
+
+
+def resolver_ordem_dependencias(arquivos_config):
+    nomes_arquivos = {ac['nome_arquivo'] for ac in arquivos_config}
+    dependencias = _mapear_dependencias_arquivos(arquivos_config)
     ordem_geracao = []
     while len(ordem_geracao) < len(nomes_arquivos):
         arquivos_prontos = [nome for nome, deps in dependencias.items() if not deps]
@@ -241,10 +1118,121 @@ def _resolver_ordem_dependencias(arquivos_config):
     return ordem_geracao
 
 
-def run_generation_in_thread(config, result_queue):
+def gerar_amostra(config, configs_sessao=(), num_linhas=LINHAS_AMOSTRA, semente_sessao=0, cache=None):
+    """Gera as primeiras linhas de um arquivo para pré-visualização e retorna (cabeçalho, linhas).
+
+    O `cache` guarda as colunas entre chamadas; uma coluna só é gerada de novo quando sua configuração, a semente
+    do arquivo, suas dependências ou a amostra do pai mudam. Unicidade e ordenação não são aplicadas."""
+    cache = {} if cache is None else cache
+    configs = {c['nome_arquivo']: c for c in configs_sessao}
+    configs[config['nome_arquivo']] = config
+    colunas, _ = _amostrar_colunas(config, None, configs, num_linhas, semente_sessao, cache, frozenset())
+    for chave in [chave for chave in cache if chave[0] == config['nome_arquivo'] and chave[1] not in colunas]:
+        del cache[chave]  # Campos removidos ou renomeados
+    cabecalho = [c['nome'] for c in config['campos']]
+    return cabecalho, [list(linha) for linha in zip(*(colunas[nome] for nome in cabecalho))]
+
+
+def _amostrar_colunas(config, nomes, configs, num_linhas, semente_sessao, cache, arquivos_visitados):
+    """Gera (ou reaproveita do cache) as colunas `nomes` da amostra de um arquivo (todas, se None) e as de que elas
+    dependem. Retorna ({campo: valores}, {campo: impressão})."""
+    nome_arquivo, campos_cfg = config['nome_arquivo'], config['campos']
+    if nome_arquivo in arquivos_visitados: raise ValueError("Dependência circular detectada entre os arquivos.")
+    mapa_campos = {c['nome']: c for c in campos_cfg}
+    ordem_campos = resolver_ordem_campos(campos_cfg)
+    if nomes is not None:
+        necessarios = set(nomes)
+        for nome in reversed(ordem_campos):
+            regra = mapa_campos[nome].get('condicional')
+            if nome in necessarios and regra: necessarios.update(campos_referenciados(regra) & mapa_campos.keys())
+        ordem_campos = [nome for nome in ordem_campos if nome in necessarios]
+
+    semente = _semente_do_arquivo(config, semente_sessao)
+    n = max(0, min(num_linhas, config['num_linhas']))
+    total_linhas = max(config['num_linhas'], n)  # Domínios menores que o arquivo inteiro já falham na amostra
+    colunas, impressoes = {}, {}
+    for nome in ordem_campos:
+        campo = mapa_campos[nome]
+        regra = campo.get('condicional')
+        dependencias = sorted(campos_referenciados(regra) & mapa_campos.keys()) if regra else []
+        chaves_pais, impressao_pai = {}, None
+        pai = configs.get(campo.get('fk_arquivo')) if campo.get('tipo') == 'chave_estrangeira' else None
+        if pai is not None and any(c['nome'] == campo.get('fk_campo') for c in pai['campos']):
+            colunas_pai, impressoes_pai = _amostrar_colunas(pai, [campo['fk_campo']], configs, num_linhas,
+                                                            semente_sessao, cache, arquivos_visitados | {nome_arquivo})
+            chaves_pais = {pai['nome_arquivo']: {campo['fk_campo']: colunas_pai[campo['fk_campo']]}}
+            impressao_pai = impressoes_pai[campo['fk_campo']]
+
+        impressao = hashlib.sha256(repr((campo, semente, n, total_linhas, [impressoes[d] for d in dependencias],
+                                         impressao_pai)).encode('utf-8')).hexdigest()
+        em_cache = cache.get((nome_arquivo, nome))
+        if em_cache is not None and em_cache[0] == impressao:
+            colunas[nome], impressoes[nome] = em_cache[1], impressao
+            continue
+
+        rng = random.Random(_derivar_semente(semente, nome))
+        gerador = _criar_gerador_de_campo(campo, total_linhas, chaves_pais,
+                                          compilar_valor_atomico(campo, chaves_pais, rng), rng)
+        if not regra:
+            valores = list(itertools.islice(gerador, n))
+        else:
+            # Como no motor linha a linha: cada ramo consome o seu fluxo, e o padrão o gerador do campo
+            acoes = _compilar_acoes_condicionais(regra, nome, semente, chaves_pais)
+            escolher_ramo = compilar_regra(regra, nome, list(mapa_campos))
+            valores = []
+            for i in range(n):
+                acao = acoes[escolher_ramo({d: colunas[d][i] for d in dependencias})]
+                valores.append(next(gerador if acao is None else acao))
+        cache[(nome_arquivo, nome)] = (impressao, valores)
+        colunas[nome], impressoes[nome] = valores, impressao
+    return colunas, impressoes
+
+
+def formatar_perfil(relatorio, campos_por_arquivo=3):
+    """Resume em linhas de texto o 'perfil' de cada arquivo do relatório: tempo por etapa e os campos mais lentos."""
+    linhas = []
+    for nome, estatisticas in relatorio.items():
+        perfil = estatisticas.get('perfil')
+        if not perfil: continue
+        etapas = perfil['etapas']
+        partes = [f"{rotulo} {etapas[etapa]['segundos']:.2f}s" for etapa, rotulo in ROTULOS_ETAPAS.items()
+                  if etapa in etapas]
+        linhas.append(f"{nome} ({etapas.get('total', {}).get('segundos', 0.0):.2f}s): {', '.join(partes)}")
+        campos = sorted(perfil['campos'].items(), key=lambda item: -item[1]['segundos'])[:campos_por_arquivo]
+        if campos:
+            linhas.append("  campos mais lentos: " + ", ".join(
+                f"{campo} {medida['segundos']:.2f}s ({medida['chamadas']} chamadas)" for campo, medida in campos))
+        if estatisticas.get('colisoes'):
+            linhas.append(f"  {estatisticas['tentativas']} tentativas, {estatisticas['colisoes']} colisões")
+    return linhas
+
+
+def run_generation_in_thread(config, result_queue, cancelamento=None):
+    """Gera a sessão enviando para `result_queue` os eventos de progresso ('progress') e, ao final, o resultado
+    ('success', 'cancelled' ou 'error')."""
     try:
-        generate_from_config(config)
-        result_queue.put(
-            {'status': 'success', 'message': f"Arquivos gerados com sucesso!"})
+        relatorio = generate_from_config(config, lambda evento: result_queue.put(dict(evento, status='progress')),
+                                         cancelamento)
+        mensagem = "Arquivos gerados com sucesso!"
+        avisos = [f"{nome}: {est['colisoes'] / est['tentativas']:.1%} das tentativas colidiram na unicidade"
+                  for nome, est in relatorio.items() if est.get('colisoes')]
+        if avisos: mensagem += "\n\n" + "\n".join(avisos)
+        perfil = formatar_perfil(relatorio)
+        if perfil: mensagem += "\n\nTempo por etapa:\n" + "\n".join(perfil)
+        result_queue.put({'status': 'success', 'message': mensagem})
+    except GeracaoCancelada as e:
+        result_queue.put({'status': 'cancelled', 'message': str(e)})
     except Exception as e:
-        result_queue.put({'status': 'error', 'message': str(e)})
\ No newline at end of file
+        result_queue.put({'status': 'error', 'message': str(e)})
+
+
+def run_generation_in_process(config, result_queue, cancelamento=None):
+    """Alvo do processo de geração da interface, como `run_generation_in_thread`.
+
+    No POSIX, um SIGTERM também cancela a geração; no Windows, `terminate` encerra o processo sem limpeza."""
+    def _interromper(signum, frame):
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        raise GeracaoCancelada("Geração interrompida pelo usuário.")
+
+    signal.signal(signal.SIGTERM, _interromper)
+    run_generation_in_thread(config, result_queue, cancelamento)
@@ -0,0 +1,165 @@
+# massbuilder.py
+# Ponto de entrada de linha de comando: gera os arquivos de uma sessão salva, sem interface gráfica.
+#
+# Uso: python -m massbuilder generate sessao.json [--output-dir DIR] [--scale F] [--seed N] [--workers N] [--engine M]
+#                                     [--sqlite DB]
+#      python -m massbuilder plan sessao.json [--scale F] [--engine M]
+#      python -m massbuilder benchmark [--rows N ...] [--only FILTRO ...] [--output resultados.json]
+# Não importa tkinter (direta ou indiretamente), podendo rodar em servidores e containers sem display.
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from data_generator import formatar_perfil, generate_from_config
+from planejamento import formatar_plano, planejar_sessao
+
+
+def _numero_positivo(conversor):
+    def _converter(texto):
+        valor = conversor(texto)
+        if valor <= 0: raise argparse.ArgumentTypeError(f"deve ser maior que zero: {texto}")
+        return valor
+    return _converter
+
+
+def _criar_parser():
+    parser = argparse.ArgumentParser(prog='massbuilder', description="Gerador de massa de dados do MassBuilder.")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    gerar = subcomandos.add_parser('generate', help="Gera os arquivos de uma sessão salva pela interface.")
+    gerar.add_argument('sessao', help="Arquivo .json da sessão (o mesmo formato de 'Salvar Sessão').")
+    gerar.add_argument('-o', '--output-dir', default='.',
+                       help="Pasta onde os arquivos serão gravados (criada se não existir). Padrão: pasta atual.")
+    gerar.add_argument('-s', '--scale', type=_numero_positivo(float), default=1.0,
+                       help="Multiplica a quantidade de linhas de todos os arquivos (ex.: 0.01 ou 10).")
+    gerar.add_argument('--seed', type=int, help="Semente da sessão, para gerar sempre os mesmos arquivos.")
+    gerar.add_argument('-w', '--workers', type=_numero_positivo(int),
+                       help="Quantidade de processos usados na geração.")
+    gerar.add_argument('--engine', choices=['linha', 'colunar'],
+                       help="Motor de geração (o colunar requer o numpy). Padrão: o da sessão, ou 'linha'.")
+    gerar.add_argument('--sqlite', metavar='BANCO',
+                       help="Carrega cada arquivo em uma tabela deste banco SQLite, em vez de gravar os arquivos.")
+    gerar.add_argument('--profile', action='store_true',
+                       help="Mede tempo e chamadas por etapa e por campo de cada arquivo e exibe o resumo.")
+    gerar.add_argument('--cprofile', metavar='ARQUIVO',
+                       help="Executa a geração sob o cProfile e grava as estatísticas (pstats) neste arquivo.")
+    gerar.add_argument('--report', metavar='ARQUIVO', help="Grava o relatório completo da geração em JSON.")
+
+    planejar = subcomandos.add_parser('plan', help="Verifica se uma sessão pode ser gerada e estima o seu custo.")
+    planejar.add_argument('sessao', help="Arquivo .json da sessão (o mesmo formato de 'Salvar Sessão').")
+    planejar.add_argument('-s', '--scale', type=_numero_positivo(float), default=1.0,
+                          help="Multiplica a quantidade de linhas de todos os arquivos (ex.: 0.01 ou 10).")
+    planejar.add_argument('--engine', choices=['linha', 'colunar'], help="Motor de geração considerado no resumo.")
+
+    medir = subcomandos.add_parser('benchmark', help="Mede a vazão do motor de geração em sessões sintéticas.")
+    medir.add_argument('-r', '--rows', type=_numero_positivo(int), nargs='+', default=[10_000],
+                       help="Escalas (linhas por arquivo) dos cenários. Ex.: --rows 10000 1000000 10000000")
+    medir.add_argument('--only', nargs='+', metavar='FILTRO',
+                       help="Executa apenas os cenários cujo nome contém algum filtro (ex.: tipo:regex fk unicidade).")
+    medir.add_argument('--engine', choices=['linha', 'colunar'], default='linha', help="Motor de geração.")
+    medir.add_argument('-w', '--workers', type=_numero_positivo(int), default=1,
+                       help="Quantidade de processos usados na geração.")
+    medir.add_argument('-o', '--output', help="Salva os resultados neste arquivo JSON.")
+    medir.add_argument('--compare', help="Resultado JSON anterior, para exibir a variação de vazão.")
+    return parser
+
+
+def carregar_sessao(caminho, escala=1.0, semente=None, workers=None, motor=None):
+    """Lê a sessão salva em `caminho` e aplica as opções da linha de comando."""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        configuracoes = json.load(f)
+    if escala != 1.0:
+        for config_arquivo in configuracoes.get('arquivos', []):
+            num_linhas = config_arquivo['num_linhas']
+            config_arquivo['num_linhas'] = max(1, round(num_linhas * escala)) if num_linhas > 0 else num_linhas
+    if semente is not None: configuracoes['semente'] = semente
+    if workers is not None: configuracoes['workers'] = workers
+    if motor is not None: configuracoes['motor'] = motor
+    return configuracoes
+
+
+def gerar(args):
+    try:
+        configuracoes = carregar_sessao(args.sessao, args.scale, args.seed, args.workers, args.engine)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Erro ao carregar a sessão '{args.sessao}': {e}", file=sys.stderr)
+        return 2
+    if args.sqlite:
+        configuracoes['banco'] = {'modulo': 'sqlite3', 'conexao': {'database': os.path.abspath(args.sqlite)}}
+    if args.profile: configuracoes['instrumentar'] = True
+    if args.cprofile: configuracoes['perfil_cprofile'] = os.path.abspath(args.cprofile)
+    caminho_relatorio = os.path.abspath(args.report) if args.report else None
+
+    # Os nomes dos arquivos da sessão são relativos: gera-os a partir da pasta de saída
+    os.makedirs(args.output_dir, exist_ok=True)
+    os.chdir(args.output_dir)
+
+    inicio = time.perf_counter()
+    try:
+        relatorio = generate_from_config(configuracoes)
+    except Exception as e:
+        print(f"Erro na geração: {e}", file=sys.stderr)
+        return 1
+
+    for nome, estatisticas in relatorio.items():
+        linha = f"{nome}: {estatisticas.get('linhas', 0)} linhas"
+        if estatisticas.get('colisoes'):
+            linha += f" ({estatisticas['colisoes'] / estatisticas['tentativas']:.1%} das tentativas colidiram na unicidade)"
+        print(linha)
+    if configuracoes.get('banco'): print(f"Tabelas carregadas no banco ({time.perf_counter() - inicio:.1f}s).")
+    else: print(f"Arquivos gerados em {os.getcwd()} ({time.perf_counter() - inicio:.1f}s).")
+    perfil = formatar_perfil(relatorio)
+    if perfil: print("\nTempo por etapa:\n" + "\n".join(perfil))
+    if caminho_relatorio:
+        with open(caminho_relatorio, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=4)
+    return 0
+
+
+def planejar(args):
+    try:
+        configuracoes = carregar_sessao(args.sessao, args.scale, motor=args.engine)
+        plano = planejar_sessao(configuracoes)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Erro ao carregar a sessão '{args.sessao}': {e}", file=sys.stderr)
+        return 2
+    for linha in formatar_plano(plano): print(linha)
+    total_bytes = sum(arquivo['bytes_estimados'] for arquivo in plano.values())
+    total_segundos = sum(arquivo['segundos_estimados'] for arquivo in plano.values())
+    if configuracoes.get('motor', 'linha') == 'colunar':  # O tempo é sempre estimado pelo motor linha a linha
+        print(f"Total: ~{total_bytes / 1e6:.1f} MB, até ~{total_segundos:.1f}s (estimado pelo motor linha a linha "
+              "em 1 processo; o motor colunar costuma ser mais rápido).")
+    else:
+        print(f"Total: ~{total_bytes / 1e6:.1f} MB, ~{total_segundos:.1f}s (motor linha a linha, 1 processo).")
+    return 1 if any(arquivo['erros'] for arquivo in plano.values()) else 0
+
+
+def medir(args):
+    import benchmark  # Carregado só aqui: o subcomando generate não precisa dele
+
+    resultados = benchmark.executar(args.rows, args.only, args.engine, args.workers,
+                                    ao_concluir=lambda resultado: print(benchmark.formatar(resultado), flush=True))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=4)
+        print(f"Resultados salvos em {args.output}.")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            print("\nVariação de vazão em relação a", args.compare)
+            for linha in benchmark.comparar(resultados, json.load(f)): print(linha)
+    return 0
+
+
+def main(argv=None):
+    args = _criar_parser().parse_args(argv)
+    if args.comando == 'generate': return gerar(args)
+    if args.comando == 'plan': return planejar(args)
+    if args.comando == 'benchmark': return medir(args)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
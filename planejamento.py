@@ -0,0 +1,167 @@
+# planejamento.py
+# Verificação prévia da sessão: domínios, colisões esperadas na unicidade e estimativas de tamanho e tempo.
+
+import math
+import random
+import time
+
+from data_generator import (TENTATIVAS_POR_LINHA, campo_unico, compilar_valor_atomico, resolver_ordem_campos,
+                            resolver_ordem_dependencias, tamanho_dominio)
+from regras import acoes_da_regra, compilar_regra
+from saida import validar_formato
+
+# Valores sorteados por campo para estimar tamanho e tempo, e fração de sorteios desperdiçados em colisões a partir
+# da qual a constraint de unicidade gera um aviso
+AMOSTRA_PLANEJAMENTO = 200
+TAXA_COLISAO_AVISO = 0.5
+
+
+def planejar_sessao(configuracoes):
+    """Verifica, sem gerar nenhuma linha, se a sessão pode ser gerada, e estima o custo de cada arquivo.
+
+    Retorna {arquivo: {'linhas', 'dominios', 'combinacoes', 'taxa_colisao', 'bytes_estimados', 'segundos_estimados',
+    'erros', 'avisos'}}."""
+    arquivos_config = configuracoes['arquivos']
+    mapa_configs = {ac['nome_arquivo']: ac for ac in arquivos_config}
+    plano, larguras = {}, {}
+    for nome_arquivo in resolver_ordem_dependencias(arquivos_config):
+        plano[nome_arquivo] = _planejar_arquivo(mapa_configs[nome_arquivo], mapa_configs, larguras,
+                                                verificar_formato=not configuracoes.get('banco'))
+    return plano
+
+
+def _planejar_arquivo(config, mapa_configs, larguras, verificar_formato=True):
+    """Planeja um arquivo; `larguras` ({(arquivo, campo): bytes}) guarda o tamanho médio dos campos já planejados."""
+    nome_arquivo, num_linhas, campos_cfg = config['nome_arquivo'], config['num_linhas'], config['campos']
+    erros, avisos = [], []
+    prefixo = f"Arquivo '{nome_arquivo}'"
+    mapa_campos = {c['nome']: c for c in campos_cfg}
+
+    if verificar_formato:
+        try:
+            validar_formato(config)
+        except (ValueError, ImportError) as e:
+            erros.append(f"{prefixo}: {e}")
+    try:
+        resolver_ordem_campos(campos_cfg)
+    except ValueError as e:
+        erros.append(f"{prefixo}: {e}")
+
+    dominios, unicos, segundos_por_linha = {}, set(), 0.0
+    for campo in campos_cfg:
+        nome, tipo, regra = campo['nome'], campo.get('tipo', 'string'), campo.get('condicional')
+        rotulo = f"{prefixo}, campo '{nome}'"
+        if regra:
+            try:
+                compilar_regra(regra, nome, list(mapa_campos))
+            except ValueError as e:
+                erros.append(f"{prefixo}: {e}")
+
+        if tipo == 'chave_estrangeira':
+            pai = mapa_configs.get(campo.get('fk_arquivo'))
+            um_para_um = campo.get('cardinalidade') == 'Um-para-Um (1:1)'
+            if pai is None or not any(c['nome'] == campo.get('fk_campo') and c.get('e_pk') for c in pai['campos']):
+                (erros if um_para_um else avisos).append(
+                    f"{rotulo}: a FK não aponta para uma chave primária de outro arquivo da sessão"
+                    + ("." if um_para_um else "; seus valores ficarão vazios."))
+                dominios[nome] = 1
+            else:
+                dominios[nome] = pai['num_linhas']
+                if um_para_um and pai['num_linhas'] < num_linhas:
+                    erros.append(f"{rotulo}: Não há chaves primárias únicas suficientes para a relação 1:1 "
+                                 f"({pai['num_linhas']} chaves em '{pai['nome_arquivo']}' para {num_linhas} linhas).")
+            if um_para_um: unicos.add(nome)
+            larguras[(nome_arquivo, nome)] = larguras.get((campo.get('fk_arquivo'), campo.get('fk_campo')), 0)
+            continue
+
+        # Os valores de um campo condicional vêm de qualquer uma das suas ações
+        fontes = ([campo if acao.get('tipo') == 'Usar Geração Padrão' else acao for acao in acoes_da_regra(regra)]
+                  if regra else [campo])
+        dominios_fontes = [tamanho_dominio(fonte) for fonte in fontes]
+        dominio = None if None in dominios_fontes else sum(dominios_fontes)
+        dominios[nome] = dominio
+        if campo_unico(campo):
+            unicos.add(nome)
+            if dominio is not None and dominio < num_linhas:
+                erros.append(f"{rotulo}: admite apenas {dominio} valores distintos, insuficientes para {num_linhas} "
+                             "linhas únicas.")
+        elif dominio == 0:
+            erros.append(f"{rotulo}: não admite nenhum valor.")
+
+        # Amostra de valores (de cada ação, num campo condicional): tamanho médio no texto gerado e custo do sorteio
+        amostra = []
+        for fonte in fontes:
+            gerar_valor = compilar_valor_atomico(fonte, {}, random.Random(0))
+            try:
+                inicio = time.perf_counter()
+                amostra_fonte = [gerar_valor() for _ in range(AMOSTRA_PLANEJAMENTO)]
+            except Exception as e:
+                erros.append(f"{rotulo}: {e}")
+                continue
+            segundos_por_linha += (time.perf_counter() - inicio) / AMOSTRA_PLANEJAMENTO / len(fontes)
+            amostra.extend(amostra_fonte)
+        larguras[(nome_arquivo, nome)] = (sum(len(str('' if v is None else v).encode('utf-8')) for v in amostra)
+                                          / len(amostra) if amostra else 0)
+
+    combinacoes = taxa_colisao = None
+    constraint = config.get('constraint_unicidade', [])
+    if constraint:
+        ausentes = [nome for nome in constraint if nome not in mapa_campos]
+        if ausentes:
+            erros.append(f"{prefixo}: a constraint de unicidade usa campos inexistentes: {', '.join(ausentes)}.")
+        elif unicos.isdisjoint(constraint) and None not in (dominios[nome] for nome in constraint):
+            # Com um campo único na constraint as combinações nunca colidem; sem ele, é o problema do colecionador
+            combinacoes = math.prod(dominios[nome] for nome in constraint)
+            if combinacoes < num_linhas:
+                erros.append(f"{prefixo}: a constraint de unicidade ({', '.join(constraint)}) admite apenas "
+                             f"{combinacoes} combinações, insuficientes para {num_linhas} linhas.")
+            else:
+                tentativas = _tentativas_esperadas(num_linhas, combinacoes)
+                taxa_colisao = 1 - num_linhas / tentativas if tentativas else 0.0
+                if tentativas > num_linhas * TENTATIVAS_POR_LINHA:
+                    erros.append(f"{prefixo}: a constraint de unicidade ({', '.join(constraint)}) exigiria cerca de "
+                                 f"{tentativas:,.0f} sorteios para {num_linhas} linhas (o limite é "
+                                 f"{TENTATIVAS_POR_LINHA} por linha).")
+                elif taxa_colisao > TAXA_COLISAO_AVISO:
+                    avisos.append(f"{prefixo}: {taxa_colisao:.0%} dos sorteios devem colidir na constraint de "
+                                  "unicidade.")
+
+    # Tamanho: valores, separadores e quebra de linha ('\r\n' no CSV) por linha, mais o cabeçalho
+    largura_linha = (sum(larguras[(nome_arquivo, c['nome'])] for c in campos_cfg)
+                     + len(config.get('separador', ',')) * max(0, len(campos_cfg) - 1) + 2)
+    cabecalho = sum(len(c['nome'].encode('utf-8')) + 1 for c in campos_cfg) + 1
+    fator_tentativas = 1 / (1 - taxa_colisao) if taxa_colisao else 1.0
+    return {'linhas': num_linhas, 'dominios': dominios, 'combinacoes': combinacoes, 'taxa_colisao': taxa_colisao,
+            'bytes_estimados': round(max(0, num_linhas) * largura_linha + cabecalho),
+            'segundos_estimados': max(0, num_linhas) * segundos_por_linha * fator_tentativas,
+            'erros': erros, 'avisos': avisos}
+
+
+def _harmonico(m):
+    """Número harmônico H(m), exato para m pequeno e pela expansão assintótica nos demais."""
+    if m < 10: return sum(1 / k for k in range(1, int(m) + 1))
+    return math.log(m) + 0.5772156649015329 + 1 / (2 * m) - 1 / (12 * m * m)
+
+
+def _tentativas_esperadas(n, dominio):
+    """Sorteios esperados (com reposição) até obter `n` valores distintos de um domínio de `dominio` valores."""
+    if n <= 0: return 0.0
+    if dominio > n * 10 ** 12: return float(n)  # Colisões desprezíveis (e evita converter domínios enormes)
+    resto = dominio - n
+    if resto >= 10:  # H(dominio) - H(resto), sem a perda de precisão da subtração quando n é pequeno
+        return dominio * (-math.log1p(-n / dominio) + 1 / (2 * dominio) - 1 / (2 * resto))
+    return dominio * (_harmonico(dominio) - _harmonico(resto))
+
+
+def formatar_plano(plano):
+    """Resume em linhas de texto o plano de `planejar_sessao`: custo estimado, erros e avisos de cada arquivo."""
+    linhas = []
+    for nome, arquivo in plano.items():
+        linha = (f"{nome}: {arquivo['linhas']} linhas, ~{arquivo['bytes_estimados'] / 1e6:.1f} MB, "
+                 f"~{arquivo['segundos_estimados']:.1f}s")
+        if arquivo['taxa_colisao'] is not None: linha += f", {arquivo['taxa_colisao']:.1%} de colisões na unicidade"
+        linhas.append(linha)
+        linhas.extend(f"  ERRO: {erro}" for erro in arquivo['erros'])
+        linhas.extend(f"  aviso: {aviso}" for aviso in arquivo['avisos'])
+    return linhas
+
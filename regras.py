@@ -0,0 +1,180 @@
+# regras.py
+# Regras condicionais dos campos: validação e compilação em funções que escolhem o ramo de cada linha.
+
+import operator
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Opcional: necessário apenas para as regras avaliadas em lote pelo motor colunar
+
+# Operadores que comparam os valores como números
+OPERADORES_NUMERICOS = {'>': operator.gt, '<': operator.lt, '>=': operator.ge, '<=': operator.le}
+
+
+def normalizar_regra(regra):
+    """Converte uma regra para a forma {'casos': [{'condicao', 'acao'}, ...], 'senao': ação}.
+
+    A forma simples (campo_ref, operador, valor_ref, acao_verdadeiro, acao_falso) vira um único caso; uma condição
+    pode ser uma comparação ou uma combinação {'e': [...]} / {'ou': [...]}, aninhável."""
+    if 'casos' in regra:
+        return {'casos': regra['casos'], 'senao': regra.get('senao') or {'tipo': 'Usar Geração Padrão'}}
+    condicao = {chave: regra.get(chave) for chave in ('campo_ref', 'operador', 'valor_ref')}
+    return {'casos': [{'condicao': condicao, 'acao': regra['acao_verdadeiro']}], 'senao': regra['acao_falso']}
+
+
+def _campos_da_condicao(condicao):
+    """Campos de referência de uma condição, incluindo os das combinações aninhadas."""
+    if not isinstance(condicao, dict): return set()
+    if 'e' in condicao or 'ou' in condicao:
+        return set().union(*(_campos_da_condicao(c) for c in condicao.get('e', condicao.get('ou')) or []))
+    return {condicao['campo_ref']} if condicao.get('campo_ref') else set()
+
+
+def campos_referenciados(regra):
+    """Todos os campos de que uma regra condicional depende."""
+    return set().union(*(_campos_da_condicao(caso.get('condicao')) for caso in normalizar_regra(regra)['casos']))
+
+
+def acoes_da_regra(regra):
+    """Ações de uma regra condicional, na ordem dos casos e por último a do 'senao'."""
+    regra = normalizar_regra(regra)
+    return [caso['acao'] for caso in regra['casos']] + [regra['senao']]
+
+
+def compilar_regra(regra, nome_campo, nomes_campos, em_lote=False):
+    """Compila uma regra em uma função que retorna o índice do primeiro caso verdadeiro, ou `len(casos)` no 'senao'.
+
+    Linha a linha, recebe o dicionário da linha; `em_lote`, recebe {campo: valores do lote} e retorna um array de
+    ramos. Casos 'é igual a' sobre um mesmo campo viram uma tabela {valor: ramo}."""
+    try:
+        casos = normalizar_regra(regra)['casos']
+        if not casos: raise ValueError("a regra não tem nenhum caso")
+        for caso in casos:
+            if not isinstance(caso.get('condicao'), dict) or not isinstance(caso.get('acao'), dict):
+                raise ValueError("cada caso precisa de uma 'condicao' e de uma 'acao'")
+        condicoes = [caso['condicao'] for caso in casos]
+        senao = len(casos)
+
+        campos_ref = {condicao.get('campo_ref') for condicao in condicoes}
+        if len(campos_ref) == 1 and all(c.get('operador') == 'é igual a' for c in condicoes):
+            _validar_comparacao(condicoes[0], nome_campo, nomes_campos)
+            tabela = {}
+            for i, condicao in enumerate(condicoes): tabela.setdefault(str(condicao.get('valor_ref')), i)
+            return _compilar_tabela_de_ramos(tabela, campos_ref.pop(), senao, em_lote)
+
+        compiladas = [_compilar_condicao(condicao, nome_campo, nomes_campos, em_lote) for condicao in condicoes]
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Regra condicional inválida no campo '{nome_campo}': {e!r}")
+    except ValueError as e:
+        raise ValueError(f"Regra condicional inválida no campo '{nome_campo}': {e}")
+
+    if em_lote:
+        def _escolher_ramos(colunas, n):
+            ramos = np.full(n, senao, dtype=np.intp)
+            for i in reversed(range(len(compiladas))): ramos[compiladas[i](colunas)] = i
+            return ramos
+        return _escolher_ramos
+
+    if len(compiladas) == 1:
+        condicao = compiladas[0]
+        return lambda linha: 0 if condicao(linha) else 1
+
+    def _escolher_ramo(linha):
+        for i, condicao in enumerate(compiladas):
+            if condicao(linha): return i
+        return senao
+    return _escolher_ramo
+
+
+def _validar_comparacao(condicao, nome_campo, nomes_campos):
+    campo_ref = condicao.get('campo_ref')
+    if campo_ref not in nomes_campos: raise ValueError(f"o campo de referência '{campo_ref}' não existe")
+    if campo_ref == nome_campo: raise ValueError("o campo não pode referenciar a si mesmo")
+
+
+def _compilar_condicao(condicao, nome_campo, nomes_campos, em_lote=False):
+    """Compila uma comparação ou combinação 'e'/'ou' em um predicado da linha (ou na máscara do lote)."""
+    for conector in ('e', 'ou'):
+        if conector not in condicao: continue
+        partes = condicao[conector]
+        if not isinstance(partes, list) or not partes:
+            raise ValueError(f"a combinação '{conector}' precisa de uma lista com ao menos uma condição")
+        partes = [_compilar_condicao(parte, nome_campo, nomes_campos, em_lote) for parte in partes]
+        if len(partes) == 1: return partes[0]
+        if em_lote:
+            reduzir = np.logical_and.reduce if conector == 'e' else np.logical_or.reduce
+            return lambda colunas: reduzir([parte(colunas) for parte in partes])
+        if conector == 'e': return lambda linha: all(parte(linha) for parte in partes)
+        return lambda linha: any(parte(linha) for parte in partes)
+
+    _validar_comparacao(condicao, nome_campo, nomes_campos)
+    campo_ref = condicao['campo_ref']
+    if em_lote:
+        mascara = _compilar_mascara(condicao.get('operador'), condicao.get('valor_ref'))
+        return lambda colunas: mascara(colunas[campo_ref])
+    predicado = _compilar_predicado(condicao.get('operador'), condicao.get('valor_ref'))
+    return lambda linha: predicado(linha[campo_ref])
+
+
+def _compilar_tabela_de_ramos(tabela, campo_ref, senao, em_lote=False):
+    """Escolha de ramo por tabela de despacho {texto do valor: ramo}, com `senao` para os demais valores."""
+    if not em_lote:
+        return lambda linha: tabela.get(valor if type(valor := linha[campo_ref]) is str else str(valor), senao)
+
+    def _escolher_ramos(colunas, n):
+        valores = colunas[campo_ref]
+        coluna = np.asarray(valores)
+        if coluna.dtype.kind == 'U':  # Consulta a tabela uma vez por valor distinto do lote
+            distintos, inverso = np.unique(coluna, return_inverse=True)
+            return np.array([tabela.get(v, senao) for v in distintos.tolist()], dtype=np.intp)[inverso.ravel()]
+        return np.fromiter((tabela.get(v if type(v) is str else str(v), senao) for v in valores), dtype=np.intp,
+                           count=len(valores))
+    return _escolher_ramos
+
+
+def _compilar_predicado(operador, valor_ref):
+    """Compila uma comparação em uma função do valor do campo de referência que retorna True ou False."""
+    if operador in OPERADORES_NUMERICOS:
+        comparar = OPERADORES_NUMERICOS[operador]
+        try:
+            limite = float(valor_ref)
+        except (ValueError, TypeError):
+            raise ValueError(f"o valor '{valor_ref}' não é numérico para o operador '{operador}'")
+
+        def _comparar_numeros(valor):
+            try:
+                return comparar(float(valor), limite)
+            except (ValueError, TypeError):
+                return False
+        return _comparar_numeros
+    texto = str(valor_ref)
+    if operador == 'é igual a': return lambda valor: (valor if type(valor) is str else str(valor)) == texto
+    if operador == 'é diferente de': return lambda valor: (valor if type(valor) is str else str(valor)) != texto
+    if operador == 'contém': return lambda valor: texto in str(valor)
+    if operador == 'não contém': return lambda valor: texto not in str(valor)
+    raise ValueError(f"operador desconhecido: '{operador}'")
+
+
+def _compilar_mascara(operador, valor_ref):
+    """Versão em lote de `_compilar_predicado`: retorna a máscara NumPy das linhas em que a condição vale."""
+    predicado = _compilar_predicado(operador, valor_ref)  # Também valida o operador e `valor_ref`
+    avaliar_cada = lambda valores: np.fromiter(map(predicado, valores), dtype=bool, count=len(valores))
+    if operador in OPERADORES_NUMERICOS:
+        comparar, limite = OPERADORES_NUMERICOS[operador], float(valor_ref)
+
+        def _mascara_numerica(valores):
+            coluna = np.asarray(valores)
+            return comparar(coluna, limite) if coluna.dtype.kind in 'biuf' else avaliar_cada(valores)
+        return _mascara_numerica
+    texto = str(valor_ref)
+    comparar_textos = {'é igual a': lambda coluna: coluna == texto,
+                       'é diferente de': lambda coluna: coluna != texto,
+                       'contém': lambda coluna: np.char.find(coluna, texto) >= 0,
+                       'não contém': lambda coluna: np.char.find(coluna, texto) < 0}[operador]
+
+    def _mascara_texto(valores):
+        coluna = np.asarray(valores)
+        return comparar_textos(coluna) if coluna.dtype.kind == 'U' else avaliar_cada(valores)
+    return _mascara_texto
+
@@ -0,0 +1,469 @@
+# saida.py
+# Gravação dos arquivos gerados: CSV, COPY, Parquet e Arrow, compressão e carga direta em banco de dados.
+
+import bz2
+import codecs
+import contextlib
+import csv
+import datetime
+import gzip
+import importlib
+import io
+import lzma
+import os
+import queue
+import shutil
+import threading
+
+from regras import acoes_da_regra
+from utils import INT64_MAX, INT64_MIN
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None  # Opcional: necessário apenas para os formatos Parquet e Arrow
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # Opcional: necessário apenas para a compressão zstd de arquivos CSV/COPY
+
+# Formatos de saída por arquivo (chave `formato`), com suas extensões e as compressões aceitas por cada um
+# ('copy' é o formato texto do COPY do PostgreSQL: tabulações, \N para nulos e sem cabeçalho)
+EXTENSOES_FORMATO = {'csv': '.csv', 'copy': '.copy', 'parquet': '.parquet', 'arrow': '.arrow'}
+FORMATOS_COLUNARES = ('parquet', 'arrow')
+# Compressão dos arquivos texto (CSV/COPY) como um todo, com a extensão acrescentada ao nome (ex.: .csv.gz)
+EXTENSOES_COMPRESSAO = {'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz', 'zstd': '.zst'}
+COMPRESSOES_FORMATO = {'csv': tuple(EXTENSOES_COMPRESSAO), 'copy': tuple(EXTENSOES_COMPRESSAO),
+                       'parquet': ('snappy', 'zstd', 'gzip', 'lz4', 'brotli'), 'arrow': ('zstd', 'lz4')}
+# Blocos de 1 MB aguardando a thread de compressão (limita a memória quando comprimir é mais lento que gerar)
+BLOCOS_EM_COMPRESSAO = 16
+TAMANHO_BLOCO_COMPRESSAO = 1024 * 1024
+# Linhas por row group dos arquivos Parquet, quando o arquivo não define `linhas_por_grupo`
+LINHAS_POR_GRUPO_PARQUET = 1_048_576
+# Carga direta em banco de dados (chave `banco` da sessão): tipo SQL de cada tipo lógico de coluna e marcador de
+# parâmetro de cada `paramstyle` da DB-API
+TIPOS_SQL_PADRAO = {'integer': 'BIGINT', 'float': 'DOUBLE PRECISION', 'boolean': 'BOOLEAN', 'datetime': 'TIMESTAMP',
+                    'string': 'TEXT'}
+TIPOS_SQL_SQLITE = {'integer': 'INTEGER', 'float': 'REAL', 'boolean': 'INTEGER', 'datetime': 'TEXT', 'string': 'TEXT'}
+MARCADORES_PARAMETRO = {'qmark': '?', 'format': '%s', 'pyformat': '%s', 'numeric': ':{}', 'named': ':{}'}
+
+
+def validar_formato(config):
+    """Verifica o formato de saída de um arquivo e suas opções antes de iniciar a geração."""
+    nome, formato = config['nome_arquivo'], config.get('formato', 'csv')
+    if formato not in EXTENSOES_FORMATO:
+        raise ValueError(f"Formato de saída desconhecido para o arquivo '{nome}': {formato}")
+    if formato in FORMATOS_COLUNARES and pa is None:
+        raise ImportError(f"O formato '{formato}' requer a biblioteca 'pyarrow'. Instale-a com: pip install pyarrow")
+    compressao = config.get('compressao')
+    if compressao and compressao not in COMPRESSOES_FORMATO[formato]:
+        raise ValueError(f"Compressão '{compressao}' não suportada no formato '{formato}' (arquivo '{nome}'). "
+                         f"Opções: {', '.join(COMPRESSOES_FORMATO[formato])}")
+    if compressao == 'zstd' and formato not in FORMATOS_COLUNARES and zstandard is None:
+        raise ImportError("A compressão 'zstd' requer a biblioteca 'zstandard'. Instale-a com: pip install zstandard")
+    linhas_por_grupo = config.get('linhas_por_grupo')
+    if linhas_por_grupo is not None and (not isinstance(linhas_por_grupo, int) or linhas_por_grupo <= 0):
+        raise ValueError(f"'linhas_por_grupo' do arquivo '{nome}' deve ser um inteiro positivo: {linhas_por_grupo}")
+
+
+def _tipo_logico(campo, chaves_geradas=None):
+    """Tipo dos valores de um campo (ou ação condicional) nos formatos tipados; None para 'Nulo/Vazio'."""
+    tipo = campo.get('tipo', 'string')
+    if tipo == 'Nulo/Vazio': return None
+    if tipo == 'integer':
+        try:
+            minimo, maximo = int(campo['limite'][0]), int(campo['limite'][1])
+        except (ValueError, KeyError, IndexError, TypeError):
+            return 'integer'  # Parâmetros inválidos: a geração falhará com a mensagem do campo
+        return 'integer' if INT64_MIN <= minimo and maximo <= INT64_MAX else 'string'
+    if tipo in ('float', 'boolean', 'datetime'): return tipo
+    if tipo == 'chave_estrangeira':
+        coluna = (chaves_geradas or {}).get(campo.get('fk_arquivo'), {}).get(campo.get('fk_campo'))
+        return {'int': 'integer', 'float': 'float'}.get(getattr(coluna, 'tipo', None), 'string')
+    return 'string'
+
+
+def _valor_fixo_compativel(valor, tipo):
+    """Indica se o texto de um 'Valor Fixo' pode ser gravado em uma coluna do tipo lógico `tipo`."""
+    if valor == '' or tipo == 'string': return True
+    try:
+        if tipo == 'integer': int(valor)
+        elif tipo == 'float': float(valor)
+        elif tipo == 'boolean': return valor.lower() in ('true', 'false', '1', '0')
+        elif tipo == 'datetime': datetime.datetime.fromisoformat(valor)
+    except ValueError:
+        return False
+    return True
+
+
+def _tipos_colunas(config, chaves_geradas=None):
+    """Tipo lógico de cada coluna; ações condicionais de outro tipo tornam a coluna texto."""
+    tipos = []
+    for campo in config['campos']:
+        tipo = _tipo_logico(campo, chaves_geradas) or 'string'
+        regra = campo.get('condicional')
+        for acao in (acoes_da_regra(regra) if regra else ()):
+            if acao.get('tipo') == 'Usar Geração Padrão': continue
+            if acao.get('tipo') == 'Valor Fixo': compativel = _valor_fixo_compativel(acao.get('valor_fixo', ''), tipo)
+            else: compativel = _tipo_logico(acao, chaves_geradas) in (None, tipo)
+            if not compativel:
+                tipo = 'string'
+                break
+        tipos.append(tipo)
+    return tipos
+
+
+def _esquema_arrow(config, chaves_geradas=None):
+    """Esquema tipado (int64, float64, bool, timestamp ou texto) das colunas de um arquivo Parquet/Arrow."""
+    tipos_arrow = {'integer': pa.int64(), 'float': pa.float64(), 'boolean': pa.bool_(), 'datetime': pa.timestamp('s'),
+                   'string': pa.string()}
+    return pa.schema([pa.field(campo['nome'], tipos_arrow[tipo])
+                      for campo, tipo in zip(config['campos'], _tipos_colunas(config, chaves_geradas))])
+
+
+def _coluna_arrow(valores, tipo, nome_campo):
+    """Converte os valores de uma coluna em um array Arrow de `tipo`; em colunas tipadas, '' vira nulo."""
+    if not pa.types.is_timestamp(tipo):
+        try:
+            return pa.array(valores, tipo)
+        except (ValueError, TypeError):
+            pass
+    if tipo == pa.string(): return pa.array([None if v is None else str(v) for v in valores], tipo)
+    try:
+        return pa.array([None if v is None or v == '' else str(v) for v in valores], pa.string()).cast(tipo)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Valor incompatível com o tipo '{tipo}' da coluna '{nome_campo}': {e}")
+
+
+def _lote_para_batch(lote, esquema):
+    """Transpõe um lote de linhas em um RecordBatch com as colunas de `esquema`."""
+    colunas = zip(*lote) if lote else [()] * len(esquema)
+    return pa.record_batch([_coluna_arrow(list(valores), campo.type, campo.name)
+                            for valores, campo in zip(colunas, esquema)], schema=esquema)
+
+
+class _EscritorColunar:
+    """Grava lotes de linhas em Parquet (em row groups de `linhas_por_grupo`) ou Arrow IPC com um esquema tipado."""
+
+    def __init__(self, caminho, formato, esquema, compressao=None, linhas_por_grupo=LINHAS_POR_GRUPO_PARQUET):
+        self.formato, self.esquema, self.linhas_por_grupo = formato, esquema, linhas_por_grupo
+        self.pendentes, self.linhas_pendentes = [], 0
+        self.destino = pa.OSFile(caminho, 'wb')
+        try:
+            if formato == 'parquet':
+                self.escritor = pq.ParquetWriter(self.destino, esquema, compression=compressao or 'none')
+            else:
+                self.escritor = pa.ipc.new_file(self.destino, esquema,
+                                                options=pa.ipc.IpcWriteOptions(compression=compressao))
+        except BaseException:
+            self.destino.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_erro, erro, rastreamento):
+        if tipo_erro is None: self.fechar()
+        else: self.destino.close()  # O arquivo incompleto é descartado por quem o criou
+
+    def bytes_gravados(self):
+        return self.destino.tell()
+
+    def escrever_lote(self, lote):
+        self.escrever_batch(_lote_para_batch(lote, self.esquema))
+
+    def escrever_batch(self, batch):
+        if self.formato != 'parquet':
+            self.escritor.write_batch(batch)
+            return
+        self.pendentes.append(batch)
+        self.linhas_pendentes += batch.num_rows
+        if self.linhas_pendentes >= self.linhas_por_grupo: self._gravar_pendentes()
+
+    def _gravar_pendentes(self, final=False):
+        """Grava os row groups completos acumulados (e o incompleto, se `final`)."""
+        tabela = pa.Table.from_batches(self.pendentes, self.esquema)
+        completas = tabela.num_rows if final else tabela.num_rows - tabela.num_rows % self.linhas_por_grupo
+        if completas: self.escritor.write_table(tabela.slice(0, completas), row_group_size=self.linhas_por_grupo)
+        restante = tabela.slice(completas)
+        self.pendentes, self.linhas_pendentes = restante.to_batches(), restante.num_rows
+
+    def fechar(self):
+        try:
+            if self.linhas_pendentes: self._gravar_pendentes(final=True)
+            self.escritor.close()
+        finally:
+            self.destino.close()
+
+
+def _nome_tabela(nome_arquivo):
+    """Nome da tabela de um arquivo: o próprio nome, sem pastas nem extensão de formato conhecida."""
+    nome, extensao = os.path.splitext(os.path.basename(nome_arquivo))
+    return nome if extensao.lower() in EXTENSOES_FORMATO.values() else os.path.basename(nome_arquivo)
+
+
+def _identificador_sql(nome):
+    return '"' + nome.replace('"', '""') + '"'
+
+
+class DestinoBanco:
+    """Carrega as linhas geradas em tabelas de um banco por um módulo DB-API 2.0 (chave `banco` da sessão).
+
+    Opções: 'modulo' (padrão 'sqlite3'), 'conexao' (argumentos de `connect`), 'recriar' e 'tipos_sql'."""
+
+    def __init__(self, opcoes):
+        nome_modulo = opcoes.get('modulo', 'sqlite3')
+        try:
+            modulo = importlib.import_module(nome_modulo)
+        except ImportError:
+            raise ImportError(f"O módulo de banco de dados '{nome_modulo}' não está instalado.")
+        if getattr(modulo, 'paramstyle', None) not in MARCADORES_PARAMETRO:
+            raise ValueError(f"O módulo '{nome_modulo}' não é um módulo DB-API 2.0 suportado (paramstyle).")
+        self.marcador = MARCADORES_PARAMETRO[modulo.paramstyle]
+        self.tipos_sql = {**(TIPOS_SQL_SQLITE if nome_modulo == 'sqlite3' else TIPOS_SQL_PADRAO),
+                          **opcoes.get('tipos_sql', {})}
+        self.recriar = opcoes.get('recriar', True)
+        self.conexao = modulo.connect(**opcoes.get('conexao', {}))
+
+    def preparar(self, configs):
+        """Apaga as tabelas dos arquivos `configs` (na ordem das dependências), das filhas para as mães."""
+        if not self.recriar: return
+        cursor = self.conexao.cursor()
+        for config in reversed(configs):
+            cursor.execute(f"DROP TABLE IF EXISTS {_identificador_sql(_nome_tabela(config['nome_arquivo']))}")
+        self.conexao.commit()
+
+    def carregar(self, config, lotes, chaves_geradas=None):
+        """Cria a tabela do arquivo e insere os lotes; em caso de erro, nada do arquivo é confirmado."""
+        tipos = _tipos_colunas(config, chaves_geradas)
+        colunas = ', '.join(_identificador_sql(campo['nome']) for campo in config['campos'])
+        marcadores = ', '.join(self.marcador.format(i + 1) for i in range(len(tipos)))
+        insercao = (f"INSERT INTO {_identificador_sql(_nome_tabela(config['nome_arquivo']))} ({colunas}) "
+                    f"VALUES ({marcadores})")
+        normalizar = _normalizador_sql(config, tipos)
+        cursor = self.conexao.cursor()
+        try:
+            cursor.execute(self._criar_tabela(config, tipos))
+            for lote in lotes: cursor.executemany(insercao, normalizar(lote) if normalizar else lote)
+            self.conexao.commit()
+        except BaseException:
+            self.conexao.rollback()
+            raise
+
+    def _criar_tabela(self, config, tipos):
+        num_pks = sum(1 for campo in config['campos'] if campo.get('e_pk'))
+        definicoes = []
+        for campo, tipo in zip(config['campos'], tipos):
+            definicao = f"{_identificador_sql(campo['nome'])} {self.tipos_sql[tipo]}"
+            if campo.get('e_pk'): definicao += ' PRIMARY KEY' if num_pks == 1 else ' UNIQUE'
+            if campo['tipo'] == 'chave_estrangeira':
+                definicao += (f" REFERENCES {_identificador_sql(_nome_tabela(campo['fk_arquivo']))}"
+                              f" ({_identificador_sql(campo['fk_campo'])})")
+            definicoes.append(definicao)
+        criar = 'CREATE TABLE' if self.recriar else 'CREATE TABLE IF NOT EXISTS'
+        return f"{criar} {_identificador_sql(_nome_tabela(config['nome_arquivo']))} ({', '.join(definicoes)})"
+
+    def close(self):
+        self.conexao.close()
+
+
+def _normalizador_sql(config, tipos):
+    """Função que troca '' por NULL nas colunas tipadas com regra condicional, ou None se não houver nenhuma."""
+    indices = [i for i, (campo, tipo) in enumerate(zip(config['campos'], tipos))
+               if tipo != 'string' and campo.get('condicional')]
+    if not indices: return None
+
+    def _normalizar(lote):
+        linhas = []
+        for linha in lote:
+            linha = list(linha)
+            for i in indices:
+                if linha[i] == '': linha[i] = None
+            linhas.append(linha)
+        return linhas
+    return _normalizar
+
+
+def nome_arquivo_final(nome_arquivo, formato='csv', compressao=None):
+    extensao = EXTENSOES_FORMATO[formato]
+    if compressao and formato not in FORMATOS_COLUNARES: extensao += EXTENSOES_COMPRESSAO[compressao]
+    return nome_arquivo if nome_arquivo.lower().endswith(extensao) else nome_arquivo + extensao
+
+
+@contextlib.contextmanager
+def _caminho_de_saida(config):
+    """Caminho temporário do arquivo de saída, renomeado para o nome final só ao término (sem arquivos parciais)."""
+    arquivo_final = nome_arquivo_final(config['nome_arquivo'], config.get('formato', 'csv'), config.get('compressao'))
+    arquivo_temporario = arquivo_final + '.parcial'
+    try:
+        yield arquivo_temporario
+        os.replace(arquivo_temporario, arquivo_final)
+    finally:
+        if os.path.exists(arquivo_temporario): os.remove(arquivo_temporario)
+
+
+@contextlib.contextmanager
+def _arquivo_de_saida(config):
+    """Abre o arquivo texto (CSV/COPY) de saída por um temporário, comprimido se houver a chave `compressao`."""
+    with _caminho_de_saida(config) as caminho:
+        if not config.get('compressao'):
+            with open(caminho, 'w', newline='', encoding=config['codificacao']) as file: yield file
+            return
+        fluxo = io.BufferedWriter(_FluxoComprimido(caminho, config['compressao']), TAMANHO_BLOCO_COMPRESSAO)
+        with io.TextIOWrapper(fluxo, encoding=config['codificacao'], newline='') as file: yield file
+
+
+class _FluxoComprimido(io.RawIOBase):
+    """Fluxo binário que comprime (gzip, bz2, xz ou zstd) e grava em uma thread separada; `tell` conta os bytes
+    recebidos, antes da compressão."""
+
+    def __init__(self, caminho, compressao):
+        self.destino = open(caminho, 'wb')
+        # Gzip sem data nem nome no cabeçalho: a mesma semente gera o mesmo arquivo
+        if compressao == 'gzip': self.compressor = gzip.GzipFile(filename='', mode='wb', fileobj=self.destino,
+                                                                 compresslevel=6, mtime=0)
+        elif compressao == 'bz2': self.compressor = bz2.BZ2File(self.destino, 'wb')
+        elif compressao == 'xz': self.compressor = lzma.LZMAFile(self.destino, 'wb')
+        else: self.compressor = zstandard.ZstdCompressor().stream_writer(self.destino, closefd=False)
+        self.fila, self.recebidos, self.erro = queue.Queue(maxsize=BLOCOS_EM_COMPRESSAO), 0, None
+        self.thread = threading.Thread(target=self._comprimir, name='massbuilder-compressao', daemon=True)
+        self.thread.start()
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        if self.erro is not None: raise self.erro
+        dados = bytes(dados)  # O BufferedWriter reutiliza o buffer recebido
+        self.fila.put(dados)
+        self.recebidos += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self.recebidos
+
+    def _comprimir(self):
+        try:
+            while (dados := self.fila.get()) is not None: self.compressor.write(dados)
+        except BaseException as e:
+            self.erro = e
+            while self.fila.get() is not None: pass  # Libera quem ainda estiver escrevendo
+
+    def close(self):
+        if self.closed: return
+        try:
+            self.fila.put(None)
+            self.thread.join()
+            self.compressor.close()
+        finally:
+            self.destino.close()
+            super().close()
+        if self.erro is not None: raise self.erro
+
+
+def escrever_saida(config, cabecalho, lotes, chaves_geradas, progresso=None):
+    """Grava os lotes no formato do arquivo (chave `formato`: 'csv', 'copy', 'parquet' ou 'arrow')."""
+    formato = config.get('formato', 'csv')
+    if formato not in FORMATOS_COLUNARES: return _escrever_texto(config, cabecalho, lotes, chaves_geradas, progresso)
+    with _caminho_de_saida(config) as caminho, _EscritorColunar(
+            caminho, formato, _esquema_arrow(config, chaves_geradas), config.get('compressao'),
+            config.get('linhas_por_grupo') or LINHAS_POR_GRUPO_PARQUET) as escritor:
+        _gravar_lotes_colunares(escritor, lotes, config['nome_arquivo'], progresso)
+
+
+def _escrever_texto(config, cabecalho, lotes, chaves_geradas=None, progresso=None):
+    """Grava o cabeçalho (apenas no CSV) e cada lote assim que é produzido."""
+    with _arquivo_de_saida(config) as file:
+        writer = _criar_escritor_texto(config, file, chaves_geradas)
+        if config.get('formato', 'csv') == 'csv': writer.writerow(cabecalho)
+        _gravar_lotes(file, writer, lotes, config['nome_arquivo'], progresso)
+
+
+def _criar_escritor_texto(config, file, chaves_geradas=None):
+    if config.get('formato', 'csv') == 'copy': return _EscritorCopy(file, _tipos_colunas(config, chaves_geradas))
+    return csv.writer(file, delimiter=config['separador'])
+
+
+class _EscritorCopy:
+    """Grava linhas no formato texto do COPY do PostgreSQL (nulos como \\N, textos escapados), como um `csv.writer`."""
+    ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+    def __init__(self, file, tipos):
+        self.file = file
+        self.formatadores = [self._formatador(tipo) for tipo in tipos]
+
+    @classmethod
+    def _formatador(cls, tipo):
+        if tipo == 'string':
+            escapes = cls.ESCAPES
+            return lambda v: '\\N' if v is None else (v if type(v) is str else str(v)).translate(escapes)
+        if tipo == 'boolean':
+            return lambda v: '\\N' if v is None or v == '' else 't' if v is True else 'f' if v is False else str(v)
+        return lambda v: '\\N' if v is None or v == '' else str(v)
+
+    def writerows(self, linhas):
+        formatadores = self.formatadores
+        self.file.write(''.join(['\t'.join([formatar(valor) for formatar, valor in zip(formatadores, linha)]) + '\n'
+                                 for linha in linhas]))
+
+
+def _gravar_lotes(file, writer, lotes, nome_arquivo, progresso=None):
+    """Grava os lotes, informando ao `progresso` (se houver) os bytes gravados a cada lote."""
+    if progresso is None:
+        for lote in lotes: writer.writerows(lote)
+        return
+    gravados = file.buffer.tell()
+    for lote in lotes:
+        writer.writerows(lote)
+        posicao = file.buffer.tell()
+        progresso.registrar(nome_arquivo, bytes_gravados=posicao - gravados)
+        gravados = posicao
+
+
+def _gravar_lotes_colunares(escritor, lotes, nome_arquivo, progresso=None):
+    """Equivalente a `_gravar_lotes` para um `_EscritorColunar`."""
+    gravados = escritor.bytes_gravados()
+    for lote in lotes:
+        escritor.escrever_lote(lote)
+        if progresso is None: continue
+        posicao = escritor.bytes_gravados()
+        progresso.registrar(nome_arquivo, bytes_gravados=posicao - gravados)
+        gravados = posicao
+
+
+def escrever_fatia(config, caminho_fatia, lotes, chaves_geradas=None, progresso=None):
+    """Grava as linhas de uma fatia sem cabeçalho; em Parquet/Arrow, como um Arrow IPC sem compressão."""
+    if config.get('formato', 'csv') not in FORMATOS_COLUNARES:
+        with open(caminho_fatia, 'w', newline='', encoding=config['codificacao']) as file:
+            _gravar_lotes(file, _criar_escritor_texto(config, file, chaves_geradas), lotes, config['nome_arquivo'],
+                          progresso)
+        return
+    with _EscritorColunar(caminho_fatia, 'arrow', _esquema_arrow(config, chaves_geradas)) as escritor:
+        _gravar_lotes_colunares(escritor, lotes, config['nome_arquivo'], progresso)
+
+
+def concatenar_fatias(config, caminhos_fatias):
+    """Junta as fatias, na ordem, no arquivo final, com um único cabeçalho (e BOM) ou os mesmos row groups."""
+    formato = config.get('formato', 'csv')
+    if formato in FORMATOS_COLUNARES:
+        with pa.memory_map(caminhos_fatias[0]) as fonte: esquema = pa.ipc.open_file(fonte).schema
+        with _caminho_de_saida(config) as caminho, _EscritorColunar(
+                caminho, formato, esquema, config.get('compressao'),
+                config.get('linhas_por_grupo') or LINHAS_POR_GRUPO_PARQUET) as escritor:
+            for caminho_fatia in caminhos_fatias:
+                with pa.memory_map(caminho_fatia) as fonte:
+                    leitor = pa.ipc.open_file(fonte)
+                    for i in range(leitor.num_record_batches): escritor.escrever_batch(leitor.get_batch(i))
+        return
+    tamanho_bom = len(codecs.getincrementalencoder(config['codificacao'])().encode(''))
+    with _arquivo_de_saida(config) as file:
+        if formato == 'csv':
+            csv.writer(file, delimiter=config['separador']).writerow([c['nome'] for c in config['campos']])
+        file.flush()
+        for i, caminho in enumerate(caminhos_fatias):
+            with open(caminho, 'rb') as fatia:
+                fatia.seek(tamanho_bom if formato == 'csv' or i else 0)  # Sem cabeçalho, o BOM vem da 1ª fatia
+                shutil.copyfileobj(fatia, file.buffer)
+
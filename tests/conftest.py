@@ -0,0 +1,30 @@
+# tests/conftest.py
+# Configuração comum dos testes: importa os módulos da raiz do repositório e grava as saídas em pastas temporárias
+
+import csv
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def arquivo(nome, num_linhas, campos, **extras):
+    """Configuração de um arquivo CSV no formato de `config_to_load.json`."""
+    return dict({'nome_arquivo': nome, 'num_linhas': num_linhas, 'separador': ',', 'codificacao': 'utf-8',
+                 'campos': campos, 'regras_sort': [], 'constraint_unicidade': []}, **extras)
+
+
+def ler_csv(caminho):
+    """Retorna (cabeçalho, linhas) de um CSV gerado."""
+    with open(caminho, newline='', encoding='utf-8') as f:
+        cabecalho, *linhas = list(csv.reader(f))
+    return cabecalho, linhas
+
+
+@pytest.fixture
+def pasta_saida(tmp_path, monkeypatch):
+    """Os nomes dos arquivos da sessão são relativos: cada teste gera dentro da sua pasta temporária."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
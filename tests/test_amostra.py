@@ -0,0 +1,53 @@
+# tests/test_amostra.py
+# Pré-visualização (`gerar_amostra`): mesmas linhas da geração, cache por coluna e semente da sessão.
+
+from conftest import arquivo, ler_csv
+from data_generator import gerar_amostra, generate_from_config
+
+
+def _config():
+    return arquivo('A', 500, [
+        {'nome': 'ID', 'tipo': 'integer', 'e_pk': True, 'limite': ['1', '100000']},
+        {'nome': 'TIPO', 'tipo': 'lista_opcoes', 'opcoes': ['PF', 'PJ']},
+        {'nome': 'DOC', 'tipo': 'regex', 'regex_pattern': '\\d{3}',
+         'condicional': {'campo_ref': 'TIPO', 'operador': 'é igual a', 'valor_ref': 'PJ',
+                         'acao_verdadeiro': {'tipo': 'regex', 'regex_pattern': '[A-Z]{4}'},
+                         'acao_falso': {'tipo': 'Usar Geração Padrão'}}},
+        {'nome': 'DATA', 'tipo': 'datetime', 'repeticao': 3, 'limite': ['2020-01-01', '2020-12-31']}])
+
+
+def test_amostra_igual_as_primeiras_linhas_geradas(pasta_saida):
+    generate_from_config({'semente': 99, 'arquivos': [_config()]})
+    cabecalho, linhas = ler_csv('A.csv')
+    cabecalho_amostra, amostra = gerar_amostra(_config(), semente_sessao=99)
+    assert cabecalho_amostra == cabecalho
+    assert [[str(valor) for valor in linha] for linha in amostra] == linhas[:len(amostra)]
+
+
+def test_cache_regenera_so_a_coluna_alterada_e_dependentes():
+    cache = {}
+    gerar_amostra(_config(), cache=cache)
+    anteriores = {chave: valores for chave, (_, valores) in cache.items()}
+    config = _config()
+    config['campos'][1]['opcoes'] = ['PJ']  # DOC depende de TIPO
+    gerar_amostra(config, cache=cache)
+    reaproveitadas = {chave[1] for chave, (_, valores) in cache.items() if valores is anteriores[chave]}
+    assert reaproveitadas == {'ID', 'DATA'}
+
+
+def test_semente_da_sessao_invalida_o_cache():
+    cache = {}
+    _, com_semente_1 = gerar_amostra(_config(), semente_sessao=1, cache=cache)
+    _, com_semente_2 = gerar_amostra(_config(), semente_sessao=2, cache=cache)
+    assert com_semente_1 != com_semente_2
+    assert gerar_amostra(_config(), semente_sessao=2)[1] == com_semente_2
+
+
+def test_fk_usa_chaves_amostradas_do_pai():
+    pai = arquivo('PAI', 1000, [{'nome': 'ID', 'tipo': 'integer', 'e_pk': True, 'limite': ['1', '5000']}])
+    filho = arquivo('FILHO', 100, [{'nome': 'PAI_ID', 'tipo': 'chave_estrangeira', 'fk_arquivo': 'PAI',
+                                    'fk_campo': 'ID', 'cardinalidade': 'Um-para-Um (1:1)'}])
+    _, amostra_pai = gerar_amostra(pai)
+    _, amostra_filho = gerar_amostra(filho, [pai])
+    chaves = [linha[0] for linha in amostra_filho]
+    assert len(set(chaves)) == len(chaves) and set(chaves) <= {linha[0] for linha in amostra_pai}
@@ -0,0 +1,76 @@
+# tests/test_banco.py
+# Carga direta em banco (sqlite3) e formato texto do COPY do PostgreSQL: mesmos valores do CSV, PKs, FKs e escapes.
+
+import json
+import sqlite3
+
+import massbuilder
+from conftest import arquivo, ler_csv
+from data_generator import generate_from_config
+
+
+def _sessao(**extras):
+    return dict({'semente': 6, 'arquivos': [
+        arquivo('A', 300, [
+            {'nome': 'ID', 'tipo': 'integer', 'e_pk': True, 'limite': ['1', '100000']},
+            {'nome': 'VALOR', 'tipo': 'float', 'limite': ['0', '100']},
+            {'nome': 'NOME', 'tipo': 'nome_pessoa'},
+            {'nome': 'ATIVO', 'tipo': 'boolean'}]),
+        arquivo('B', 200, [{'nome': 'A_ID', 'tipo': 'chave_estrangeira', 'fk_arquivo': 'A', 'fk_campo': 'ID',
+                            'cardinalidade': 'Um-para-Muitos (1:N)'}])]}, **extras)
+
+
+def test_carga_sqlite_igual_ao_csv(pasta_saida):
+    generate_from_config(_sessao())
+    _, linhas = ler_csv('A.csv')
+    _, linhas_b = ler_csv('B.csv')
+    for _ in range(2):  # Com 'recriar' (padrão), a segunda carga substitui a primeira
+        generate_from_config(_sessao(banco={'conexao': {'database': str(pasta_saida / 'massa.db')}}))
+    with sqlite3.connect(pasta_saida / 'massa.db') as conexao:
+        carregadas = conexao.execute('SELECT ID, VALOR, NOME, ATIVO FROM A').fetchall()  # ID é o rowid: outra ordem
+        assert sorted([str(i), str(v), n, str(bool(a))] for i, v, n, a in carregadas) == sorted(linhas)
+        assert conexao.execute('SELECT A_ID FROM B ORDER BY rowid').fetchall() == [(int(l[0]),) for l in linhas_b]
+        assert [coluna[1] for coluna in conexao.execute("PRAGMA table_info('A')") if coluna[5]] == ['ID']
+        chaves_estrangeiras = [(fk[2], fk[3], fk[4]) for fk in conexao.execute("PRAGMA foreign_key_list('B')")]
+        assert chaves_estrangeiras == [('A', 'A_ID', 'ID')]
+
+
+def test_opcao_sqlite_da_linha_de_comando(pasta_saida):
+    (pasta_saida / 'sessao.json').write_text(json.dumps(_sessao()), encoding='utf-8')
+    assert massbuilder.main(['generate', str(pasta_saida / 'sessao.json'), '--sqlite', 'cli.db']) == 0
+    assert sorted(p.name for p in pasta_saida.iterdir()) == ['cli.db', 'sessao.json']  # Nenhum arquivo gravado
+    with sqlite3.connect(pasta_saida / 'cli.db') as conexao:
+        assert conexao.execute('SELECT COUNT(*) FROM A').fetchone() == (300,)
+
+
+def _ler_copy(caminho):
+    """Desfaz os escapes do formato texto do COPY (\\N é nulo)."""
+    escapes = {'\\\\': '\\', '\\t': '\t', '\\n': '\n', '\\r': '\r'}
+    with open(caminho, encoding='utf-8', newline='') as f:
+        linhas = f.read().split('\n')[:-1]
+    decodificar = lambda campo: None if campo == '\\N' else ''.join(
+        escapes.get(parte, parte) for parte in _partes_escapadas(campo))
+    return [[decodificar(campo) for campo in linha.split('\t')] for linha in linhas]
+
+
+def _partes_escapadas(campo):
+    i = 0
+    while i < len(campo):
+        tamanho = 2 if campo[i] == '\\' else 1
+        yield campo[i:i + tamanho]
+        i += tamanho
+
+
+def test_copy_escapa_textos_e_grava_nulos(pasta_saida):
+    texto = 'a\tb\\c\nd\\N'
+    generate_from_config({'semente': 2, 'arquivos': [arquivo('C', 50, [
+        {'nome': 'TXT', 'tipo': 'Valor Fixo', 'valor_fixo': texto},
+        {'nome': 'ATIVO', 'tipo': 'boolean'},
+        {'nome': 'N', 'tipo': 'integer', 'limite': ['1', '9'],
+         'condicional': {'campo_ref': 'ATIVO', 'operador': 'é igual a', 'valor_ref': 'True',
+                         'acao_verdadeiro': {'tipo': 'Nulo/Vazio'}, 'acao_falso': {'tipo': 'Usar Geração Padrão'}}}],
+        formato='copy')]})
+    linhas = _ler_copy('C.copy')
+    assert len(linhas) == 50 and all(linha[0] == texto for linha in linhas)
+    assert {linha[1] for linha in linhas} == {'t', 'f'}
+    assert all((linha[2] is None) == (linha[1] == 't') for linha in linhas)
@@ -0,0 +1,58 @@
+# tests/test_chaves.py
+# Chaves primárias em `ColunaChaves` e FKs 1:N resolvidas em blocos de índices sobre a coluna do arquivo pai.
+
+import random
+
+import pytest
+
+import data_generator
+from conftest import arquivo, ler_csv
+from data_generator import ColunaChaves, generate_from_config
+
+
+@pytest.mark.parametrize('valores, tipo', [
+    ([3, -7, 2 ** 63 - 1], 'int'),
+    ([1.5, -2.25], 'float'),
+    (['ação', '', 'x' * 300], 'str'),
+    ([1, 'a', None], 'lista'),
+    ([1, 2 ** 64], 'lista'),  # Fora do int64
+])
+def test_coluna_guarda_os_valores_de_forma_compacta(valores, tipo):
+    coluna = ColunaChaves(valores)
+    assert coluna.tipo == tipo
+    assert list(coluna) == valores and coluna[-1] == valores[-1] and len(coluna) == len(valores)
+
+
+def test_coluna_muda_para_lista_ao_receber_outro_tipo():
+    coluna = ColunaChaves([1, 2])
+    coluna.extend(['3'])
+    assert coluna.tipo == 'lista' and list(coluna) == [1, 2, '3']
+
+
+@pytest.mark.parametrize('com_numpy', [True, False])
+@pytest.mark.parametrize('valores', [[10, 20, 30, 40], [0.5, 1.5, 2.5, 3.5], ['a', 'bb', 'ccc', 'dddd']])
+def test_obter_em_lote_com_e_sem_numpy(monkeypatch, com_numpy, valores):
+    if com_numpy:
+        np = pytest.importorskip('numpy')
+        indices = np.array([3, 0, 3, 1])
+    else:
+        monkeypatch.setattr(data_generator, 'np', None)
+        indices = [3, 0, 3, 1]
+    resultado = ColunaChaves(valores).obter_em_lote(indices)
+    assert resultado == [valores[3], valores[0], valores[3], valores[1]]
+    assert all(type(valor) is type(valores[0]) for valor in resultado)
+
+
+def test_random_choice_sobre_a_coluna():
+    coluna = ColunaChaves(['x', 'y', 'z'])
+    assert {random.Random(i).choice(coluna) for i in range(50)} == {'x', 'y', 'z'}
+
+
+def test_fk_1n_sorteia_chaves_do_pai(pasta_saida):
+    generate_from_config({'semente': 8, 'arquivos': [
+        arquivo('PAI', 500, [{'nome': 'ID', 'tipo': 'regex', 'e_pk': True, 'regex_pattern': 'P[0-9]{5}'}]),
+        arquivo('FILHO', 20000, [{'nome': 'PAI_ID', 'tipo': 'chave_estrangeira', 'fk_arquivo': 'PAI',
+                                  'fk_campo': 'ID', 'cardinalidade': 'Um-para-Muitos (1:N)'}])]})
+    _, pais = ler_csv('PAI.csv')
+    _, filhos = ler_csv('FILHO.csv')
+    assert {linha[0] for linha in filhos} == {linha[0] for linha in pais}  # 40 filhos por pai: todos aparecem
@@ -0,0 +1,72 @@
+# tests/test_colunar.py
+# Motor colunar: mesmas colunas não vetorizáveis do motor linha a linha, valores dentro dos limites e reprodutível.
+
+import datetime
+import json
+import uuid
+
+import pytest
+
+import massbuilder
+from conftest import arquivo, ler_csv
+from data_generator import generate_from_config
+
+pytest.importorskip('numpy')
+
+
+def _sessao(motor, workers=1):
+    return {'semente': 21, 'motor': motor, 'workers': workers, 'arquivos': [arquivo('A', 3000, [
+        {'nome': 'ID', 'tipo': 'integer', 'e_pk': True, 'limite': ['1', '100000']},
+        {'nome': 'TEXTO', 'tipo': 'string', 'limite': ['2', '6']},
+        {'nome': 'NOME', 'tipo': 'nome_pessoa'},
+        {'nome': 'INT', 'tipo': 'integer', 'limite': ['-5', '5']},
+        {'nome': 'FLOAT', 'tipo': 'float', 'limite': ['1.5', '2.5']},
+        {'nome': 'BOOL', 'tipo': 'boolean'},
+        {'nome': 'DATA', 'tipo': 'datetime', 'limite': ['2024-02-01', '2024-02-29']},
+        {'nome': 'OPCAO', 'tipo': 'lista_opcoes', 'opcoes': ['a', 'b', 'c']},
+        {'nome': 'UUID', 'tipo': 'uuid'},
+        {'nome': 'COD', 'tipo': 'regex', 'regex_pattern': '[A-F]{2}\\d{3}'},
+        {'nome': 'REP', 'tipo': 'integer', 'repeticao': 4, 'limite': ['1', '1000000']}])]}
+
+
+def test_colunas_nao_vetorizaveis_iguais_ao_motor_linha(pasta_saida):
+    generate_from_config(_sessao('linha'))
+    cabecalho, por_linha = ler_csv('A.csv')
+    generate_from_config(_sessao('colunar'))
+    _, colunar = ler_csv('A.csv')
+    for nome in ('ID', 'TEXTO', 'NOME'):  # PK, string e nome seguem pelo motor linha a linha com a mesma semente
+        i = cabecalho.index(nome)
+        assert [linha[i] for linha in colunar] == [linha[i] for linha in por_linha]
+
+
+def test_valores_vetorizados_respeitam_os_parametros(pasta_saida):
+    generate_from_config(_sessao('colunar'))
+    cabecalho, linhas = ler_csv('A.csv')
+    colunas = dict(zip(cabecalho, zip(*linhas)))
+    assert len(linhas) == 3000
+    assert {int(v) for v in colunas['INT']} == set(range(-5, 6))
+    assert all(1.5 <= float(v) <= 2.5 for v in colunas['FLOAT'])
+    assert set(colunas['BOOL']) == {'True', 'False'} and set(colunas['OPCAO']) == {'a', 'b', 'c'}
+    datas = {datetime.date.fromisoformat(v[:10]) for v in colunas['DATA']}
+    assert min(datas) >= datetime.date(2024, 2, 1) and max(datas) <= datetime.date(2024, 2, 29)
+    assert all(uuid.UUID(v).version == 4 for v in colunas['UUID']) and len(set(colunas['UUID'])) == 3000
+    assert all(len(v) == 5 and v[:2] <= 'FF' and v[2:].isdigit() for v in colunas['COD'])
+    repeticoes = colunas['REP']
+    assert all(len(set(repeticoes[i:i + 4])) == 1 for i in range(0, 3000, 4))
+
+
+def test_colunar_reprodutivel_em_serie_e_em_paralelo(pasta_saida):
+    generate_from_config(_sessao('colunar'))
+    primeira = ler_csv('A.csv')
+    generate_from_config(_sessao('colunar', workers=2))
+    assert ler_csv('A.csv') == primeira
+
+
+def test_opcao_engine_da_linha_de_comando(pasta_saida):
+    sessao = _sessao('linha')
+    (pasta_saida / 'sessao.json').write_text(json.dumps(sessao), encoding='utf-8')
+    assert massbuilder.main(['generate', str(pasta_saida / 'sessao.json'), '--engine', 'colunar',
+                             '-o', str(pasta_saida / 'cli')]) == 0
+    pela_linha_de_comando = ler_csv(pasta_saida / 'cli' / 'A.csv')
+    generate_from_config(_sessao('colunar'))
+    assert ler_csv('A.csv') == pela_linha_de_comando
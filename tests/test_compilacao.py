@@ -0,0 +1,101 @@
+# tests/test_compilacao.py
+# Geradores compilados por campo (`compilar_valor_atomico`) e saída fixa por semente, que refatorações não mudam.
+
+import hashlib
+import json
+import os
+import random
+
+import pytest
+
+from conftest import arquivo
+from data_generator import compilar_valor_atomico, generate_from_config
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# SHA-256 dos arquivos gerados com as sessões abaixo; só mudam quando a forma de sortear muda de propósito
+SAIDAS_ESPERADAS = {
+    'exemplo': {
+        'CONTATOS.csv': '8899dbc12fc8eb48bf14d0808f7a7f9c9c1ab490c86b221f031e10406968f90f',
+        'PEDIDO.csv': '86e6f806b360465f33f74551a05a3321b69126f5d3a697c6adc1de0614ffbeda',
+        'PESSOA.csv': '1f77f5a3aea3f5b86d7014162c453026e95d95a248467821d8660c886b0342f9',
+    },
+    'completa': {
+        'CARTAO.csv': '79b263727fce78a073d567790385bf93221bd5001774cf4f2a7e8a0699723ee8',
+        'CLIENTE.csv': '7096d8b91b87699f3791d7d7fcad386495b1c174df3ed49536a0607a5ba5f16d',
+        'PEDIDO.csv': '4a92555ab4c545192a8a00ff8627d1a83bf59f26b686a6cd99ae644f531da7a3',
+    },
+}
+
+
+def _sessao_completa():
+    """Um pouco de cada recurso do motor linha a linha: tipos, unicidade, FKs, condicionais e ordenação."""
+    casos = {'casos': [
+        {'condicao': {'e': [{'campo_ref': 'TIPO', 'operador': 'é igual a', 'valor_ref': 'PJ'},
+                            {'campo_ref': 'VALOR', 'operador': '>', 'valor_ref': '500'}]},
+         'acao': {'tipo': 'regex', 'regex_pattern': '\\d{2}\\.\\d{3}\\.\\d{3}/0001-\\d{2}'}},
+        {'condicao': {'campo_ref': 'TIPO', 'operador': 'é igual a', 'valor_ref': 'PF'},
+         'acao': {'tipo': 'Valor Fixo', 'valor_fixo': 'CPF'}}],
+        'senao': {'tipo': 'Nulo/Vazio'}}
+    return {'semente': 2024, 'arquivos': [
+        arquivo('CLIENTE', 3000, [
+            {'nome': 'ID', 'tipo': 'integer', 'e_pk': True, 'limite': ['1', '1000000']},
+            {'nome': 'NOME', 'tipo': 'nome_pessoa'},
+            {'nome': 'TIPO', 'tipo': 'lista_opcoes', 'opcoes': ['PF', 'PJ']},
+            {'nome': 'VALOR', 'tipo': 'float', 'limite': ['0', '1000']},
+            {'nome': 'DOC', 'tipo': 'string', 'limite': ['1', '3'], 'condicional': casos},
+            {'nome': 'EMAIL', 'tipo': 'regex', 'regex_pattern': '[a-z]{3,8}@(gmail|hotmail)\\.com'},
+            {'nome': 'DESDE', 'tipo': 'datetime', 'repeticao': 3, 'limite': ['2000-01-01', '2024-12-31']},
+            {'nome': 'ATIVO', 'tipo': 'boolean'},
+            {'nome': 'CHAVE', 'tipo': 'uuid'}],
+            regras_sort=[{'campo': 'TIPO', 'ordem': 'Descendente'}, {'campo': 'VALOR', 'ordem': 'Ascendente'}]),
+        arquivo('PEDIDO', 4000, [
+            {'nome': 'CLIENTE_ID', 'tipo': 'chave_estrangeira', 'fk_arquivo': 'CLIENTE', 'fk_campo': 'ID',
+             'cardinalidade': 'Um-para-Muitos (1:N)'},
+            {'nome': 'ITEM', 'tipo': 'integer', 'limite': ['1', '50']},
+            {'nome': 'LOJA', 'tipo': 'lista_opcoes', 'opcoes': ['A', 'B', 'C', 'D']}],
+            constraint_unicidade=['CLIENTE_ID', 'ITEM', 'LOJA']),
+        arquivo('CARTAO', 2000, [
+            {'nome': 'CLIENTE_ID', 'tipo': 'chave_estrangeira', 'fk_arquivo': 'CLIENTE', 'fk_campo': 'ID',
+             'cardinalidade': 'Um-para-Um (1:1)'},
+            {'nome': 'NUMERO', 'tipo': 'regex', 'repeticao': 1, 'regex_pattern': '\\d{4} \\d{4} \\d{4} \\d{4}'}])]}
+
+
+def _sessao_exemplo():
+    with open(os.path.join(RAIZ, 'config_to_load.json'), encoding='utf-8') as f:
+        return dict(json.load(f), semente=2024)
+
+
+@pytest.mark.parametrize('nome, sessao', [('exemplo', _sessao_exemplo), ('completa', _sessao_completa)])
+def test_saida_fixa_por_semente(pasta_saida, nome, sessao):
+    generate_from_config(sessao())
+    obtidas = {arquivo: hashlib.sha256((pasta_saida / arquivo).read_bytes()).hexdigest()
+               for arquivo in sorted(os.listdir(pasta_saida))}
+    assert obtidas == SAIDAS_ESPERADAS[nome]
+
+
+@pytest.mark.parametrize('campo, valido', [
+    ({'tipo': 'integer', 'limite': ['3', '7']}, lambda v: 3 <= v <= 7),
+    ({'tipo': 'float', 'limite': ['0.5', '0.75']}, lambda v: 0.5 <= v <= 0.75 and round(v, 2) == v),
+    ({'tipo': 'string', 'limite': ['2', '4']}, lambda v: 2 <= len(v) <= 4 and v.isalnum()),
+    ({'tipo': 'datetime', 'limite': ['2024-01-30', '2024-02-02']},
+     lambda v: '2024-01-30' <= str(v)[:10] <= '2024-02-02'),
+    ({'tipo': 'lista_opcoes', 'opcoes': ['x', 'y']}, lambda v: v in ('x', 'y')),
+    ({'tipo': 'Valor Fixo', 'valor_fixo': 'K'}, lambda v: v == 'K'),
+    ({'tipo': 'Nulo/Vazio'}, lambda v: v == ''),
+])
+def test_valores_compilados_respeitam_os_parametros(campo, valido):
+    gerar_valor = compilar_valor_atomico(dict(campo, nome='C'), rng=random.Random(1))
+    assert all(valido(gerar_valor()) for _ in range(500))
+
+
+def test_mesmo_rng_mesmos_valores():
+    campo = {'nome': 'C', 'tipo': 'string', 'limite': ['1', '10']}
+    gerar_1, gerar_2 = (compilar_valor_atomico(campo, rng=random.Random(5)) for _ in range(2))
+    assert [gerar_1() for _ in range(100)] == [gerar_2() for _ in range(100)]
+
+
+def test_erro_de_parametro_so_ao_gerar():
+    gerar_valor = compilar_valor_atomico({'nome': 'C', 'tipo': 'integer', 'limite': ['a', '2']})
+    with pytest.raises(ValueError, match="Parâmetro inválido ou ausente para o campo 'C'"):
+        gerar_valor()
@@ -0,0 +1,50 @@
+# tests/test_compressao.py
+# Compressão dos arquivos texto: o arquivo descomprimido é idêntico ao gerado sem compressão, também em paralelo.
+
+import bz2
+import gzip
+import lzma
+
+import pytest
+
+import data_generator
+from conftest import arquivo
+from data_generator import generate_from_config
+
+
+def _descomprimir_zstd(dados):
+    zstandard = pytest.importorskip('zstandard')
+    return zstandard.ZstdDecompressor().stream_reader(dados).read()
+
+
+DESCOMPRIMIR = {'gzip': gzip.decompress, 'bz2': bz2.decompress, 'xz': lzma.decompress, 'zstd': _descomprimir_zstd}
+EXTENSOES = {'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz', 'zstd': '.zst'}
+
+
+def _gerar(num_linhas, workers=1, **extras):
+    generate_from_config({'semente': 12, 'workers': workers, 'arquivos': [arquivo('A', num_linhas, [
+        {'nome': 'N', 'tipo': 'integer', 'limite': ['1', '1000']},
+        {'nome': 'TXT', 'tipo': 'string', 'limite': ['0', '12']},
+        {'nome': 'B', 'tipo': 'boolean'}], codificacao='utf-8-sig', **extras)]})
+
+
+@pytest.mark.parametrize('formato', ['csv', 'copy'])
+@pytest.mark.parametrize('compressao', list(DESCOMPRIMIR))
+def test_descomprimido_igual_ao_texto(pasta_saida, formato, compressao):
+    _gerar(5000, formato=formato)
+    texto = (pasta_saida / f'A.{formato}').read_bytes()
+    _gerar(5000, formato=formato, compressao=compressao)
+    comprimido = (pasta_saida / f'A.{formato}{EXTENSOES[compressao]}').read_bytes()
+    assert len(comprimido) < len(texto)
+    assert DESCOMPRIMIR[compressao](comprimido) == texto
+
+
+def test_gzip_reprodutivel_e_fatias_em_paralelo(pasta_saida):
+    num_linhas = 2 * data_generator.LINHAS_POR_FATIA + 1
+    _gerar(num_linhas)
+    texto = (pasta_saida / 'A.csv').read_bytes()
+    _gerar(num_linhas, compressao='gzip')
+    serial = (pasta_saida / 'A.csv.gz').read_bytes()
+    _gerar(num_linhas, workers=2, compressao='gzip')
+    assert (pasta_saida / 'A.csv.gz').read_bytes() == serial  # Sem data no cabeçalho do gzip
+    assert gzip.decompress(serial) == texto
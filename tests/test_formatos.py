@@ -0,0 +1,79 @@
+# tests/test_formatos.py
+# Formatos Parquet e Arrow: esquema tipado, mesmos valores do CSV e row groups de `linhas_por_grupo` linhas.
+
+import pytest
+
+import data_generator
+from conftest import arquivo, ler_csv
+from data_generator import generate_from_config
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+CAMPOS = [
+    {'nome': 'ID', 'tipo': 'integer', 'e_pk': True, 'limite': ['1', '100000']},
+    {'nome': 'VALOR', 'tipo': 'float', 'limite': ['0', '100']},
+    {'nome': 'ATIVO', 'tipo': 'boolean'},
+    {'nome': 'DATA', 'tipo': 'datetime', 'limite': ['2020-01-01', '2020-12-31']},
+    {'nome': 'NOME', 'tipo': 'nome_pessoa'},
+    {'nome': 'COD', 'tipo': 'integer', 'limite': ['1', '9'],  # Ação condicional de texto: a coluna vira texto
+     'condicional': {'campo_ref': 'ATIVO', 'operador': 'é igual a', 'valor_ref': 'True',
+                     'acao_verdadeiro': {'tipo': 'Valor Fixo', 'valor_fixo': 'sim'},
+                     'acao_falso': {'tipo': 'Usar Geração Padrão'}}},
+]
+
+
+def _gerar(num_linhas=3000, workers=1, **extras):
+    generate_from_config({'semente': 4, 'workers': workers, 'arquivos': [
+        arquivo('A', num_linhas, CAMPOS, **extras),
+        arquivo('B', 500, [{'nome': 'A_ID', 'tipo': 'chave_estrangeira', 'fk_arquivo': 'A', 'fk_campo': 'ID',
+                            'cardinalidade': 'Um-para-Muitos (1:N)'}], **extras)]})
+
+
+def _esquema_arrow(nome):
+    with pa.memory_map(nome) as fonte: return pa.ipc.open_file(fonte).schema
+
+
+def test_esquema_tipado(pasta_saida):
+    _gerar(formato='arrow')
+    assert _esquema_arrow('A.arrow') == pa.schema([
+        ('ID', pa.int64()), ('VALOR', pa.float64()), ('ATIVO', pa.bool_()), ('DATA', pa.timestamp('s')),
+        ('NOME', pa.string()), ('COD', pa.string())])
+    assert _esquema_arrow('B.arrow') == pa.schema([('A_ID', pa.int64())])
+    _gerar(formato='parquet')  # O Parquet não tem timestamps em segundos: a data é lida em milissegundos
+    assert pq.read_schema('A.parquet').field('DATA').type == pa.timestamp('ms')
+
+
+@pytest.mark.parametrize('formato, compressao', [('parquet', 'zstd'), ('arrow', 'lz4'), ('arrow', None)])
+def test_mesmos_valores_do_csv(pasta_saida, formato, compressao):
+    _gerar()
+    cabecalho, linhas = ler_csv('A.csv')
+    _gerar(formato=formato, compressao=compressao)
+    if formato == 'parquet':
+        tabela = pq.read_table('A.parquet')
+    else:
+        with pa.memory_map('A.arrow') as fonte: tabela = pa.ipc.open_file(fonte).read_all()
+    assert tabela.column_names == cabecalho
+    lidas = [[str(valor) for valor in linha.values()] for linha in tabela.to_pylist()]
+    assert lidas == linhas
+
+
+def test_row_groups_e_fatias(pasta_saida):
+    num_linhas = 2 * data_generator.LINHAS_POR_FATIA + 1
+    campos = [{'nome': 'N', 'tipo': 'integer', 'limite': ['1', '9']}]
+
+    def _tabela(workers):
+        generate_from_config({'semente': 4, 'workers': workers, 'arquivos': [
+            arquivo('A', num_linhas, campos, formato='parquet', linhas_por_grupo=30000)]})
+        return pq.ParquetFile('A.parquet')
+
+    serial = _tabela(1)
+    assert [serial.metadata.row_group(i).num_rows for i in range(serial.num_row_groups)] == [30000] * 3 + [10001]
+    assert _tabela(2).read() == serial.read()
+
+
+def test_formato_ou_compressao_invalidos(pasta_saida):
+    with pytest.raises(ValueError, match='Formato de saída desconhecido'):
+        _gerar(formato='xlsx')
+    with pytest.raises(ValueError, match="Compressão 'bz2' não suportada"):
+        _gerar(formato='parquet', compressao='bz2')
@@ -0,0 +1,55 @@
+# tests/test_linha_de_comando.py
+# Linha de comando (`massbuilder`): subcomandos generate e plan, seus códigos de saída e a ausência do tkinter.
+
+import json
+import os
+import subprocess
+import sys
+
+import massbuilder
+from conftest import arquivo, ler_csv
+from data_generator import generate_from_config
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _salvar(pasta, sessao):
+    caminho = pasta / 'sessao.json'
+    caminho.write_text(json.dumps(sessao), encoding='utf-8')
+    return str(caminho)
+
+
+def _sessao(limite_id='1000000'):
+    return {'arquivos': [arquivo('A', 400, [{'nome': 'ID', 'tipo': 'integer', 'e_pk': True, 'limite': ['1', limite_id]},
+                                            {'nome': 'TXT', 'tipo': 'string', 'limite': ['1', '5']}])]}
+
+
+def test_generate_com_semente_e_escala(pasta_saida, capsys):
+    sessao = _salvar(pasta_saida, _sessao())
+    assert massbuilder.main(['generate', sessao, '-o', str(pasta_saida / 'cli'), '--seed', '5', '--scale', '0.5']) == 0
+    assert 'A: 200 linhas' in capsys.readouterr().out
+    pela_linha_de_comando = ler_csv(pasta_saida / 'cli' / 'A.csv')
+    esperada = _sessao()
+    esperada['arquivos'][0]['num_linhas'] = 200
+    os.chdir(pasta_saida)
+    generate_from_config(dict(esperada, semente=5))
+    assert ler_csv('A.csv') == pela_linha_de_comando
+
+
+def test_plan_codigos_de_saida(pasta_saida, capsys):
+    assert massbuilder.main(['plan', _salvar(pasta_saida, _sessao())]) == 0
+    assert 'A: 400 linhas' in capsys.readouterr().out
+    assert massbuilder.main(['plan', _salvar(pasta_saida, _sessao(limite_id='100'))]) == 1
+    assert 'ERRO' in capsys.readouterr().out
+    assert massbuilder.main(['plan', str(pasta_saida / 'inexistente.json')]) == 2
+
+
+def test_generate_rejeita_sessao_impossivel(pasta_saida, capsys):
+    assert massbuilder.main(['generate', _salvar(pasta_saida, _sessao(limite_id='100'))]) == 1
+    assert 'A sessão não pode ser gerada' in capsys.readouterr().err
+    assert not os.path.exists(pasta_saida / 'A.csv')
+
+
+def test_nao_importa_tkinter():
+    codigo = "import sys, massbuilder; sys.exit('tkinter' in sys.modules)"
+    assert subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ).returncode == 0
@@ -0,0 +1,42 @@
+# tests/test_ordenacao.py
+# Ordenação por `regras_sort`: a externa (blocos em disco e k-way merge) produz o mesmo arquivo que a em memória.
+
+import pytest
+
+import data_generator
+from conftest import arquivo, ler_csv
+from data_generator import generate_from_config
+
+
+def _gerar(ordens, memoria_sort_mb):
+    generate_from_config({'semente': 11, 'arquivos': [arquivo('A', 20000, [
+        {'nome': 'GRUPO', 'tipo': 'lista_opcoes', 'opcoes': ['x', 'y', 'z']},  # Muitos empates
+        {'nome': 'VALOR', 'tipo': 'integer', 'limite': ['1', '50']},
+        {'nome': 'SEQ', 'tipo': 'integer', 'e_pk': True, 'limite': ['1', '1000000']}],
+        regras_sort=[{'campo': campo, 'ordem': ordem} for campo, ordem in zip(('GRUPO', 'VALOR'), ordens)],
+        memoria_sort_mb=memoria_sort_mb)]})
+    return ler_csv('A.csv')
+
+
+@pytest.mark.parametrize('ordens', [('Ascendente', 'Ascendente'), ('Descendente', 'Ascendente'),
+                                    ('Descendente', 'Descendente')])
+def test_ordenacao_externa_igual_a_em_memoria(pasta_saida, monkeypatch, ordens):
+    blocos_gravados = []
+    gravar_bloco = data_generator._gravar_bloco_ordenado
+    monkeypatch.setattr(data_generator, '_gravar_bloco_ordenado',
+                        lambda *args: blocos_gravados.append(args[1]) or gravar_bloco(*args))
+
+    em_memoria = _gerar(ordens, data_generator.MEMORIA_SORT_MB_PADRAO)
+    assert not blocos_gravados
+    externa = _gerar(ordens, 0.05)  # Alguns KB por bloco: força vários arquivos temporários e o k-way merge
+    assert len(blocos_gravados) > 1
+    assert externa == em_memoria
+
+
+@pytest.mark.parametrize('ordens', [('Ascendente', 'Ascendente'), ('Descendente', 'Ascendente')])
+def test_ordem_das_regras_e_estavel(pasta_saida, ordens):
+    _, linhas = _gerar(ordens, 0.05)
+    chaves = [(linha[0], int(linha[1])) for linha in linhas]
+    desc_grupo, desc_valor = (ordem == 'Descendente' for ordem in ordens)
+    assert chaves == sorted(sorted(chaves, key=lambda chave: chave[1], reverse=desc_valor),
+                            key=lambda chave: chave[0], reverse=desc_grupo)
@@ -0,0 +1,73 @@
+# tests/test_paralelo.py
+# Geração paralela: arquivos e fatias gerados em processos separados reproduzem os arquivos da geração em série.
+
+import itertools
+
+import pytest
+
+import data_generator
+from conftest import arquivo, ler_csv
+from data_generator import generate_from_config
+
+
+def _sessao_paralelizavel(workers):
+    """Sessão com um arquivo grande o bastante para ser fatiado e um arquivo filho com FKs 1:N e 1:1."""
+    pai = arquivo('PAI', 2 * data_generator.LINHAS_POR_FATIA + 1, [
+        {'nome': 'ID', 'tipo': 'integer', 'e_pk': True, 'limite': ['1', '10000000']},
+        {'nome': 'VALOR', 'tipo': 'float', 'limite': ['0', '1000']},
+        {'nome': 'NOME', 'tipo': 'nome_pessoa'},
+        {'nome': 'COD', 'tipo': 'regex', 'regex_pattern': '[A-Z]{2}-\\d{4}'}])
+    solto = arquivo('SOLTO', 2 * data_generator.LINHAS_POR_FATIA + 1, [
+        {'nome': 'N', 'tipo': 'integer', 'limite': ['1', '100']},
+        {'nome': 'DATA', 'tipo': 'datetime', 'limite': ['2020-01-01', '2020-12-31']}])
+    filho = arquivo('FILHO', 5000, [
+        {'nome': 'PAI_1N', 'tipo': 'chave_estrangeira', 'fk_arquivo': 'PAI', 'fk_campo': 'ID',
+         'cardinalidade': 'Um-para-Muitos (1:N)'},
+        {'nome': 'PAI_11', 'tipo': 'chave_estrangeira', 'fk_arquivo': 'PAI', 'fk_campo': 'ID',
+         'cardinalidade': 'Um-para-Um (1:1)'},
+        {'nome': 'STATUS', 'tipo': 'lista_opcoes', 'opcoes': ['A', 'B', 'C']}])
+    return {'semente': 42, 'workers': workers, 'arquivos': [pai, solto, filho]}
+
+
+def test_geracao_serial_igual_a_paralela(pasta_saida):
+    relatorio_serial = generate_from_config(_sessao_paralelizavel(1))
+    serial = {nome: ler_csv(f'{nome}.csv') for nome in ('PAI', 'SOLTO', 'FILHO')}
+    relatorio_paralelo = generate_from_config(_sessao_paralelizavel(3))
+    assert {nome: ler_csv(f'{nome}.csv') for nome in ('PAI', 'SOLTO', 'FILHO')} == serial
+    assert {nome: est['linhas'] for nome, est in relatorio_paralelo.items()} == \
+           {nome: est['linhas'] for nome, est in relatorio_serial.items()}
+    _, linhas_pai = serial['PAI']
+    chaves_pai = {linha[0] for linha in linhas_pai}
+    _, linhas_filho = serial['FILHO']
+    assert all(linha[0] in chaves_pai and linha[1] in chaves_pai for linha in linhas_filho)
+
+
+def test_fatias_cobrem_o_arquivo_sem_passar_do_limite():
+    config = arquivo('A', 5 * data_generator.LINHAS_POR_FATIA + 7, [{'nome': 'N', 'tipo': 'integer',
+                                                                     'limite': ['1', '9']}])
+    fatias = data_generator._planejar_fatias(config)
+    assert len(fatias) == 6 and sum(fatias) == config['num_linhas']
+    assert max(fatias) - min(fatias) <= 1 and max(fatias) <= data_generator.LINHAS_POR_FATIA
+
+
+@pytest.mark.parametrize('campo, extras', [
+    ({'nome': 'N', 'tipo': 'integer', 'e_pk': True, 'limite': ['1', '10000000']}, {}),
+    ({'nome': 'N', 'tipo': 'integer', 'repeticao': 1, 'limite': ['1', '10000000']}, {}),
+    ({'nome': 'N', 'tipo': 'integer', 'repeticao': 3, 'limite': ['1', '9']}, {}),
+    ({'nome': 'N', 'tipo': 'chave_estrangeira', 'fk_arquivo': 'PAI', 'fk_campo': 'ID',
+      'cardinalidade': 'Um-para-Um (1:1)'}, {}),
+    ({'nome': 'N', 'tipo': 'integer', 'limite': ['1', '9']}, {'regras_sort': [{'campo': 'N', 'ordem': 'Ascendente'}]}),
+    ({'nome': 'N', 'tipo': 'integer', 'limite': ['1', '9']}, {'constraint_unicidade': ['N']}),
+])
+def test_arquivos_que_dependem_das_outras_fatias_nao_sao_fatiados(campo, extras):
+    config = arquivo('A', 3 * data_generator.LINHAS_POR_FATIA, [campo], **extras)
+    assert data_generator._planejar_fatias(config) == [config['num_linhas']]
+
+
+def test_repeticao_nao_reinicia_entre_fatias(pasta_saida):
+    num_linhas = data_generator.LINHAS_POR_FATIA + 1003  # Fatias de 25502 e 25501 linhas: nenhuma múltipla de 7
+    generate_from_config({'semente': 5, 'arquivos': [arquivo('A', num_linhas, [
+        {'nome': 'X', 'tipo': 'integer', 'repeticao': 7, 'limite': ['1', '1000000000']}])]})
+    _, linhas = ler_csv('A.csv')
+    sequencias = [len(list(grupo)) for _, grupo in itertools.groupby(linha[0] for linha in linhas)]
+    assert set(sequencias[:-1]) == {7}
@@ -0,0 +1,91 @@
+# tests/test_planejamento.py
+# Regressões de `planejar_sessao`: sessões viáveis aceitas, impossíveis recusadas antes de gerar qualquer arquivo.
+
+import json
+import os
+import time
+
+import pytest
+
+from conftest import arquivo
+from data_generator import generate_from_config
+from planejamento import formatar_plano, planejar_sessao
+
+
+def _erros(sessao):
+    return [erro for plano in planejar_sessao(sessao).values() for erro in plano['erros']]
+
+
+def test_sessao_de_exemplo_e_viavel():
+    caminho = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config_to_load.json')
+    with open(caminho, encoding='utf-8') as f:
+        assert _erros(json.load(f)) == []
+
+
+def test_aceita_dominios_exatos_e_estima_custo():
+    plano = planejar_sessao({'arquivos': [
+        arquivo('PAI', 1000, [{'nome': 'ID', 'tipo': 'integer', 'e_pk': True, 'limite': ['1', '1000']},
+                              {'nome': 'COD', 'tipo': 'regex', 'repeticao': 1, 'regex_pattern': '[0-9]{3}[AB]'}]),
+        arquivo('FILHO', 1000, [{'nome': 'PAI_ID', 'tipo': 'chave_estrangeira', 'fk_arquivo': 'PAI',
+                                 'fk_campo': 'ID', 'cardinalidade': 'Um-para-Um (1:1)'}])]})
+    assert [plano[nome]['erros'] for nome in ('PAI', 'FILHO')] == [[], []]
+    assert plano['PAI']['dominios'] == {'ID': 1000, 'COD': 2000}
+    assert plano['PAI']['bytes_estimados'] > 1000 * len('1,000A\r\n')
+    assert plano['FILHO']['segundos_estimados'] >= 0
+
+
+@pytest.mark.parametrize('campos, extras, trecho', [
+    ([{'nome': 'ID', 'tipo': 'integer', 'e_pk': True, 'limite': ['1', '99']}], {}, 'admite apenas 99'),
+    ([{'nome': 'D', 'tipo': 'datetime', 'repeticao': 1, 'limite': ['2024-01-01', '2024-01-31']}], {},
+     'admite apenas 31'),
+    ([{'nome': 'R', 'tipo': 'regex', 'repeticao': 1, 'regex_pattern': '[AB][0-9]'}], {}, 'admite apenas 20'),
+    ([{'nome': 'X', 'tipo': 'integer', 'limite': ['1', '9']}, {'nome': 'Y', 'tipo': 'boolean'}],
+     {'constraint_unicidade': ['X', 'Y']}, 'combinações'),
+    ([{'nome': 'X', 'tipo': 'integer', 'limite': ['1', '10']}], {'constraint_unicidade': ['NAO_EXISTE']},
+     'inexistentes'),
+    ([{'nome': 'X', 'tipo': 'integer', 'limite': ['10', '1']}], {}, 'Parâmetro inválido'),
+])
+def test_recusa_arquivos_impossiveis(campos, extras, trecho):
+    erros = _erros({'arquivos': [arquivo('A', 100, campos, **extras)]})
+    assert len(erros) == 1 and trecho in erros[0]
+
+
+def test_recusa_fk_um_para_um_sem_chaves_suficientes():
+    erros = _erros({'arquivos': [
+        arquivo('PAI', 10, [{'nome': 'ID', 'tipo': 'integer', 'e_pk': True, 'limite': ['1', '1000']}]),
+        arquivo('FILHO', 11, [{'nome': 'PAI_ID', 'tipo': 'chave_estrangeira', 'fk_arquivo': 'PAI',
+                               'fk_campo': 'ID', 'cardinalidade': 'Um-para-Um (1:1)'}])]})
+    assert len(erros) == 1 and 'relação 1:1' in erros[0]
+
+
+def test_colisoes_frequentes_geram_aviso():
+    # Domínio igual ao número de linhas: viável, mas com a maior parte dos sorteios repetida
+    campos = [{'nome': 'X', 'tipo': 'integer', 'limite': ['1', '1500']}]
+    plano = planejar_sessao({'arquivos': [arquivo('A', 1500, campos, constraint_unicidade=['X'])]})['A']
+    assert plano['erros'] == [] and plano['combinacoes'] == 1500 and plano['taxa_colisao'] > 0.5 and plano['avisos']
+
+
+def test_formatar_plano_lista_erros_e_avisos_por_arquivo():
+    linhas = formatar_plano(planejar_sessao({'arquivos': [
+        arquivo('A', 1500, [{'nome': 'X', 'tipo': 'integer', 'limite': ['1', '1500']}], constraint_unicidade=['X']),
+        arquivo('B', 100, [{'nome': 'ID', 'tipo': 'integer', 'e_pk': True, 'limite': ['1', '99']}])]}))
+    assert linhas[0].startswith('A: 1500 linhas, ~') and 'de colisões na unicidade' in linhas[0]
+    assert linhas[1].startswith('  aviso: ')
+    assert linhas[2].startswith('B: 100 linhas, ~')
+    assert linhas[3].startswith('  ERRO: ') and 'admite apenas 99' in linhas[3] and len(linhas) == 4
+
+
+def test_dominio_de_string_longa_e_rapido():
+    inicio = time.perf_counter()
+    erros = _erros({'arquivos': [arquivo('A', 10, [{'nome': 'S', 'tipo': 'string', 'e_pk': True,
+                                                    'limite': ['1', '20000']}])]})
+    assert erros == [] and time.perf_counter() - inicio < 5
+
+
+def test_geracao_recusa_antes_de_gravar(pasta_saida):
+    sessao = {'arquivos': [
+        arquivo('OK', 10, [{'nome': 'X', 'tipo': 'integer', 'limite': ['1', '10']}]),
+        arquivo('RUIM', 10, [{'nome': 'ID', 'tipo': 'integer', 'e_pk': True, 'limite': ['1', '5']}])]}
+    with pytest.raises(ValueError, match='não pode ser gerada'):
+        generate_from_config(sessao)
+    assert os.listdir(pasta_saida) == []
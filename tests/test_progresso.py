@@ -0,0 +1,56 @@
+# tests/test_progresso.py
+# Progresso e cancelamento: eventos com linhas e bytes de cada arquivo, e cancelamento sem arquivos parciais.
+
+import os
+import queue
+
+import pytest
+
+import data_generator
+from conftest import arquivo
+from data_generator import GeracaoCancelada, generate_from_config, run_generation_in_thread
+
+
+class _CancelarApos:
+    """Token de cancelamento que passa a estar marcado depois de `consultas` verificações."""
+
+    def __init__(self, consultas):
+        self.consultas = consultas
+
+    def is_set(self):
+        self.consultas -= 1
+        return self.consultas < 0
+
+
+def _sessao(num_linhas, workers=1):
+    return {'semente': 3, 'workers': workers, 'arquivos': [
+        arquivo('A', num_linhas, [{'nome': 'N', 'tipo': 'integer', 'limite': ['1', '9']}]),
+        arquivo('B', 1000, [{'nome': 'T', 'tipo': 'string', 'limite': ['1', '9']}])]}
+
+
+def test_eventos_de_progresso(pasta_saida, monkeypatch):
+    monkeypatch.setattr(data_generator, 'INTERVALO_PROGRESSO', 0)
+    eventos = []
+    generate_from_config(_sessao(30000), eventos.append)
+    assert {evento['arquivo'] for evento in eventos} == {'A', 'B'}
+    assert all(evento['total_linhas'] == {'A': 30000, 'B': 1000} for evento in eventos)
+    linhas_a = [evento['linhas']['A'] for evento in eventos]
+    assert linhas_a == sorted(linhas_a) and len(set(linhas_a)) > 2  # Um evento por lote, sempre crescente
+    assert eventos[-1]['linhas'] == {'A': 30000, 'B': 1000}
+    assert eventos[-1]['bytes']['A'] > 0 and eventos[-1]['linhas_por_segundo'] > 0
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_cancelamento_nao_deixa_arquivos(pasta_saida, workers):
+    with pytest.raises(GeracaoCancelada):
+        generate_from_config(_sessao(2 * data_generator.LINHAS_POR_FATIA + 1, workers), cancelamento=_CancelarApos(3))
+    assert os.listdir(pasta_saida) == []  # Nem arquivos finais, nem '.parcial', nem pastas de fatias
+
+
+def test_cancelamento_informado_pela_fila(pasta_saida):
+    fila = queue.Queue()
+    run_generation_in_thread(_sessao(30000), fila, _CancelarApos(2))
+    mensagens = []
+    while not fila.empty(): mensagens.append(fila.get())
+    assert mensagens[-1]['status'] == 'cancelled'
+    assert not os.path.exists(pasta_saida / 'A.csv')
@@ -0,0 +1,51 @@
+# tests/test_regex.py
+# Amostrador de regex: as strings sorteadas casam com o padrão e o padrão é interpretado uma única vez.
+
+import random
+import re
+
+import pytest
+
+from amostrador_regex import compilar_regex
+from data_generator import compilar_valor_atomico
+
+PADROES = [
+    '\\d{3}\\.\\d{3}\\.\\d{3}-\\d{2}',  # Forma fixa (CPF)
+    '\\(\\d{2}\\) 9\\d{4}-\\d{4}',
+    '[A-Z]{2}[^0-9]x{2}\\{\\}',
+    '[a-z]{3,8}@(gmail|hotmail)\\.com(\\.br)?',
+    '(ab|cd)-\\1',  # Referência a grupo
+    '\\w+\\s\\W*',
+    'a*b+c?d{2,}',
+    '^(?:x|y)z$',
+]
+
+
+@pytest.mark.parametrize('padrao', PADROES)
+def test_amostras_casam_com_o_padrao(padrao):
+    amostrador, rng = compilar_regex(padrao), random.Random(3)
+    amostras = [amostrador.sortear(rng) for _ in range(200)] + amostrador.sortear_lote(rng, 500)
+    assert all(re.fullmatch(padrao, amostra) for amostra in amostras)
+
+
+def test_padroes_de_forma_fixa_sorteiam_por_posicao():
+    assert compilar_regex(PADROES[0]).posicoes is not None
+    assert compilar_regex(PADROES[3]).posicoes is None
+
+
+def test_padrao_interpretado_uma_unica_vez():
+    assert compilar_regex('[0-9]{4}') is compilar_regex('[0-9]{4}')
+
+
+def test_campo_regex_reprodutivel_pelo_rng():
+    campo = {'nome': 'C', 'tipo': 'regex', 'regex_pattern': '[A-F]{2}\\d{3}'}
+    gerar_1, gerar_2 = (compilar_valor_atomico(campo, rng=random.Random(5)) for _ in range(2))
+    valores = [gerar_1() for _ in range(1000)]  # Vários lotes crescentes
+    assert valores == [gerar_2() for _ in range(1000)]
+    assert all(re.fullmatch('[A-F]{2}\\d{3}', valor) for valor in valores)
+
+
+def test_regex_invalido_falha_ao_gerar():
+    gerar_valor = compilar_valor_atomico({'nome': 'C', 'tipo': 'regex', 'regex_pattern': '[a-'})
+    with pytest.raises(ValueError, match="campo 'C'"):
+        gerar_valor()
@@ -0,0 +1,107 @@
+# tests/test_regras.py
+# Regras condicionais: casos com e/ou, erros de configuração e a avaliação em lote igual à linha a linha.
+
+import pytest
+
+from conftest import arquivo, ler_csv
+from data_generator import generate_from_config
+from regras import compilar_regra, normalizar_regra
+
+np = pytest.importorskip('numpy')
+
+COLUNAS = {
+    'NUM': [5, 12, -3, 10, 0, 7],
+    'REAL': [0.5, 10.0, 9.99, -1.0, 10.01, 3.0],
+    'TXT': ['abc', 'xyz', '', 'PJ', 'pj', 'abcPJ'],
+    'MISTO': [10, '10', None, 'dez', 10.0, True],
+}
+
+
+def _avaliar(regra, campos=tuple(COLUNAS)):
+    por_linha = compilar_regra(regra, 'ALVO', list(campos) + ['ALVO'])
+    em_lote = compilar_regra(regra, 'ALVO', list(campos) + ['ALVO'], em_lote=True)
+    linhas = [dict(zip(COLUNAS, valores)) for valores in zip(*COLUNAS.values())]
+    return [por_linha(linha) for linha in linhas], em_lote(COLUNAS, len(linhas)).tolist()
+
+
+@pytest.mark.parametrize('campo_ref', list(COLUNAS))
+@pytest.mark.parametrize('operador, valor_ref', [('>', '9.99'), ('<', '0'), ('>=', '10'), ('<=', '7'),
+                                                 ('é igual a', '10'), ('é igual a', 'PJ'), ('é diferente de', 'abc'),
+                                                 ('contém', 'PJ'), ('não contém', 'a')])
+def test_mascara_igual_a_avaliacao_por_linha(campo_ref, operador, valor_ref):
+    regra = {'campo_ref': campo_ref, 'operador': operador, 'valor_ref': valor_ref,
+             'acao_verdadeiro': {'tipo': 'Nulo/Vazio'}, 'acao_falso': {'tipo': 'Usar Geração Padrão'}}
+    por_linha, em_lote = _avaliar(regra)
+    assert em_lote == por_linha
+
+
+def test_motor_colunar_avalia_condicoes_como_o_motor_linha(pasta_saida):
+    def _gerar(motor):
+        generate_from_config({'semente': 31, 'motor': motor, 'arquivos': [arquivo('A', 5000, [
+            {'nome': 'TXT', 'tipo': 'string', 'limite': ['1', '2']},
+            {'nome': 'ALVO', 'tipo': 'string', 'limite': ['3', '3'],
+             'condicional': {'campo_ref': 'TXT', 'operador': 'contém', 'valor_ref': 'a',
+                             'acao_verdadeiro': {'tipo': 'Valor Fixo', 'valor_fixo': 'TEM A'},
+                             'acao_falso': {'tipo': 'Usar Geração Padrão'}}}])]})
+        return ler_csv('A.csv')
+
+    por_linha = _gerar('linha')
+    assert _gerar('colunar') == por_linha  # Colunas não vetorizáveis: mesmos fluxos nos dois motores
+    _, linhas = por_linha
+    assert all((alvo == 'TEM A') == ('a' in txt) for txt, alvo in linhas)
+
+
+def _caso(condicao, valor):
+    return {'condicao': condicao, 'acao': {'tipo': 'Valor Fixo', 'valor_fixo': valor}}
+
+
+def _cmp(campo_ref, operador, valor_ref):
+    return {'campo_ref': campo_ref, 'operador': operador, 'valor_ref': valor_ref}
+
+
+def test_primeiro_caso_verdadeiro_vence_com_e_ou_aninhados():
+    regra = {'casos': [
+        _caso({'e': [_cmp('NUM', '>', '0'), {'ou': [_cmp('TXT', 'contém', 'a'), _cmp('REAL', '>=', '10')]}]}, 'A'),
+        _caso({'ou': [_cmp('TXT', 'é igual a', 'PJ'), _cmp('NUM', '<', '0')]}, 'B'),
+        _caso(_cmp('NUM', '>=', '0'), 'C')]}
+    por_linha, em_lote = _avaliar(regra)
+    # NUM [5, 12, -3, 10, 0, 7], REAL [.5, 10, 9.99, -1, 10.01, 3], TXT ['abc', 'xyz', '', 'PJ', 'pj', 'abcPJ']
+    assert por_linha == em_lote == [0, 0, 1, 1, 2, 0]
+    assert normalizar_regra(regra)['senao'] == {'tipo': 'Usar Geração Padrão'}
+
+
+def test_case_sobre_um_campo_vira_tabela():
+    regra = {'casos': [_caso(_cmp('TXT', 'é igual a', valor), valor) for valor in ('xyz', 'PJ', 'xyz')],
+             'senao': {'tipo': 'Nulo/Vazio'}}
+    por_linha, em_lote = _avaliar(regra)
+    assert por_linha == em_lote == [3, 0, 3, 1, 3, 3]  # Valor repetido: vale o primeiro caso
+
+
+def test_case_na_geracao(pasta_saida):
+    generate_from_config({'semente': 5, 'arquivos': [arquivo('A', 2000, [
+        {'nome': 'UF', 'tipo': 'lista_opcoes', 'opcoes': ['SP', 'RJ', 'MG', 'BA']},
+        {'nome': 'IDADE', 'tipo': 'integer', 'limite': ['10', '80']},
+        {'nome': 'FAIXA', 'tipo': 'string', 'limite': ['1', '1'], 'condicional': {'casos': [
+            _caso({'e': [_cmp('UF', 'é igual a', 'SP'), _cmp('IDADE', '<', '18')]}, 'SP-MENOR'),
+            _caso({'ou': [_cmp('UF', 'é igual a', 'SP'), _cmp('UF', 'é igual a', 'RJ')]}, 'SUDESTE'),
+        ], 'senao': {'tipo': 'Valor Fixo', 'valor_fixo': 'OUTRO'}}}])]})
+    _, linhas = ler_csv('A.csv')
+    esperado = lambda uf, idade: ('SP-MENOR' if uf == 'SP' and idade < 18 else
+                                  'SUDESTE' if uf in ('SP', 'RJ') else 'OUTRO')
+    assert all(faixa == esperado(uf, int(idade)) for uf, idade, faixa in linhas)
+    assert {faixa for _, _, faixa in linhas} == {'SP-MENOR', 'SUDESTE', 'OUTRO'}
+
+
+@pytest.mark.parametrize('regra, mensagem', [
+    ({'casos': []}, 'nenhum caso'),
+    ({'casos': [{'condicao': _cmp('NUM', '>', '1')}]}, "'condicao' e de uma 'acao'"),
+    ({'casos': [_caso(_cmp('FALTA', '>', '1'), 'x')]}, "'FALTA' não existe"),
+    ({'casos': [_caso(_cmp('ALVO', '>', '1'), 'x')]}, 'referenciar a si mesmo'),
+    ({'casos': [_caso(_cmp('NUM', 'parece', '1'), 'x')]}, 'operador desconhecido'),
+    ({'casos': [_caso(_cmp('NUM', '>', 'dez'), 'x')]}, 'não é numérico'),
+    ({'casos': [_caso({'e': []}, 'x')]}, "combinação 'e'"),
+])
+@pytest.mark.parametrize('em_lote', [False, True])
+def test_erros_de_configuracao(regra, mensagem, em_lote):
+    with pytest.raises(ValueError, match=f"Regra condicional inválida no campo 'ALVO': .*{mensagem}"):
+        compilar_regra(regra, 'ALVO', list(COLUNAS) + ['ALVO'], em_lote=em_lote)
@@ -0,0 +1,40 @@
+# tests/test_sementes.py
+# Sementes: a da sessão reproduz os arquivos, e cada arquivo e cada coluna sorteiam com um fluxo independente.
+
+from conftest import arquivo, ler_csv
+from data_generator import generate_from_config
+
+X = {'nome': 'X', 'tipo': 'string', 'limite': ['3', '8']}
+Y = {'nome': 'Y', 'tipo': 'integer', 'limite': ['1', '1000000']}
+
+
+def test_semente_define_a_saida(pasta_saida):
+    sessao = {'semente': 7, 'arquivos': [arquivo('A', 200, [X])]}
+    generate_from_config(sessao)
+    primeira = ler_csv('A.csv')
+    generate_from_config(sessao)
+    assert ler_csv('A.csv') == primeira
+    generate_from_config(dict(sessao, semente=8))
+    assert ler_csv('A.csv') != primeira
+
+
+def test_alterar_um_arquivo_nao_muda_os_outros(pasta_saida):
+    generate_from_config({'semente': 7, 'arquivos': [arquivo('A', 200, [X]), arquivo('B', 200, [X])]})
+    antes = ler_csv('A.csv')
+    generate_from_config({'semente': 7, 'arquivos': [arquivo('A', 200, [X]), arquivo('B', 300, [X, Y])]})
+    assert ler_csv('A.csv') == antes
+
+
+def test_nova_coluna_nao_muda_as_demais(pasta_saida):
+    generate_from_config({'semente': 7, 'arquivos': [arquivo('A', 200, [X])]})
+    _, antes = ler_csv('A.csv')
+    generate_from_config({'semente': 7, 'arquivos': [arquivo('A', 200, [Y, X])]})
+    _, depois = ler_csv('A.csv')
+    assert [linha[1] for linha in depois] == [linha[0] for linha in antes]
+
+
+def test_semente_do_arquivo_substitui_a_derivada_da_sessao(pasta_saida):
+    generate_from_config({'semente': 1, 'arquivos': [arquivo('A', 200, [X], semente=99)]})
+    primeira = ler_csv('A.csv')
+    generate_from_config({'semente': 2, 'arquivos': [arquivo('A', 200, [X], semente=99)]})
+    assert ler_csv('A.csv') == primeira
@@ -0,0 +1,74 @@
+# tests/test_unicidade.py
+# Campos únicos (PK ou repetição 1) e constraint de unicidade: nenhum valor repetido e domínios pequenos rejeitados.
+
+import random
+
+import pytest
+
+from conftest import arquivo, ler_csv
+from data_generator import _criar_gerador_unico, compilar_valor_atomico, generate_from_config
+
+
+def test_pk_e_campos_unicos_sem_repeticao(pasta_saida):
+    generate_from_config({'semente': 1, 'arquivos': [
+        arquivo('PAI', 1000, [
+            {'nome': 'ID', 'tipo': 'integer', 'e_pk': True, 'limite': ['1', '1000']},  # Domínio exato
+            {'nome': 'DATA', 'tipo': 'datetime', 'repeticao': 1, 'limite': ['2020-01-01', '2022-12-31']},
+            {'nome': 'COD', 'tipo': 'regex', 'repeticao': 1, 'regex_pattern': '[0-9]{4}'},
+            {'nome': 'TXT', 'tipo': 'string', 'repeticao': 1, 'limite': ['2', '2']}]),
+        arquivo('FILHO', 800, [{'nome': 'PAI_ID', 'tipo': 'chave_estrangeira', 'fk_arquivo': 'PAI',
+                                'fk_campo': 'ID', 'cardinalidade': 'Um-para-Um (1:1)'}])]})
+    cabecalho, linhas = ler_csv('PAI.csv')
+    for coluna in zip(*linhas):
+        assert len(set(coluna)) == len(linhas) == 1000
+    assert sorted(int(linha[0]) for linha in linhas) == list(range(1, 1001))
+    _, linhas_filho = ler_csv('FILHO.csv')
+    chaves = [linha[0] for linha in linhas_filho]
+    assert len(set(chaves)) == 800 and set(chaves) <= {linha[0] for linha in linhas}
+
+
+@pytest.mark.parametrize('campo, total', [
+    ({'tipo': 'float', 'limite': ['0.5', '1']}, 51),
+    ({'tipo': 'boolean'}, 2),
+    ({'tipo': 'lista_opcoes', 'opcoes': ['a', 'b', 'a', 'c']}, 3),
+])
+def test_dominio_inteiro_sem_repeticao(campo, total):
+    campo = dict(campo, nome='C', e_pk=True)
+    rng = random.Random(4)
+    valores = list(_criar_gerador_unico(campo, total, compilar_valor_atomico(campo, rng=rng), rng))
+    assert len(set(valores)) == total
+
+
+def test_dominio_menor_que_o_arquivo_e_rejeitado():
+    campo = {'nome': 'C', 'tipo': 'integer', 'e_pk': True, 'limite': ['1', '10']}
+    with pytest.raises(ValueError, match="admite apenas 10 valores distintos"):
+        next(_criar_gerador_unico(campo, 11, compilar_valor_atomico(campo)))
+
+
+def test_constraint_de_unicidade_composta(pasta_saida):
+    generate_from_config({'semente': 3, 'arquivos': [arquivo('A', 1500, [
+        {'nome': 'X', 'tipo': 'integer', 'limite': ['1', '200']},
+        {'nome': 'Y', 'tipo': 'lista_opcoes', 'opcoes': ['a', 'b', 'c', 'd', 'e']},
+        {'nome': 'Z', 'tipo': 'boolean'}], constraint_unicidade=['X', 'Y', 'Z'])]})
+    _, linhas = ler_csv('A.csv')
+    assert len(linhas) == 1500 and len({tuple(linha) for linha in linhas}) == 1500
+
+
+def test_constraint_de_unicidade_com_hashes_iguais(pasta_saida):
+    # hash(-1) == hash(-2) no CPython: as combinações precisam ser comparadas pelos valores, não pelos hashes
+    generate_from_config({'arquivos': [arquivo('A', 2, [{'nome': 'X', 'tipo': 'integer', 'limite': ['-2', '-1']}],
+                                               constraint_unicidade=['X'])]})
+    _, linhas = ler_csv('A.csv')
+    assert sorted(linha[0] for linha in linhas) == ['-1', '-2']
+
+
+def test_colisao_sorteia_de_novo_apenas_os_campos_da_constraint(pasta_saida):
+    campos = [{'nome': 'X', 'tipo': 'integer', 'limite': ['1', '3000']},
+              {'nome': 'Y', 'tipo': 'string', 'limite': ['5', '5']}]
+    generate_from_config({'semente': 9, 'arquivos': [arquivo('A', 2000, campos)]})
+    _, livres = ler_csv('A.csv')
+    relatorio = generate_from_config({'semente': 9, 'arquivos': [arquivo('A', 2000, campos,
+                                                                         constraint_unicidade=['X'])]})
+    _, unicas = ler_csv('A.csv')
+    assert relatorio['A']['colisoes'] > 0 and len({linha[0] for linha in unicas}) == 2000
+    assert [linha[1] for linha in unicas] == [linha[1] for linha in livres]
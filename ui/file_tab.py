@@ -1,60 +1,110 @@
 # ui/file_tab.py
 # Módulo que define a classe FileTab e a janela de diálogo para regras condicionais.
 
+import copy
 import tkinter as tk
 from tkinter import ttk, messagebox
-from utils import Tooltip
+from ui.tooltip import Tooltip
+from data_generator import gerar_amostra
+from regras import normalizar_regra
+from saida import COMPRESSOES_FORMATO, EXTENSOES_FORMATO
+
+
+TIPOS_CAMPO = ['integer', 'float', 'string', 'nome_pessoa', 'boolean', 'datetime', 'uuid', 'lista_opcoes', 'regex',
+               'chave_estrangeira']
+CARDINALIDADES = ["Um-para-Muitos (1:N)", "Um-para-Um (1:1)"]
+# Pré-visualização: espera após a última edição antes de gerar a amostra, e intervalo de consulta do resultado
+ATRASO_PREVIA_MS = 300
+INTERVALO_PREVIA_MS = 50
+# Chaves do arquivo editadas nos widgets da aba; as demais (ex.: 'semente', 'memoria_sort_mb') são preservadas
+CHAVES_EDITADAS = ('nome_arquivo', 'num_linhas', 'separador', 'codificacao', 'campos', 'regras_sort',
+                   'constraint_unicidade', 'formato', 'compressao', 'linhas_por_grupo')
+
+
+def _modelo_do_campo(config, indice):
+    """Converte a configuração de um campo para o modelo editado na aba (os valores exibidos nos editores)."""
+    limite = config.get('limite', ['', ''])
+    return {'nome': config.get('nome', f'campo_{indice + 1}'), 'tipo': config.get('tipo', 'string'),
+            'e_pk': bool(config.get('e_pk', False)), 'repeticao': str(config.get('repeticao', '0')),
+            'limite1': str(limite[0]), 'limite2': str(limite[1]), 'opcoes': ", ".join(config.get('opcoes', [])),
+            'regex': config.get('regex_pattern', ''), 'fk_arquivo': config.get('fk_arquivo', ''),
+            'fk_campo': config.get('fk_campo', ''),
+            'fk_cardinalidade': config.get('cardinalidade', 'Um-para-Muitos (1:N)'),
+            'condicional': config.get('condicional')}
+
+
+def _config_do_campo(modelo):
+    """Converte o modelo de um campo de volta para a configuração usada pelo gerador."""
+    campo_cfg = {"nome": modelo['nome'], "tipo": modelo['tipo'], "e_pk": modelo['e_pk'],
+                 "repeticao": int(modelo['repeticao'])}
+    if modelo.get('condicional'): campo_cfg['condicional'] = modelo['condicional']
+    tipo = modelo['tipo']
+    if tipo in ['integer', 'float', 'string', 'datetime']:
+        campo_cfg['limite'] = (modelo['limite1'], modelo['limite2'])
+    elif tipo == 'lista_opcoes':
+        campo_cfg['opcoes'] = [opt.strip() for opt in modelo['opcoes'].split(',') if opt.strip()]
+    elif tipo == 'regex':
+        campo_cfg['regex_pattern'] = modelo['regex']
+    elif tipo == 'chave_estrangeira':
+        campo_cfg['fk_arquivo'] = modelo['fk_arquivo']
+        campo_cfg['fk_campo'] = modelo['fk_campo']
+        campo_cfg['cardinalidade'] = modelo['fk_cardinalidade']
+    return campo_cfg
 
 
 class ConditionalRuleDialog(tk.Toplevel):
-    """Janela de diálogo para criar e editar uma regra de geração condicional."""
+    """Janela de diálogo para criar e editar uma regra de geração condicional.
+
+    A regra tem um ou mais casos (SE / SENÃO SE), avaliados em ordem, cada um com uma ou mais condições combinadas
+    por E ou OU, e uma ação SENÃO. Uma regra de um caso com uma condição é salva na forma simples."""
+
+    OPERADORES = ['é igual a', 'é diferente de', 'contém', 'não contém', '>', '<', '>=', '<=']
 
     def __init__(self, parent, todos_os_campos, campo_atual, regra_existente=None):
         super().__init__(parent)
         self.title(f"Regra Condicional para '{campo_atual}'")
         self.transient(parent)
         self.grab_set()
-        self.geometry("600x400")
+        self.minsize(600, 400)
 
         self.todos_os_campos = [c for c in todos_os_campos if c != campo_atual]
         self.regra = regra_existente or {}
+        self.casos = []  # Widgets de cada caso, na ordem de avaliação
         self.resultado = None  # Armazena a regra criada ao salvar
 
         self._criar_widgets()
         self._carregar_regra()
         self.protocol("WM_DELETE_WINDOW", self._on_cancel)
 
+    @staticmethod
+    def regra_editavel(regra):
+        """Indica se a regra pode ser editada no diálogo (condições aninhadas só podem ser editadas na sessão)."""
+        return not regra or all(ConditionalRuleDialog._termos_da_condicao(caso.get('condicao')) is not None
+                                for caso in normalizar_regra(regra)['casos'])
+
+    @staticmethod
+    def _termos_da_condicao(condicao):
+        """Retorna (conector, comparações) de uma condição sem combinações aninhadas, ou None."""
+        if not isinstance(condicao, dict): return None
+        for conector, chave in (('E', 'e'), ('OU', 'ou')):
+            if chave in condicao:
+                termos = condicao[chave]
+                if not isinstance(termos, list) or any('e' in t or 'ou' in t for t in termos): return None
+                return conector, termos
+        return 'E', [condicao]
+
     def _criar_widgets(self):
         main_frame = ttk.Frame(self, padding="10")
         main_frame.pack(fill="both", expand=True)
 
-        # --- SE (Condição) ---
-        if_frame = ttk.LabelFrame(main_frame, text="SE (Condição)", padding="10")
-        if_frame.pack(fill="x", expand=True, pady=5)
-
-        ttk.Label(if_frame, text="O campo:").grid(row=0, column=0, sticky="w", padx=5)
-        self.campo_ref_var = tk.StringVar()
-        self.combo_campo_ref = ttk.Combobox(if_frame, textvariable=self.campo_ref_var, values=self.todos_os_campos,
-                                            state="readonly")
-        self.combo_campo_ref.grid(row=0, column=1, sticky="ew", padx=5)
-
-        operadores = ['é igual a', 'é diferente de', 'contém', 'não contém', '>', '<', '>=', '<=']
-        self.operador_var = tk.StringVar()
-        ttk.Combobox(if_frame, textvariable=self.operador_var, values=operadores, state="readonly", width=15).grid(
-            row=0, column=2, padx=5)
-
-        self.valor_ref_var = tk.StringVar()
-        ttk.Entry(if_frame, textvariable=self.valor_ref_var).grid(row=0, column=3, sticky="ew", padx=5)
-        if_frame.grid_columnconfigure(1, weight=1)
-        if_frame.grid_columnconfigure(3, weight=1)
-
-        # --- ENTÃO (Ação se Verdadeiro) ---
-        then_frame = ttk.LabelFrame(main_frame, text="ENTÃO (Ação se Verdadeiro)", padding="10")
-        then_frame.pack(fill="x", expand=True, pady=5)
-        self.then_action_frame = self._criar_painel_de_acao(then_frame, default_type="Valor Fixo")
-
-        # --- SENÃO (Ação se Falso) ---
-        else_frame = ttk.LabelFrame(main_frame, text="SENÃO (Ação se Falso)", padding="10")
+        # --- SE / SENÃO SE (Casos avaliados em ordem) ---
+        self.casos_frame = ttk.Frame(main_frame)
+        self.casos_frame.pack(fill="x", expand=True)
+        ttk.Button(main_frame, text="+ Adicionar Caso (SENÃO SE)", command=self._adicionar_caso).pack(anchor="w",
+                                                                                                  pady=5)
+
+        # --- SENÃO (Ação se nenhum caso for verdadeiro) ---
+        else_frame = ttk.LabelFrame(main_frame, text="SENÃO (Ação se nenhum caso for verdadeiro)", padding="10")
         else_frame.pack(fill="x", expand=True, pady=5)
         self.else_action_frame = self._criar_painel_de_acao(else_frame, default_type="Usar Geração Padrão")
 
@@ -64,6 +114,68 @@ class ConditionalRuleDialog(tk.Toplevel):
         ttk.Button(button_frame, text="Cancelar", command=self._on_cancel).pack(side="right", padx=5)
         ttk.Button(button_frame, text="Salvar Regra", command=self.salvar, style="Accent.TButton").pack(side="right")
 
+    def _adicionar_caso(self, caso=None):
+        """Adiciona um caso (condições e ação ENTÃO) ao final da lista."""
+        caso_frame = ttk.LabelFrame(self.casos_frame, padding="10")
+        caso_frame.pack(fill="x", expand=True, pady=5)
+        widgets = {'frame': caso_frame, 'termos': [], 'conector_var': tk.StringVar(value='E')}
+
+        topo = ttk.Frame(caso_frame)
+        topo.pack(fill="x")
+        ttk.Label(topo, text="Combinar condições com:").pack(side="left")
+        ttk.Combobox(topo, textvariable=widgets['conector_var'], values=['E', 'OU'], state="readonly",
+                     width=4).pack(side="left", padx=5)
+        ttk.Button(topo, text="Remover Caso", command=lambda: self._remover_caso(widgets)).pack(side="right")
+
+        widgets['termos_frame'] = ttk.Frame(caso_frame)
+        widgets['termos_frame'].pack(fill="x", pady=5)
+        ttk.Button(caso_frame, text="+ Condição", command=lambda: self._adicionar_termo(widgets)).pack(anchor="w")
+
+        ttk.Label(caso_frame, text="ENTÃO:").pack(anchor="w", pady=(5, 0))
+        widgets['acao'] = self._criar_painel_de_acao(caso_frame, default_type="Valor Fixo")
+        self.casos.append(widgets)
+
+        conector, termos = self._termos_da_condicao(caso['condicao']) if caso else ('E', [{}])
+        widgets['conector_var'].set(conector)
+        for termo in termos: self._adicionar_termo(widgets, termo)
+        if caso: self._carregar_acao(widgets['acao'], caso.get('acao'))
+        self._atualizar_titulos()
+
+    def _adicionar_termo(self, caso, termo=None):
+        """Adiciona uma condição (campo, operador, valor) a um caso."""
+        termo = termo or {}
+        linha = ttk.Frame(caso['termos_frame'])
+        linha.pack(fill="x", pady=2)
+        widgets = {'frame': linha, 'campo_ref_var': tk.StringVar(value=termo.get('campo_ref', '')),
+                   'operador_var': tk.StringVar(value=termo.get('operador', 'é igual a')),
+                   'valor_ref_var': tk.StringVar(value=termo.get('valor_ref', ''))}
+
+        ttk.Label(linha, text="O campo:").grid(row=0, column=0, sticky="w", padx=5)
+        ttk.Combobox(linha, textvariable=widgets['campo_ref_var'], values=self.todos_os_campos,
+                     state="readonly").grid(row=0, column=1, sticky="ew", padx=5)
+        ttk.Combobox(linha, textvariable=widgets['operador_var'], values=self.OPERADORES, state="readonly",
+                     width=15).grid(row=0, column=2, padx=5)
+        ttk.Entry(linha, textvariable=widgets['valor_ref_var']).grid(row=0, column=3, sticky="ew", padx=5)
+        ttk.Button(linha, text="X", width=3, command=lambda: self._remover_termo(caso, widgets)).grid(row=0, column=4)
+        linha.grid_columnconfigure(1, weight=1)
+        linha.grid_columnconfigure(3, weight=1)
+        caso['termos'].append(widgets)
+
+    def _remover_termo(self, caso, termo):
+        if len(caso['termos']) == 1: return  # Cada caso tem ao menos uma condição
+        caso['termos'].remove(termo)
+        termo['frame'].destroy()
+
+    def _remover_caso(self, caso):
+        if len(self.casos) == 1: return  # A regra tem ao menos um caso
+        self.casos.remove(caso)
+        caso['frame'].destroy()
+        self._atualizar_titulos()
+
+    def _atualizar_titulos(self):
+        for i, caso in enumerate(self.casos):
+            caso['frame'].config(text="SE (Condição)" if i == 0 else f"SENÃO SE (Caso {i + 1})")
+
     def _criar_painel_de_acao(self, parent, default_type="Nulo/Vazio"):
         """Cria um painel reutilizável para definir uma ação de geração."""
         frame = ttk.Frame(parent)
@@ -143,11 +255,12 @@ class ConditionalRuleDialog(tk.Toplevel):
 
     def _carregar_regra(self):
         """Carrega uma regra existente na UI do diálogo."""
-        self.campo_ref_var.set(self.regra.get('campo_ref', ''))
-        self.operador_var.set(self.regra.get('operador', 'é igual a'))
-        self.valor_ref_var.set(self.regra.get('valor_ref', ''))
-        self._carregar_acao(self.then_action_frame, self.regra.get('acao_verdadeiro'))
-        self._carregar_acao(self.else_action_frame, self.regra.get('acao_falso'))
+        if not self.regra:
+            self._adicionar_caso()
+            return
+        regra = normalizar_regra(self.regra)
+        for caso in regra['casos']: self._adicionar_caso(caso)
+        self._carregar_acao(self.else_action_frame, regra['senao'])
 
     def _on_cancel(self):
         self.resultado = None  # Garante que nada é retornado
@@ -155,32 +268,59 @@ class ConditionalRuleDialog(tk.Toplevel):
 
     def salvar(self):
         """Coleta os dados da UI e os armazena para serem recuperados pela janela principal."""
-        if not self.campo_ref_var.get() or not self.operador_var.get():
-            messagebox.showwarning("Incompleto", "A condição (campo, operador) deve ser preenchida.", parent=self)
-            return
-
-        self.resultado = {
-            'campo_ref': self.campo_ref_var.get(),
-            'operador': self.operador_var.get(),
-            'valor_ref': self.valor_ref_var.get(),
-            'acao_verdadeiro': self._coletar_acao(self.then_action_frame),
-            'acao_falso': self._coletar_acao(self.else_action_frame)
-        }
+        casos = []
+        for caso in self.casos:
+            termos = [{'campo_ref': t['campo_ref_var'].get(), 'operador': t['operador_var'].get(),
+                       'valor_ref': t['valor_ref_var'].get()} for t in caso['termos']]
+            if any(not t['campo_ref'] or not t['operador'] for t in termos):
+                messagebox.showwarning("Incompleto", "Todas as condições (campo, operador) devem ser preenchidas.",
+                                       parent=self)
+                return
+            condicao = termos[0] if len(termos) == 1 else {caso['conector_var'].get().lower(): termos}
+            casos.append({'condicao': condicao, 'acao': self._coletar_acao(caso['acao'])})
+
+        senao = self._coletar_acao(self.else_action_frame)
+        if len(casos) == 1 and 'campo_ref' in casos[0]['condicao']:
+            # Forma simples, compatível com as sessões salvas antes dos casos múltiplos
+            self.resultado = {**casos[0]['condicao'], 'acao_verdadeiro': casos[0]['acao'], 'acao_falso': senao}
+        else:
+            self.resultado = {'casos': casos, 'senao': senao}
         self.destroy()
 
 
 class FileTab(ttk.Frame):
     """Representa uma única aba na interface, contendo a configuração de um arquivo."""
 
-    def __init__(self, parent, app_controller, nome_inicial="Arquivo 1", **kwargs):
+    def __init__(self, parent, app_controller, nome_inicial="Arquivo 1", config=None, **kwargs):
         super().__init__(parent, **kwargs)
         self.app_controller = app_controller
         self.nome_arquivo_var = tk.StringVar(value=nome_inicial)
-        self.frames_campos, self.frames_sort = [], []
+        # Modelo dos campos (valores dos editores, em dicionários simples) e o conjunto de editores reaproveitados
+        # para exibi-los: apenas os campos visíveis têm widgets, mesmo em layouts com centenas de colunas
+        self.campos, self.editores, self.frames_sort = [], [], []
+        self.altura_campo, self._largura_campos, self._renderizacao_agendada = None, 1, None
         self.num_linhas_var = tk.StringVar(value="100")
         self.separador_var = tk.StringVar(value="Vírgula (,)")
         self.codificacao_var = tk.StringVar(value="utf-8")
+        self.formato_var = tk.StringVar(value="csv")
+        self.compressao_var = tk.StringVar(value="")
+        self.linhas_por_grupo_var = tk.StringVar(value="")
+        # Os widgets só são criados quando a aba é exibida pela primeira vez (ver `materializar`); até lá, a
+        # configuração carregada da sessão é o modelo da aba
+        self.config_pendente, self.materializada = config, False
+        self.config_extra = {}  # Chaves da configuração carregada que não são editadas na aba
+        self._previa_agendada = self._previa_futura = None
+
+    def materializar(self):
+        """Cria os widgets da aba e carrega a configuração pendente, na primeira vez em que ela é exibida."""
+        if self.materializada: return
+        self.materializada = True
         self._criar_widgets()
+        if self.config_pendente is not None:
+            config, self.config_pendente = self.config_pendente, None
+            self.carregar_config(config)
+        for var in (self.nome_arquivo_var, self.num_linhas_var): var.trace_add("write", self.agendar_previa)
+        self.agendar_previa()
 
     def _criar_widgets(self):
         config_geral_frame = ttk.LabelFrame(self, text="Configurações do Arquivo", padding="10")
@@ -188,7 +328,7 @@ class FileTab(ttk.Frame):
         entry_nome_arquivo = ttk.Entry(config_geral_frame, textvariable=self.nome_arquivo_var, width=40)
         entry_nome_arquivo.grid(row=0, column=1, sticky="ew", padx=5)
         entry_nome_arquivo.bind("<FocusOut>", lambda e: self.app_controller.atualizar_titulo_aba(self))
-        ttk.Label(config_geral_frame, text="Nome do Arquivo CSV:").grid(row=0, column=0, sticky="w", padx=5)
+        ttk.Label(config_geral_frame, text="Nome do Arquivo:").grid(row=0, column=0, sticky="w", padx=5)
         Tooltip(entry_nome_arquivo, "Nome final do arquivo. O título da aba será atualizado.")
         ttk.Label(config_geral_frame, text="Linhas:").grid(row=0, column=2, sticky="w", padx=5)
         ttk.Entry(config_geral_frame, textvariable=self.num_linhas_var, width=15).grid(row=0, column=3, sticky="ew",
@@ -200,11 +340,34 @@ class FileTab(ttk.Frame):
         ttk.Combobox(config_geral_frame, textvariable=self.codificacao_var,
                      values=["utf-8", "latin-1", "windows-1252", "utf-16"], state="readonly").grid(row=1, column=3,
                                                                                                    sticky="ew", padx=5)
+        ttk.Label(config_geral_frame, text="Formato:").grid(row=2, column=0, sticky="w", padx=5)
+        combo_formato = ttk.Combobox(config_geral_frame, textvariable=self.formato_var,
+                                     values=list(EXTENSOES_FORMATO), state="readonly")
+        combo_formato.grid(row=2, column=1, sticky="ew", padx=5)
+        Tooltip(combo_formato, "Parquet e Arrow gravam colunas tipadas (requerem a biblioteca 'pyarrow').")
+        ttk.Label(config_geral_frame, text="Compressão:").grid(row=2, column=2, sticky="w", padx=5)
+        combo_compressao = ttk.Combobox(config_geral_frame, textvariable=self.compressao_var, state="readonly")
+        combo_compressao.grid(row=2, column=3, sticky="ew", padx=5)
+        ttk.Label(config_geral_frame, text="Linhas por grupo:").grid(row=3, column=2, sticky="w", padx=5)
+        entry_linhas_grupo = ttk.Entry(config_geral_frame, textvariable=self.linhas_por_grupo_var, width=15)
+        entry_linhas_grupo.grid(row=3, column=3, sticky="ew", padx=5)
+        Tooltip(entry_linhas_grupo, "Linhas por row group do Parquet. Vazio: 1.048.576.")
+
+        def _atualizar_opcoes_formato(*args):
+            compressoes = [""] + list(COMPRESSOES_FORMATO.get(self.formato_var.get(), ()))
+            combo_compressao['values'] = compressoes
+            if self.compressao_var.get() not in compressoes: self.compressao_var.set("")
+            entry_linhas_grupo.config(state="normal" if self.formato_var.get() == "parquet" else "disabled")
+        self.formato_var.trace_add("write", _atualizar_opcoes_formato)
+        _atualizar_opcoes_formato()
         config_geral_frame.grid_columnconfigure(1, weight=1)
         config_geral_frame.grid_columnconfigure(3, weight=1)
 
-        notebook_interno = ttk.Notebook(self)
-        notebook_interno.pack(fill="both", expand=True, padx=10, pady=5)
+        paineis = ttk.PanedWindow(self, orient="vertical")
+        paineis.pack(fill="both", expand=True, padx=10, pady=5)
+        notebook_interno = ttk.Notebook(paineis)
+        paineis.add(notebook_interno, weight=3)
+        self._criar_painel_previa(paineis)
         campos_tab, ordenacao_tab, unicidade_tab = ttk.Frame(notebook_interno), ttk.Frame(notebook_interno), ttk.Frame(
             notebook_interno)
         notebook_interno.add(campos_tab, text="Definição dos Campos")
@@ -216,13 +379,11 @@ class FileTab(ttk.Frame):
         canvas_frame = ttk.Frame(campos_tab)
         canvas_frame.pack(fill="both", expand=True, pady=5, padx=5)
         self.canvas = tk.Canvas(canvas_frame, borderwidth=0, highlightthickness=0)
-        self.campos_frame = ttk.Frame(self.canvas)
         self.scrollbar = ttk.Scrollbar(canvas_frame, orient="vertical", command=self.canvas.yview)
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.canvas.configure(yscrollcommand=self._ao_rolar_campos)
         self.scrollbar.pack(side="right", fill="y")
         self.canvas.pack(side="left", fill="both", expand=True)
-        self.canvas_window = self.canvas.create_window((0, 0), window=self.campos_frame, anchor="nw")
-        self.canvas.bind('<Configure>', lambda e: self.canvas.itemconfig(self.canvas_window, width=e.width))
+        self.canvas.bind('<Configure>', self._ao_redimensionar_campos)
 
         ttk.Button(ordenacao_tab, text="Adicionar Regra de Ordenação", command=self.adicionar_regra_sort).pack(
             side="top", anchor="w", pady=5, padx=5)
@@ -235,187 +396,310 @@ class FileTab(ttk.Frame):
         self.constraint_listbox.pack(fill="both", expand=True, padx=5, pady=5)
         Tooltip(self.constraint_listbox, "Use Ctrl+Click ou Shift+Click para selecionar múltiplos campos.")
 
-    def _abrir_dialogo_condicional(self, campo_dict):
-        """Abre a janela de diálogo para criar/editar uma regra condicional."""
+    def _criar_painel_previa(self, paineis):
+        """Cria o painel com as primeiras linhas geradas a partir da configuração atual da aba."""
+        previa_frame = ttk.LabelFrame(paineis, text="Pré-visualização", padding=5)
+        paineis.add(previa_frame, weight=1)
+        self.status_previa = ttk.Label(previa_frame, text="")
+        self.status_previa.pack(side="bottom", anchor="w")
+        barra_x = ttk.Scrollbar(previa_frame, orient="horizontal")
+        barra_x.pack(side="bottom", fill="x")
+        barra_y = ttk.Scrollbar(previa_frame, orient="vertical")
+        barra_y.pack(side="right", fill="y")
+        self.tabela_previa = ttk.Treeview(previa_frame, show="headings", height=6, xscrollcommand=barra_x.set,
+                                          yscrollcommand=barra_y.set)
+        self.tabela_previa.pack(fill="both", expand=True)
+        barra_x.config(command=self.tabela_previa.xview)
+        barra_y.config(command=self.tabela_previa.yview)
+
+    def agendar_previa(self, *args):
+        """Agenda a atualização da pré-visualização; edições em sequência geram uma única amostra."""
+        if not self.materializada: return
+        if self._previa_agendada is not None: self.after_cancel(self._previa_agendada)
+        self._previa_agendada = self.after(ATRASO_PREVIA_MS, self._gerar_previa)
+
+    def _gerar_previa(self):
+        """Gera a amostra fora da thread da interface; colunas sem alteração vêm do cache (ver `gerar_amostra`)."""
+        self._previa_agendada = None
+        try:
+            config = self.coletar_config_aba()
+        except (ValueError, TypeError) as e:
+            self.status_previa.config(text=f"Configuração incompleta: {e}")
+            return
+        configs_sessao = self.app_controller.coletar_configs_para_previa(aba_atual=self)
+        # Com a semente da sessão, a amostra mostra as linhas que a geração vai gravar
+        semente_sessao = self.app_controller.config_sessao.get('semente') or 0
+        self._previa_futura = self.app_controller.executor_previa.submit(
+            gerar_amostra, config, configs_sessao, semente_sessao=semente_sessao,
+            cache=self.app_controller.cache_previa)
+        self.after(INTERVALO_PREVIA_MS, self._verificar_previa, self._previa_futura)
+
+    def _verificar_previa(self, futura):
+        if futura is not self._previa_futura: return  # Substituída por uma amostra mais recente
+        if not futura.done():
+            self.after(INTERVALO_PREVIA_MS, self._verificar_previa, futura)
+            return
+        try:
+            cabecalho, linhas = futura.result()
+        except Exception as e:
+            self.status_previa.config(text=f"Erro: {e}")
+            return
+        colunas = [str(i) for i in range(len(cabecalho))]
+        if tuple(self.tabela_previa['columns']) != tuple(colunas): self.tabela_previa['columns'] = colunas
+        for coluna, nome in zip(colunas, cabecalho):
+            self.tabela_previa.heading(coluna, text=nome)
+            self.tabela_previa.column(coluna, width=120, stretch=False)
+        self.tabela_previa.delete(*self.tabela_previa.get_children())
+        for linha in linhas:
+            self.tabela_previa.insert("", tk.END, values=["" if valor is None else str(valor) for valor in linha])
+        self.status_previa.config(text=f"Primeiras {len(linhas)} linhas (sem ordenação e constraints de unicidade).")
+
+    def _abrir_dialogo_condicional(self, indice):
+        """Abre a janela de diálogo para criar/editar a regra condicional do campo na posição `indice`."""
+        modelo = self.campos[indice]
         # A condição só pode se basear em campos que vêm ANTES do atual.
-        campos_anteriores = [cf['nome'].get() for cf in self.frames_campos if cf['id'] < campo_dict['id']]
+        campos_anteriores = [campo['nome'] for campo in self.campos[:indice]]
         if not campos_anteriores:
             messagebox.showinfo("Aviso",
                                 "A condição depende de campos definidos anteriormente.\nMova este campo para baixo para poder adicionar uma condição.",
                                 parent=self)
             return
+        if not ConditionalRuleDialog.regra_editavel(modelo.get('condicional')):
+            messagebox.showinfo("Aviso", "Esta regra tem condições aninhadas e só pode ser editada na sessão.",
+                                parent=self)
+            return
 
-        dialog = ConditionalRuleDialog(self, campos_anteriores, campo_dict['nome'].get(), campo_dict.get('condicional'))
+        dialog = ConditionalRuleDialog(self, campos_anteriores, modelo['nome'], modelo.get('condicional'))
         self.wait_window(dialog)
 
         if dialog.resultado is not None:
-            campo_dict['condicional'] = dialog.resultado
-            # Atualiza o estado visual do botão para indicar que há uma regra
-            campo_dict['btn_condicao'].config(style="Accent.TButton")
+            modelo['condicional'] = dialog.resultado
+            # Atualiza o estado visual do botão (se o campo ainda estiver visível) para indicar que há uma regra
+            self._revincular([self.campos.index(modelo)])
+            self.agendar_previa()
         # Se o usuário cancelar, dialog.resultado será None e nada acontece.
 
-    def adicionar_campo(self, config=None):
-        config = config or {}
-        frame_id = len(self.frames_campos)
-        campo_frame = ttk.LabelFrame(self.campos_frame, text=f"Campo {frame_id + 1}", padding=10)
-        campo_frame.pack(fill="x", expand=True, padx=5, pady=5)
-
-        nome_var = tk.StringVar(value=config.get('nome', f'campo_{frame_id + 1}'))
-        tipos = ['integer', 'float', 'string', 'nome_pessoa', 'boolean', 'datetime', 'uuid', 'lista_opcoes', 'regex',
-                 'chave_estrangeira']
-        tipo_var = tk.StringVar(value=config.get('tipo', 'string'))
-        e_pk_var = tk.BooleanVar(value=config.get('e_pk', False))
-        repeticao_var = tk.StringVar(value=str(config.get('repeticao', '0')))
-        limite1_var = tk.StringVar(value=str(config.get('limite', ['', ''])[0]))
-        limite2_var = tk.StringVar(value=str(config.get('limite', ['', ''])[1]))
-        opcoes_var = tk.StringVar(value=", ".join(config.get('opcoes', [])))
-        regex_var = tk.StringVar(value=config.get('regex_pattern', ''))
-        fk_arquivo_var = tk.StringVar(value=config.get('fk_arquivo', ''))
-        fk_campo_var = tk.StringVar(value=config.get('fk_campo', ''))
-        fk_cardinalidade_var = tk.StringVar(value=config.get('cardinalidade', 'Um-para-Muitos (1:N)'))
+    def _criar_editor_campo(self):
+        """Cria um editor de campo reutilizável; ele é vinculado a um campo do modelo por `_vincular`."""
+        campo_frame = ttk.LabelFrame(self.canvas, padding=10)
+        editor = {'frame': campo_frame, 'indice': None, 'vinculando': False,
+                  'janela': self.canvas.create_window(0, 0, window=campo_frame, anchor="nw", state="hidden"),
+                  'vars': {'nome': tk.StringVar(), 'tipo': tk.StringVar(), 'e_pk': tk.BooleanVar(),
+                           'repeticao': tk.StringVar(), 'limite1': tk.StringVar(), 'limite2': tk.StringVar(),
+                           'opcoes': tk.StringVar(), 'regex': tk.StringVar(), 'fk_arquivo': tk.StringVar(),
+                           'fk_campo': tk.StringVar(), 'fk_cardinalidade': tk.StringVar()}}
+        v = editor['vars']
 
         ttk.Label(campo_frame, text="Nome:").grid(row=0, column=0, sticky="w")
-        entry_nome = ttk.Entry(campo_frame, textvariable=nome_var, width=15)
-        entry_nome.grid(row=0, column=1, sticky="ew")
-        entry_nome.bind("<FocusOut>", lambda e: self._atualizar_lista_unicidade())
+        ttk.Entry(campo_frame, textvariable=v['nome'], width=15).grid(row=0, column=1, sticky="ew")
         ttk.Label(campo_frame, text="Tipo:").grid(row=0, column=2, sticky="w")
-        combo_tipo = ttk.Combobox(campo_frame, textvariable=tipo_var, values=tipos, state="readonly", width=12)
-        combo_tipo.grid(row=0, column=3, sticky="ew")
-        spin_rep = ttk.Spinbox(campo_frame, from_=0, to=999, textvariable=repeticao_var, width=5)
-        check_pk = ttk.Checkbutton(campo_frame, text="É Chave Primária (PK)", variable=e_pk_var,
-                                   command=lambda: (repeticao_var.set("1"), spin_rep.config(
-                                       state="disabled")) if e_pk_var.get() else spin_rep.config(state="normal"))
-        check_pk.grid(row=0, column=4, sticky="w", padx=5)
+        ttk.Combobox(campo_frame, textvariable=v['tipo'], values=TIPOS_CAMPO, state="readonly", width=12).grid(
+            row=0, column=3, sticky="ew")
+        editor['spin_rep'] = ttk.Spinbox(campo_frame, from_=0, to=999, textvariable=v['repeticao'], width=5)
+        ttk.Checkbutton(campo_frame, text="É Chave Primária (PK)", variable=v['e_pk'],
+                        command=lambda: self._ao_marcar_pk(editor)).grid(row=0, column=4, sticky="w", padx=5)
         ttk.Label(campo_frame, text="Repetir:").grid(row=1, column=4, sticky="w", pady=(5, 0))
-        spin_rep.grid(row=1, column=5, sticky="w", pady=(5, 0))
-        if e_pk_var.get(): spin_rep.config(state="disabled")
+        editor['spin_rep'].grid(row=1, column=5, sticky="w", pady=(5, 0))
         action_buttons_frame = ttk.Frame(campo_frame)
         action_buttons_frame.grid(row=0, column=6, rowspan=2, padx=15)
-        btn_subir = ttk.Button(action_buttons_frame, text="↑", width=3,
-                               command=lambda fid=frame_id: self._mover_campo(fid, -1))
-        btn_subir.pack(side="left")
-        btn_descer = ttk.Button(action_buttons_frame, text="↓", width=3,
-                                command=lambda fid=frame_id: self._mover_campo(fid, 1))
-        btn_descer.pack(side="left")
-        btn_remover = ttk.Button(action_buttons_frame, text="Remover",
-                                 command=lambda index=frame_id: self.remover_campo(index))
-        btn_remover.pack(side="left", padx=(5, 0))
-
-        btn_condicao = ttk.Button(campo_frame, text="Adicionar Condição")
-        btn_condicao.grid(row=1, column=0, columnspan=2, pady=(5, 0), sticky="ew")
-        Tooltip(btn_condicao, "Adicionar uma regra para gerar este campo\ncom base no valor de um campo anterior.")
-        if config and config.get('condicional'): btn_condicao.config(style="Accent.TButton")
+        # Os comandos leem o índice do campo vinculado no momento do clique
+        ttk.Button(action_buttons_frame, text="↑", width=3,
+                   command=lambda: self._mover_campo(editor['indice'], -1)).pack(side="left")
+        ttk.Button(action_buttons_frame, text="↓", width=3,
+                   command=lambda: self._mover_campo(editor['indice'], 1)).pack(side="left")
+        ttk.Button(action_buttons_frame, text="Remover",
+                   command=lambda: self.remover_campo(editor['indice'])).pack(side="left", padx=(5, 0))
+
+        editor['btn_condicao'] = ttk.Button(campo_frame, text="Adicionar Condição",
+                                            command=lambda: self._abrir_dialogo_condicional(editor['indice']))
+        editor['btn_condicao'].grid(row=1, column=0, columnspan=2, pady=(5, 0), sticky="ew")
+        Tooltip(editor['btn_condicao'],
+                "Adicionar uma regra para gerar este campo\ncom base no valor de um campo anterior.")
 
         params_frame = ttk.Frame(campo_frame)
         params_frame.grid(row=2, column=0, columnspan=7, sticky='ew', pady=(10, 0))
         params_frame.grid_columnconfigure(1, weight=3)
         params_frame.grid_columnconfigure(2, weight=2)
         params_frame.grid_columnconfigure(3, weight=1)
-        label_limites = ttk.Label(params_frame, text="Parâmetros:")
-        entry_limite1, entry_limite2, entry_opcoes_regex = ttk.Entry(params_frame, textvariable=limite1_var), ttk.Entry(
-            params_frame, textvariable=limite2_var), ttk.Entry(params_frame, textvariable=opcoes_var)
-        combo_fk_arquivo, combo_fk_campo = ttk.Combobox(params_frame, textvariable=fk_arquivo_var,
-                                                        state='readonly'), ttk.Combobox(params_frame,
-                                                                                        textvariable=fk_campo_var,
-                                                                                        state='readonly')
-        combo_fk_cardinalidade = ttk.Combobox(params_frame, textvariable=fk_cardinalidade_var,
-                                              values=["Um-para-Muitos (1:N)", "Um-para-Um (1:1)"], state='readonly')
-
-        def _atualizar_parametros(*args):
-            for widget in params_frame.winfo_children(): widget.grid_forget()
-            tipo = tipo_var.get()
-            label_limites.grid(row=0, column=0, sticky="w")
-            if tipo in ['integer', 'float', 'string']:
-                label_limites.config(text="Min/Max:")
-                entry_limite1.grid(row=0, column=1,
-                                   sticky="ew")
-                entry_limite2.grid(row=0,
-                                   column=2,
-                                   sticky="ew")
-            elif tipo == 'datetime':
-                label_limites.config(text="Data Início/Fim:")
-                entry_limite1.grid(row=0, column=1,
-                                   sticky="ew")
-                entry_limite2.grid(
-                    row=0, column=2, sticky="ew")
-            elif tipo == 'lista_opcoes':
-                label_limites.config(text="Opções (,):")
-                entry_opcoes_regex.config(
-                    textvariable=opcoes_var)
-                entry_opcoes_regex.grid(row=0, column=1, sticky="ew", columnspan=3)
-            elif tipo == 'regex':
-                label_limites.config(text="Padrão Regex:")
-                entry_opcoes_regex.config(
-                    textvariable=regex_var)
-                entry_opcoes_regex.grid(row=0, column=1, sticky="ew", columnspan=3)
-            elif tipo == 'chave_estrangeira':
-                label_limites.config(text="Relação:")
-                arquivos_e_pks = self.app_controller.get_lista_de_abas_e_pks(aba_atual=self)
-                combo_fk_arquivo['values'] = list(arquivos_e_pks.keys())
-                combo_fk_arquivo.grid(row=0, column=1, sticky="ew")
-                combo_fk_campo.grid(row=0, column=2, sticky="ew")
-                combo_fk_cardinalidade.grid(row=0, column=3, sticky="ew", padx=(5, 0))
-
-                def on_fk_arquivo_selecionado(event):
-                    fk_campo_var.set('')
-                    combo_fk_campo['values'] = arquivos_e_pks.get(fk_arquivo_var.get(), [])
-
-                combo_fk_arquivo.bind("<<ComboboxSelected>>", on_fk_arquivo_selecionado)
-                if fk_arquivo_var.get(): on_fk_arquivo_selecionado(None)
-
-        tipo_var.trace_add("write", _atualizar_parametros)
-        _atualizar_parametros()
-
-        campo_dict = {'frame': campo_frame, 'id': frame_id, 'nome': nome_var, 'tipo': tipo_var, 'e_pk': e_pk_var,
-                      'repeticao': repeticao_var, 'limite1': limite1_var, 'limite2': limite2_var, 'opcoes': opcoes_var,
-                      'regex': regex_var, 'fk_arquivo': fk_arquivo_var, 'fk_campo': fk_campo_var,
-                      'fk_cardinalidade': fk_cardinalidade_var, 'btn_subir': btn_subir, 'btn_descer': btn_descer,
-                      'btn_remover': btn_remover, 'btn_condicao': btn_condicao,
-                      'condicional': config.get('condicional')}
-        btn_condicao.config(command=lambda c=campo_dict: self._abrir_dialogo_condicional(c))
-        self.frames_campos.append(campo_dict)
-        self._atualizar_lista_unicidade()
-        self.app_controller.after_idle(lambda: self.app_controller._update_scrollregion(self.canvas))
-
-    def _atualizar_lista_unicidade(self):
-        selecao_previa = self.constraint_listbox.curselection()
-        nomes_selecionados = {self.constraint_listbox.get(i) for i in selecao_previa}
-        self.constraint_listbox.delete(0, tk.END)
-        novos_nomes = [campo_dict['nome'].get() for campo_dict in self.frames_campos]
-        for nome in novos_nomes: self.constraint_listbox.insert(tk.END, nome)
-        for i, nome in enumerate(novos_nomes):
-            if nome in nomes_selecionados: self.constraint_listbox.selection_set(i)
+        editor['params_frame'] = params_frame
+        editor['label_limites'] = ttk.Label(params_frame, text="Parâmetros:")
+        editor['entry_limite1'] = ttk.Entry(params_frame, textvariable=v['limite1'])
+        editor['entry_limite2'] = ttk.Entry(params_frame, textvariable=v['limite2'])
+        editor['entry_opcoes_regex'] = ttk.Entry(params_frame, textvariable=v['opcoes'])
+        editor['combo_fk_arquivo'] = ttk.Combobox(params_frame, textvariable=v['fk_arquivo'], state='readonly')
+        editor['combo_fk_campo'] = ttk.Combobox(params_frame, textvariable=v['fk_campo'], state='readonly')
+        editor['combo_fk_cardinalidade'] = ttk.Combobox(params_frame, textvariable=v['fk_cardinalidade'],
+                                                        values=CARDINALIDADES, state='readonly')
+
+        def on_fk_arquivo_selecionado(event):
+            v['fk_campo'].set('')
+            pks = self.app_controller.get_lista_de_abas_e_pks(aba_atual=self).get(v['fk_arquivo'].get(), [])
+            editor['combo_fk_campo']['values'] = pks
+        editor['combo_fk_arquivo'].bind("<<ComboboxSelected>>", on_fk_arquivo_selecionado)
+
+        # Cada edição é gravada direto no modelo do campo vinculado
+        for chave, var in v.items():
+            var.trace_add("write", lambda *args, chave=chave: self._ao_editar(editor, chave))
+        return editor
+
+    def _ao_editar(self, editor, chave):
+        if editor['vinculando'] or editor['indice'] is None: return
+        self.campos[editor['indice']][chave] = editor['vars'][chave].get()
+        self.agendar_previa()
+        if chave == 'tipo': self._atualizar_parametros(editor)
+        if chave == 'nome':  # Renomear atualiza só o item do campo nas listas de unicidade e de ordenação
+            self._atualizar_itens_unicidade([editor['indice']])
+            self._atualizar_nomes_campos_ordenacao()
+
+    def _ao_marcar_pk(self, editor):
+        if editor['vars']['e_pk'].get():
+            editor['vars']['repeticao'].set("1")
+            editor['spin_rep'].config(state="disabled")
+        else:
+            editor['spin_rep'].config(state="normal")
+
+    def _atualizar_parametros(self, editor):
+        """Exibe os parâmetros do tipo do campo vinculado ao editor."""
+        params_frame, v = editor['params_frame'], editor['vars']
+        for widget in params_frame.winfo_children(): widget.grid_forget()
+        tipo, label_limites = v['tipo'].get(), editor['label_limites']
+        label_limites.grid(row=0, column=0, sticky="w")
+        if tipo in ['integer', 'float', 'string', 'datetime']:
+            label_limites.config(text="Min/Max:" if tipo != 'datetime' else "Data Início/Fim:")
+            editor['entry_limite1'].grid(row=0, column=1, sticky="ew")
+            editor['entry_limite2'].grid(row=0, column=2, sticky="ew")
+        elif tipo in ['lista_opcoes', 'regex']:
+            label_limites.config(text="Opções (,):" if tipo == 'lista_opcoes' else "Padrão Regex:")
+            editor['entry_opcoes_regex'].config(textvariable=v['opcoes'] if tipo == 'lista_opcoes' else v['regex'])
+            editor['entry_opcoes_regex'].grid(row=0, column=1, sticky="ew", columnspan=3)
+        elif tipo == 'chave_estrangeira':
+            label_limites.config(text="Relação:")
+            arquivos_e_pks = self.app_controller.get_lista_de_abas_e_pks(aba_atual=self)
+            editor['combo_fk_arquivo']['values'] = list(arquivos_e_pks.keys())
+            editor['combo_fk_campo']['values'] = arquivos_e_pks.get(v['fk_arquivo'].get(), [])
+            editor['combo_fk_arquivo'].grid(row=0, column=1, sticky="ew")
+            editor['combo_fk_campo'].grid(row=0, column=2, sticky="ew")
+            editor['combo_fk_cardinalidade'].grid(row=0, column=3, sticky="ew", padx=(5, 0))
+
+    def _vincular(self, editor, indice):
+        """Exibe o campo `indice` do modelo no editor, posicionado na sua faixa do canvas."""
+        modelo = self.campos[indice]
+        editor['indice'], editor['vinculando'] = indice, True
+        for chave, var in editor['vars'].items(): var.set(modelo[chave])
+        editor['vinculando'] = False
+        editor['frame'].config(text=f"Campo {indice + 1}")
+        editor['spin_rep'].config(state="disabled" if modelo['e_pk'] else "normal")
+        editor['btn_condicao'].config(style="Accent.TButton" if modelo.get('condicional') else "TButton")
+        self._atualizar_parametros(editor)
+        self.canvas.coords(editor['janela'], 0, indice * (self.altura_campo or 0))
+        self.canvas.itemconfig(editor['janela'], state="normal")
+
+    def _renderizar_campos_visiveis(self, *args):
+        """Vincula editores apenas aos campos na área visível do canvas, reaproveitando os que já os exibem."""
+        self._renderizacao_agendada = None
+        if self.altura_campo is None and self.campos:
+            # A altura de cada faixa é medida uma vez, no primeiro editor criado
+            editor = self._criar_editor_campo()
+            self.editores.append(editor)
+            self._vincular(editor, 0)
+            editor['frame'].update_idletasks()
+            self.altura_campo = editor['frame'].winfo_reqheight() + 10
+            self._atualizar_area_campos()
+        altura = self.altura_campo or 1
+        topo = self.canvas.canvasy(0)
+        primeiro = max(0, int(topo // altura))
+        ultimo = min(len(self.campos), int((topo + max(self.canvas.winfo_height(), altura)) // altura) + 1)
+
+        vinculados = {e['indice']: e for e in self.editores
+                      if e['indice'] is not None and primeiro <= e['indice'] < ultimo}
+        livres = [e for e in self.editores if e['indice'] not in vinculados]
+        for indice in range(primeiro, ultimo):
+            if indice in vinculados: continue
+            editor = livres.pop() if livres else self._criar_editor_campo()
+            if editor not in self.editores: self.editores.append(editor)
+            self._vincular(editor, indice)
+        for editor in livres:
+            editor['indice'] = None
+            self.canvas.itemconfig(editor['janela'], state="hidden")
+
+    def _agendar_renderizacao(self, *args):
+        if self._renderizacao_agendada is None:
+            self._renderizacao_agendada = self.after_idle(self._renderizar_campos_visiveis)
+
+    def _ao_rolar_campos(self, primeiro, ultimo):
+        self.scrollbar.set(primeiro, ultimo)
+        self._agendar_renderizacao()
+
+    def _ao_redimensionar_campos(self, event):
+        self._largura_campos = event.width
+        self._atualizar_area_campos()
+
+    def _atualizar_area_campos(self):
+        """Ajusta a região de rolagem e a altura das faixas ao número de campos e redesenha a área visível."""
+        altura = self.altura_campo or 0
+        for editor in self.editores:
+            self.canvas.itemconfig(editor['janela'], width=self._largura_campos, height=max(altura - 10, 1))
+        self.canvas.configure(scrollregion=(0, 0, self._largura_campos, len(self.campos) * altura))
+        self._agendar_renderizacao()
+
+    def _revincular(self, indices):
+        """Atualiza os editores visíveis que exibem os campos em `indices`."""
+        indices = set(indices)
+        for editor in self.editores:
+            if editor['indice'] in indices:
+                if editor['indice'] < len(self.campos): self._vincular(editor, editor['indice'])
+                else:
+                    editor['indice'] = None
+                    self.canvas.itemconfig(editor['janela'], state="hidden")
 
-    def _atualizar_comandos_e_titulos(self):
-        self._atualizar_nomes_campos_ordenacao()
-        self._atualizar_lista_unicidade()
-        for i, campo_dict in enumerate(self.frames_campos):
-            campo_dict['id'] = i
-            campo_dict['frame'].config(text=f"Campo {i + 1}")
-            campo_dict['btn_subir'].config(command=lambda index=i: self._mover_campo(index, -1))
-            campo_dict['btn_descer'].config(command=lambda index=i: self._mover_campo(index, 1))
-            campo_dict['btn_remover'].config(command=lambda index=i: self.remover_campo(index))
-
-    def _redesenhar_layout_campos(self):
-        for campo_dict in self.frames_campos: campo_dict['frame'].pack_forget()
-        for campo_dict in self.frames_campos: campo_dict['frame'].pack(fill="x", expand=True, padx=5, pady=5)
-        self.app_controller.after_idle(lambda: self.app_controller._update_scrollregion(self.canvas))
+    def adicionar_campo(self, config=None):
+        self.campos.append(_modelo_do_campo(config or {}, len(self.campos)))
+        self.constraint_listbox.insert(tk.END, self.campos[-1]['nome'])
+        self._atualizar_area_campos()
+        if not config: self.canvas.yview_moveto(1.0)  # Mostra o campo recém-adicionado
+        self.agendar_previa()
+
+    def chaves_primarias(self):
+        """Nomes dos campos marcados como chave primária."""
+        if self.config_pendente is not None:
+            return [campo['nome'] for campo in self.config_pendente.get('campos', []) if campo.get('e_pk')]
+        return [campo['nome'] for campo in self.campos if campo['e_pk']]
+
+    def _atualizar_itens_unicidade(self, indices):
+        """Atualiza os nomes dos campos em `indices` na lista de unicidade, preservando a seleção."""
+        for indice in sorted(indices):
+            selecionado = self.constraint_listbox.selection_includes(indice)
+            self.constraint_listbox.delete(indice)
+            self.constraint_listbox.insert(indice, self.campos[indice]['nome'])
+            if selecionado: self.constraint_listbox.selection_set(indice)
 
     def remover_campo(self, index):
-        if 0 <= index < len(self.frames_campos):
-            self.frames_campos.pop(index)['frame'].destroy()
-            self._atualizar_comandos_e_titulos()
+        if index is not None and 0 <= index < len(self.campos):
+            self.campos.pop(index)
+            self.constraint_listbox.delete(index)
+            self._atualizar_nomes_campos_ordenacao()
+            # Só os campos a partir do removido mudam de posição
+            self._revincular(range(index, len(self.campos) + 1))
+            self._atualizar_area_campos()
+            self.agendar_previa()
 
     def _mover_campo(self, index, direcao):
-        if (direcao == -1 and index == 0) or (direcao == 1 and index == len(self.frames_campos) - 1): return
+        if index is None: return
+        if (direcao == -1 and index == 0) or (direcao == 1 and index == len(self.campos) - 1): return
         nova_posicao = index + direcao
-        self.frames_campos[index], self.frames_campos[nova_posicao] = self.frames_campos[nova_posicao], \
-            self.frames_campos[index]
-        self._atualizar_comandos_e_titulos()
-        self._redesenhar_layout_campos()
+        self.campos[index], self.campos[nova_posicao] = self.campos[nova_posicao], self.campos[index]
+        selecao = (self.constraint_listbox.selection_includes(index),
+                   self.constraint_listbox.selection_includes(nova_posicao))
+        self._atualizar_itens_unicidade([index, nova_posicao])
+        for indice, selecionado in zip((nova_posicao, index), selecao):
+            if selecionado: self.constraint_listbox.selection_set(indice)
+            else: self.constraint_listbox.selection_clear(indice)
+        self._atualizar_nomes_campos_ordenacao()
+        self._revincular([index, nova_posicao])
+        self.agendar_previa()
 
     def _atualizar_nomes_campos_ordenacao(self):
-        nomes_campos = [f['nome'].get() for f in self.frames_campos if f['nome'].get()]
+        nomes_campos = [campo['nome'] for campo in self.campos if campo['nome']]
         for rule_dict in self.frames_sort:
             for widget in rule_dict['frame'].winfo_children():
                 if isinstance(widget, ttk.Combobox): widget['values'] = nomes_campos
@@ -426,7 +710,7 @@ class FileTab(ttk.Frame):
         rule_id = len(self.frames_sort)
         rule_frame = ttk.Frame(self.sort_rules_frame)
         rule_frame.pack(fill="x", pady=2)
-        nomes_campos = [f['nome'].get() for f in self.frames_campos if f['nome'].get()]
+        nomes_campos = [campo['nome'] for campo in self.campos if campo['nome']]
         campo_var = tk.StringVar(value=config.get('campo', ''))
         ordem_var = tk.StringVar(value=config.get('ordem', 'Ascendente'))
         ttk.Label(rule_frame, text="Ordenar por:").pack(side="left")
@@ -446,28 +730,18 @@ class FileTab(ttk.Frame):
         for i, r in enumerate(self.frames_sort): r['id'] = i
 
     def coletar_config_aba(self):
-        config_aba = {"nome_arquivo": self.nome_arquivo_var.get(), "num_linhas": int(self.num_linhas_var.get()),
-                      "separador": self.app_controller.separador_map.get(self.separador_var.get(),
-                                                                         self.separador_var.get()),
-                      "codificacao": self.codificacao_var.get(), "campos": [], "regras_sort": [],
-                      "constraint_unicidade": []}
-        for widgets in self.frames_campos:
-            campo_cfg = {"nome": widgets['nome'].get(), "tipo": widgets['tipo'].get(), "e_pk": widgets['e_pk'].get(),
-                         "repeticao": int(widgets['repeticao'].get())}
-            if widgets.get('condicional'): campo_cfg['condicional'] = widgets['condicional']
-            tipo = widgets['tipo'].get()
-            if tipo in ['integer', 'float', 'string', 'datetime']:
-                campo_cfg['limite'] = (widgets['limite1'].get(), widgets['limite2'].get())
-            elif tipo == 'lista_opcoes':
-                campo_cfg['opcoes'] = [opt.strip() for opt in widgets['opcoes'].get().split(',') if opt.strip()]
-            elif tipo == 'regex':
-                campo_cfg['regex_pattern'] = widgets['regex'].get()
-            elif tipo == 'chave_estrangeira':
-                campo_cfg['fk_arquivo'] = widgets['fk_arquivo'].get()
-                campo_cfg['fk_campo'] = widgets[
-                    'fk_campo'].get()
-                campo_cfg['cardinalidade'] = widgets['fk_cardinalidade'].get()
-            config_aba["campos"].append(campo_cfg)
+        if self.config_pendente is not None: return copy.deepcopy(self.config_pendente)  # Aba ainda não exibida
+        config_aba = copy.deepcopy(self.config_extra)
+        config_aba.update({"nome_arquivo": self.nome_arquivo_var.get(), "num_linhas": int(self.num_linhas_var.get()),
+                           "separador": self.app_controller.separador_map.get(self.separador_var.get(),
+                                                                              self.separador_var.get()),
+                           "codificacao": self.codificacao_var.get(),
+                           "campos": [_config_do_campo(campo) for campo in self.campos], "regras_sort": [],
+                           "constraint_unicidade": []})
+        if self.formato_var.get() != "csv": config_aba["formato"] = self.formato_var.get()
+        if self.compressao_var.get(): config_aba["compressao"] = self.compressao_var.get()
+        if self.formato_var.get() == "parquet" and self.linhas_por_grupo_var.get().strip():
+            config_aba["linhas_por_grupo"] = int(self.linhas_por_grupo_var.get())
         for rule_widgets in self.frames_sort: config_aba["regras_sort"].append(
             {'campo': rule_widgets['campo'].get(), 'ordem': rule_widgets['ordem'].get()})
         indices_selecionados = self.constraint_listbox.curselection()
@@ -475,13 +749,24 @@ class FileTab(ttk.Frame):
         return config_aba
 
     def carregar_config(self, config):
+        self.config_extra = {chave: copy.deepcopy(valor) for chave, valor in config.items()
+                             if chave not in CHAVES_EDITADAS}
         self.nome_arquivo_var.set(config.get("nome_arquivo", ""))
         self.num_linhas_var.set(str(config.get("num_linhas", 100)))
         self.codificacao_var.set(config.get("codificacao", "utf-8"))
         separador_salvo = config.get("separador", ",")
         self.separador_var.set(
             {v: k for k, v in self.app_controller.separador_map.items()}.get(separador_salvo, separador_salvo))
-        for campo_config in config.get("campos", []): self.adicionar_campo(campo_config)
+        self.formato_var.set(config.get("formato", "csv"))
+        self.compressao_var.set(config.get("compressao") or "")
+        self.linhas_por_grupo_var.set(str(config.get("linhas_por_grupo") or ""))
+        # Só o modelo é montado aqui; os editores são criados para os campos que aparecerem na tela
+        self.campos = [_modelo_do_campo(campo_config, i) for i, campo_config in enumerate(config.get("campos", []))]
+        self.constraint_listbox.delete(0, tk.END)
+        self.constraint_listbox.insert(tk.END, *(campo['nome'] for campo in self.campos))
+        self._atualizar_nomes_campos_ordenacao()
+        self._revincular([editor['indice'] for editor in self.editores])
+        self._atualizar_area_campos()
         for sort_config in config.get("regras_sort", []): self.adicionar_regra_sort(sort_config)
         campos_constraint = config.get("constraint_unicidade", [])
         for i, nome_campo in enumerate(self.constraint_listbox.get(0, tk.END)):
@@ -1,14 +1,19 @@
 # ui/main_window.py
 # Módulo que define a classe AppGeradorDados, a janela principal da aplicação.
 
+import concurrent.futures
+import copy
 import json
+import multiprocessing
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import threading
 import queue
 
 from ui.file_tab import FileTab  # Importa a classe da aba
-from data_generator import run_generation_in_thread
+from data_generator import run_generation_in_process
+
+# Prazo para o processo de geração remover os arquivos parciais após o Cancelar, antes de ser encerrado à força
+PRAZO_ENCERRAMENTO_MS = 5000
 
 
 class AppGeradorDados(tk.Tk):
@@ -18,10 +23,17 @@ class AppGeradorDados(tk.Tk):
         self.geometry("1024x768")
         icon = tk.PhotoImage(file="images/massbuilder.png")
         self.iconphoto(False, icon)
-        self.result_queue = queue.Queue()
+        # A geração roda em um processo próprio ('spawn': o processo filho não herda o estado do Tk)
+        self.contexto_processos = multiprocessing.get_context('spawn')
+        self.processo = None
+        # Pré-visualizações: geradas uma de cada vez em uma thread, com o cache de colunas compartilhado pelas abas
+        self.executor_previa = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.cache_previa = {}
+        self.config_sessao = {}  # Chaves da sessão carregada além dos arquivos (ex.: 'semente', 'motor', 'workers')
         self.separador_map = {"Vírgula (,)": ",", "Ponto e Vírgula (;)": ";", "Tab (    )": "\t", "Pipe (|)": "|"}
         self.tabs = []
         self._criar_widgets()
+        self.protocol("WM_DELETE_WINDOW", self._ao_fechar)
 
     def _criar_widgets(self):
         main_frame = ttk.Frame(self)
@@ -37,12 +49,17 @@ class AppGeradorDados(tk.Tk):
 
         self.notebook = ttk.Notebook(main_frame)
         self.notebook.pack(fill="both", expand=True, padx=10, pady=10)
+        self.notebook.bind("<<NotebookTabChanged>>", self._ao_selecionar_aba)
 
         action_frame = ttk.Frame(main_frame, padding="10")
         action_frame.pack(side="bottom", fill="x", expand=False)
         self.btn_gerar = ttk.Button(action_frame, text="Gerar Todos os Arquivos", command=self.iniciar_geracao,
                                     style="Accent.TButton")
         self.btn_gerar.pack()
+        self.instrumentar_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(action_frame, text="Medir tempo por etapa", variable=self.instrumentar_var).pack(pady=(5, 0))
+        self.motor_colunar_var = tk.BooleanVar(value=False)  # Salvo na sessão como "motor": "colunar"
+        ttk.Checkbutton(action_frame, text="Motor colunar (requer numpy)", variable=self.motor_colunar_var).pack()
 
         try:
             self.tk.call("source", "azure.tcl"); self.tk.call("set_theme", "light")
@@ -50,13 +67,21 @@ class AppGeradorDados(tk.Tk):
             pass
         self.adicionar_aba()
 
-    def adicionar_aba(self, config=None):
+    def adicionar_aba(self, config=None, selecionar=True):
         nome_aba = config['nome_arquivo'] if config else f"Arquivo {self.notebook.index('end') + 1}"
-        tab = FileTab(self.notebook, self, nome_inicial=nome_aba)
+        # A aba guarda `config` e só cria seus widgets quando for exibida
+        tab = FileTab(self.notebook, self, nome_inicial=nome_aba, config=config)
         self.tabs.append(tab)
         self.notebook.add(tab, text=nome_aba)
-        self.notebook.select(tab)
-        if config: tab.carregar_config(config)
+        if selecionar:
+            self.notebook.select(tab)
+            tab.materializar()
+
+    def _ao_selecionar_aba(self, event=None):
+        if not self.notebook.select(): return
+        aba = self.nametowidget(self.notebook.select())
+        aba.materializar()
+        aba.agendar_previa()  # As chaves das FKs podem ter mudado em outra aba
 
     def remover_aba_atual(self):
         if self.notebook.index('end') > 0:
@@ -74,28 +99,27 @@ class AppGeradorDados(tk.Tk):
         for tab in self.tabs:
             if tab is not aba_atual:
                 nome_arquivo = tab.nome_arquivo_var.get()
-                pks = [wdg['nome'].get() for wdg in tab.frames_campos if wdg['e_pk'].get()]
+                pks = tab.chaves_primarias()
                 if pks: resultado[nome_arquivo] = pks
         return resultado
 
-    def _update_scrollregion(self, canvas):
-        # Otimização: Atualizar a região de rolagem de forma mais eficiente
-        # Evita chamadas desnecessárias a update_idletasks() que podem causar redraws excessivos
-        if not hasattr(canvas, '_update_pending'):
-            canvas._update_pending = True
-            
-            def _do_update():
-                if hasattr(canvas, '_update_pending'):
-                    canvas.update_idletasks()
-                    canvas.configure(scrollregion=canvas.bbox("all"))
-                    delattr(canvas, '_update_pending')
-            
-            # Agrupar atualizações com um pequeno atraso para evitar múltiplas chamadas
-            self.after(5, _do_update)
+    def coletar_configs_para_previa(self, aba_atual=None):
+        """Configurações das demais abas, fonte das chaves das FKs na pré-visualização (ignora as inválidas)."""
+        configs = []
+        for tab in self.tabs:
+            if tab is aba_atual: continue
+            try:
+                configs.append(tab.coletar_config_aba())
+            except (ValueError, TypeError):
+                continue
+        return configs
 
     def _coletar_configuracoes(self):
         try:
-            return {"arquivos": [tab.coletar_config_aba() for tab in self.tabs]}
+            config = {**copy.deepcopy(self.config_sessao), "arquivos": [tab.coletar_config_aba() for tab in self.tabs]}
+            if self.motor_colunar_var.get(): config["motor"] = "colunar"
+            else: config.pop("motor", None)
+            return config
         except Exception as e:
             messagebox.showerror("Erro ao Coletar Configurações", f"Verifique os parâmetros.\nDetalhes: {e}")
             return None
@@ -103,18 +127,30 @@ class AppGeradorDados(tk.Tk):
     def iniciar_geracao(self):
         config = self._coletar_configuracoes()
         if not config: return
+        if self.instrumentar_var.get(): config["instrumentar"] = True  # O resumo por etapa vem na mensagem final
         
         # Desabilitar todos os controles durante a geração para evitar interações do usuário
         self.btn_gerar.config(state="disabled", text="Gerando...")
         
-        # Mostrar um indicador de progresso
-        progress_frame = ttk.Frame(self)
+        # Mostrar o progresso: uma barra por arquivo, um resumo (linhas/s, MB gravados, tempo restante) e o botão Cancelar
+        progress_frame = ttk.Frame(self, padding=15, relief="solid", borderwidth=1)
         progress_frame.place(relx=0.5, rely=0.5, anchor="center")
         
-        ttk.Label(progress_frame, text="Gerando dados...", font=("Helvetica", 12)).pack(pady=5)
-        progress = ttk.Progressbar(progress_frame, mode="indeterminate", length=300)
-        progress.pack(pady=10)
-        progress.start(10)  # Iniciar animação
+        ttk.Label(progress_frame, text="Gerando dados...", font=("Helvetica", 12)).grid(row=0, column=0, columnspan=3,
+                                                                                      pady=5)
+        self.barras_progresso = {}
+        for linha, config_arquivo in enumerate(config["arquivos"], start=1):
+            nome, total = config_arquivo["nome_arquivo"], config_arquivo["num_linhas"]
+            ttk.Label(progress_frame, text=nome).grid(row=linha, column=0, sticky="w", padx=(0, 10))
+            barra = ttk.Progressbar(progress_frame, mode="determinate", length=300, maximum=max(total, 1))
+            barra.grid(row=linha, column=1, pady=2)
+            rotulo = ttk.Label(progress_frame, text=f"0 / {total}", width=24)
+            rotulo.grid(row=linha, column=2, sticky="w", padx=(10, 0))
+            self.barras_progresso[nome] = (barra, rotulo)
+        self.resumo_progresso = ttk.Label(progress_frame, text="Preparando...")
+        self.resumo_progresso.grid(row=len(config["arquivos"]) + 1, column=0, columnspan=3, pady=(10, 5))
+        self.btn_cancelar = ttk.Button(progress_frame, text="Cancelar", command=self.cancelar_geracao)
+        self.btn_cancelar.grid(row=len(config["arquivos"]) + 2, column=0, columnspan=3)
         
         # Atualizar a UI antes de iniciar o processamento pesado
         self.update_idletasks()
@@ -122,33 +158,98 @@ class AppGeradorDados(tk.Tk):
         # Armazenar referência ao frame de progresso para removê-lo depois
         self.progress_frame = progress_frame
         
-        # Iniciar thread de processamento
-        thread = threading.Thread(target=run_generation_in_thread, args=(config, self.result_queue), daemon=True)
-        thread.start()
+        # Iniciar o processo de geração: progresso e resultado chegam pela fila; o evento é o token de
+        # cancelamento verificado a cada lote. Não é daemon, pois pode criar seu próprio pool de processos
+        self.result_queue = self.contexto_processos.Queue()
+        self.cancelamento = self.contexto_processos.Event()
+        self.processo = self.contexto_processos.Process(target=run_generation_in_process,
+                                                        args=(config, self.result_queue, self.cancelamento))
+        self.processo.start()
         
         # Verificar o resultado com menos frequência para reduzir sobrecarga de UI
-        self.after(200, self.verificar_thread)
+        self.after(200, self.verificar_geracao)
+
+    def cancelar_geracao(self):
+        # O evento é verificado a cada lote, inclusive nos processos do pool, e a geração se desfaz sozinha (arquivos
+        # parciais, transação do banco); só um processo que não terminar no prazo é encerrado à força
+        self.cancelamento.set()
+        self.btn_cancelar.config(state="disabled", text="Cancelando...")
+        self.after(PRAZO_ENCERRAMENTO_MS, self._forcar_encerramento, self.processo)
+
+    def _forcar_encerramento(self, processo):
+        # terminate() é um SIGTERM no POSIX (ainda tratado como cancelamento pelo processo), mas encerra na hora no
+        # Windows; kill() é o último recurso
+        if not processo.is_alive(): return
+        processo.terminate()
+        self.after(PRAZO_ENCERRAMENTO_MS, lambda: processo.is_alive() and processo.kill())
 
-    def verificar_thread(self):
+    def verificar_geracao(self):
+        # Consome todas as mensagens pendentes; apenas o último evento de progresso é desenhado
+        ultimo_progresso = None
+        processo_ativo = self.processo.is_alive()  # Consultado antes de esvaziar a fila, para não perder o resultado
         try:
-            result = self.result_queue.get_nowait()
-            
-            # Remover indicador de progresso
-            if hasattr(self, 'progress_frame'):
-                self.progress_frame.destroy()
-                delattr(self, 'progress_frame')
-            
-            # Restaurar estado do botão
-            self.btn_gerar.config(state="normal", text="Gerar Todos os Arquivos")
-            
-            # Mostrar resultado
-            if result['status'] == 'success':
-                messagebox.showinfo("Sucesso", result['message'])
-            else:
-                messagebox.showerror("Erro na Geração", result['message'])
+            while True:
+                result = self.result_queue.get_nowait()
+                if result['status'] == 'progress':
+                    ultimo_progresso = result
+                    continue
+                self._finalizar_geracao(result)
+                return
         except queue.Empty:
+            if not processo_ativo:  # O processo terminou sem enviar o resultado (encerrado à força ou falhou)
+                if self.cancelamento.is_set():
+                    self._finalizar_geracao({'status': 'cancelled', 'message': "Geração cancelada pelo usuário."})
+                else:
+                    mensagem = f"O processo de geração terminou inesperadamente (código {self.processo.exitcode})."
+                    self._finalizar_geracao({'status': 'error', 'message': mensagem})
+                return
+            if ultimo_progresso: self._atualizar_progresso(ultimo_progresso)
             # Verificar novamente após um intervalo maior para reduzir a carga na UI
-            self.after(200, self.verificar_thread)
+            self.after(200, self.verificar_geracao)
+
+    def _ao_fechar(self):
+        # Um processo de geração em andamento impediria o encerramento da aplicação
+        if self.processo is not None and self.processo.is_alive():
+            if not messagebox.askyesno("Confirmar", "A geração está em andamento. Deseja interrompê-la e sair?"):
+                return
+            self.cancelamento.set()
+            self.processo.join(PRAZO_ENCERRAMENTO_MS / 1000)
+            if self.processo.is_alive():
+                self.processo.terminate()
+                self.processo.join(PRAZO_ENCERRAMENTO_MS / 1000)
+            if self.processo.is_alive(): self.processo.kill()
+        self.executor_previa.shutdown(wait=False, cancel_futures=True)
+        self.destroy()
+
+    def _atualizar_progresso(self, evento):
+        for nome, (barra, rotulo) in self.barras_progresso.items():
+            linhas, total = evento['linhas'].get(nome, 0), evento['total_linhas'].get(nome, 0)
+            barra['value'] = linhas
+            rotulo.config(text=f"{linhas} / {total}  ({evento['bytes'].get(nome, 0) / 1e6:.1f} MB)")
+        velocidade = evento['linhas_por_segundo']
+        restantes = sum(evento['total_linhas'].values()) - sum(evento['linhas'].values())
+        tempo_restante = f"{restantes / velocidade:.0f}s" if velocidade > 0 else "--"
+        self.resumo_progresso.config(text=f"Arquivo atual: {evento['arquivo']}  |  {velocidade:,.0f} linhas/s  |  "
+                                          f"{sum(evento['bytes'].values()) / 1e6:.1f} MB  |  "
+                                          f"restante: {tempo_restante}")
+
+    def _finalizar_geracao(self, result):
+        # Remover indicador de progresso
+        if hasattr(self, 'progress_frame'):
+            self.progress_frame.destroy()
+            delattr(self, 'progress_frame')
+        
+        self.processo.join(1)  # O resultado já chegou: o processo está terminando
+        # Restaurar estado do botão
+        self.btn_gerar.config(state="normal", text="Gerar Todos os Arquivos")
+        
+        # Mostrar resultado
+        if result['status'] == 'success':
+            messagebox.showinfo("Sucesso", result['message'])
+        elif result['status'] == 'cancelled':
+            messagebox.showwarning("Geração Cancelada", result['message'])
+        else:
+            messagebox.showerror("Erro na Geração", result['message'])
 
     def salvar_sessao(self):
         config = self._coletar_configuracoes()
@@ -169,8 +270,13 @@ class AppGeradorDados(tk.Tk):
             with open(filepath, 'r', encoding='utf-8') as f:
                 config = json.load(f)
             self.limpar_tudo(confirmar=False)
+            self.config_sessao = {chave: valor for chave, valor in config.items() if chave != "arquivos"}
+            self.motor_colunar_var.set(config.get("motor") == "colunar")
+            # As abas da sessão são criadas vazias; cada uma monta seus widgets ao ser selecionada
             for config_arquivo in config.get("arquivos", []):
-                self.adicionar_aba(config_arquivo)
+                self.adicionar_aba(config_arquivo, selecionar=False)
+            self.notebook.select(self.tabs[-1])
+            self._ao_selecionar_aba()
         except Exception as e:
             messagebox.showerror("Erro ao Carregar", f"Não foi possível ler o arquivo:\n{e}")
 
@@ -178,4 +284,7 @@ class AppGeradorDados(tk.Tk):
         if confirmar and not messagebox.askyesno("Confirmar", "Deseja limpar toda a sessão?"): return
         for tab_widget in list(self.tabs): self.notebook.forget(tab_widget)
         self.tabs.clear()
+        self.config_sessao = {}
+        self.motor_colunar_var.set(False)
+        self.cache_previa = {}  # Um novo dicionário: a thread da pré-visualização pode estar usando o anterior
         self.adicionar_aba()
\ No newline at end of file